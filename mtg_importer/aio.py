@@ -0,0 +1,314 @@
+import asyncio, json, time
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    import aiohttp
+except ImportError:  # optional: pip install "mtg-notion-importer[async]"
+    aiohttp = None
+
+from requests.structures import CaseInsensitiveDict
+
+from . import bulk, metrics, notion_api, scry, tracing
+from .images import ImageQueue
+from .notion_api import NotionClient
+from .overrides import apply_overrides
+from .profiling import stage
+from .ratelimit import RateLimiter
+from .state import Run
+from .transport import IDEMPOTENT_METHODS, RetryPolicy
+from .upsert import Plan, plan_page, plan_upsert, settle
+from .util import timestamp
+
+HOST_LIMITS = {"api.notion.com": 8, "api.scryfall.com": 4}
+
+
+class AsyncResponse:
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes, url: str):
+        self.status_code, self.headers, self.content, self.url = status, headers, body, url
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"{self.status_code} error for {self.url}: {self.content[:200]!r}")
+
+
+class AsyncHTTP:
+    """aiohttp session with a per-host in-flight limit and the shared RetryPolicy."""
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None, default_limit: int = 16,
+                 policy: Optional[RetryPolicy] = None):
+        if aiohttp is None:
+            raise RuntimeError("The async engine needs aiohttp: pip install aiohttp")
+        self.limits = dict(HOST_LIMITS, **(limits or {}))
+        self.default_limit = default_limit
+        self.policy = policy or RetryPolicy()
+        self._sems: Dict[str, asyncio.Semaphore] = {}
+        self.session = None
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0),
+                                             timeout=aiohttp.ClientTimeout(total=60))
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    def _sem(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).hostname or ""
+        if host not in self._sems:
+            self._sems[host] = asyncio.Semaphore(self.limits.get(host, self.default_limit))
+        return self._sems[host]
+
+    async def request(self, method: str, url: str, limiter: Optional[RateLimiter] = None,
+                      idempotent: Optional[bool] = None, **kw) -> AsyncResponse:
+        """Same retry rules as Transport.request: non-idempotent calls are resent only after a 429
+        or a failed connect, never once the server may have acted on them."""
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        m = metrics.get_metrics()
+        host, ep = metrics.endpoint(method, url)
+        attempts = self.policy.max_attempts
+        throttled: Dict[str, Any] = {}
+        for attempt in range(attempts):
+            last = attempt + 1 >= attempts
+            if limiter:
+                with tracing.span("retry" if throttled else "rate limit", cat="wait", min_us=0 if throttled else 1000,
+                                  **throttled):
+                    while True:
+                        wait = limiter.try_acquire()
+                        if not wait: break
+                        await asyncio.sleep(wait)
+                throttled = {}
+            t0 = time.perf_counter()
+            try:
+                async with self._sem(url):
+                    t0 = time.perf_counter()  # latency excludes the wait for a host slot
+                    async with self.session.request(method, url, **kw) as resp:
+                        m.observe(host, ep, resp.status, time.perf_counter() - t0)
+                        r = AsyncResponse(resp.status, CaseInsensitiveDict(resp.headers), await resp.read(), str(resp.url))
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+                m.observe(host, ep, "error", time.perf_counter() - t0)
+                if last or not (idempotent or isinstance(e, aiohttp.ClientConnectorError)): raise
+                m.retry(host, ep, "error")
+                with tracing.span("retry", cat="wait", endpoint=ep, reason="error", attempt=attempt + 1):
+                    await asyncio.sleep(self.policy.delay(attempt))
+                continue
+            if r.status_code not in self.policy.statuses or last or not (idempotent or r.status_code == 429):
+                if limiter and r.status_code < 400: limiter.on_success()
+                return r
+            m.retry(host, ep, "429" if r.status_code == 429 else "5xx")
+            wait = self.policy.delay(attempt, r.headers.get("Retry-After"))
+            if limiter and r.status_code == 429:
+                limiter.on_throttle(wait)
+                throttled = {"endpoint": ep, "reason": "429", "attempt": attempt + 1}
+            else:
+                with tracing.span("retry", cat="wait", endpoint=ep, reason=str(r.status_code), attempt=attempt + 1):
+                    await asyncio.sleep(wait)
+        return r
+
+
+# Scryfall
+async def _get(http: AsyncHTTP, url: str, params: Dict[str, Any]):
+    """scry._get over aiohttp: the same disk cache, TTL and revalidation."""
+    hit, headers = await asyncio.to_thread(scry.cache_lookup, url, params)
+    if hit is not None:
+        return hit
+    r = await http.request("GET", url, params=params or None, headers=headers or None)
+    return await asyncio.to_thread(scry.cache_store, url, params, r)
+
+
+async def iter_set_pages(http: AsyncHTTP, code: str) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Async twin of scry.iter_set_pages; the next page is fetched while the caller works on this one."""
+    async def page(url: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with tracing.span("fetch", cat="scryfall", url=url):
+            r = await _get(http, url, params)
+            if r.status_code == 404:
+                return None
+            r.raise_for_status()
+            return r.json()
+
+    nxt: Optional[asyncio.Future] = asyncio.ensure_future(page(*scry.set_query(code)))
+    try:
+        while nxt:
+            data = await nxt
+            if data is None:
+                return
+            nxt = asyncio.ensure_future(page(data["next_page"], {})) if data.get("has_more") else None
+            yield data.get("data", [])
+    finally:
+        if nxt and not nxt.done():
+            nxt.cancel()
+
+
+# Notion
+class AsyncNotion:
+    def __init__(self, http: AsyncHTTP, headers: Dict[str, str], limiter: Optional[RateLimiter] = None):
+        self.http, self.h, self.limiter = http, headers, limiter
+
+    async def _send(self, method: str, url: str, body: Optional[Dict[str, Any]] = None,
+                    idempotent: Optional[bool] = None) -> AsyncResponse:
+        data = json.dumps(body) if body is not None else None
+        return await self.http.request(method, url, limiter=self.limiter, idempotent=idempotent, headers=self.h, data=data)
+
+    async def _query_all(self, db_id: str, body: Dict[str, Any], into: Dict[str, Dict[str, Any]]):
+        body = dict(body, page_size=100)
+        with tracing.lane("query", cat="notion"):  # chunks run concurrently, so each gets a lane
+            while True:
+                r = await self._send("POST", f"{notion_api.NOTION}/databases/{db_id}/query", body, idempotent=True)
+                r.raise_for_status()
+                data = r.json()
+                for page in data.get("results", []):
+                    cid = NotionClient._plain((page.get("properties") or {}).get("Card ID"))
+                    if cid and cid not in into:
+                        into[cid] = NotionClient._entry(page)
+                if not data.get("has_more") or not data.get("next_cursor"):
+                    return
+                body["start_cursor"] = data["next_cursor"]
+
+    async def index_by_card_id(self, db_id: str) -> Dict[str, Dict[str, Any]]:
+        index: Dict[str, Dict[str, Any]] = {}
+        await self._query_all(db_id, {}, index)
+        return index
+
+    async def query_by_card_ids(self, db_id: str, card_ids: List[str], chunk_size: int = 50) -> Dict[str, Dict[str, Any]]:
+        found: Dict[str, Dict[str, Any]] = {}
+        ids = list(dict.fromkeys([c for c in card_ids if c]))
+        await asyncio.gather(*[
+            self._query_all(db_id, {"filter": {"or": [{"property": "Card ID", "rich_text": {"equals": c}} for c in ids[i:i + chunk_size]]}}, found)
+            for i in range(0, len(ids), chunk_size)
+        ])
+        return found
+
+    async def create_card_page(self, db_id: str, properties: Dict[str, Any]) -> Optional[str]:
+        with tracing.span("create", cat="notion"):
+            r = await self._send("POST", f"{notion_api.NOTION}/pages", {"parent": {"database_id": db_id}, "properties": properties})
+            r.raise_for_status(); return r.json().get("id")
+
+    async def update_card_minimal(self, page_id: str, properties: Dict[str, Any]) -> bool:
+        with tracing.span("update", cat="notion", props=len(properties)):
+            r = await self._send("PATCH", f"{notion_api.NOTION}/pages/{page_id}", {"properties": properties})
+            if notion_api.page_gone(r.status_code, r.content):
+                raise notion_api.PageGone(page_id)
+            r.raise_for_status(); return True
+
+
+async def upsert_card(an: AsyncNotion, notion: NotionClient, db_id: str, title_prop: str,
+                      index: Dict[str, Dict[str, Any]], key: str, rec: dict, args,
+                      queue: Optional[ImageQueue] = None, plan: Optional[Plan] = None) -> Tuple[str, Optional[str]]:
+    """Async twin of cli._upsert_card: the same plan, with the writes awaited."""
+    if plan is None:
+        plan = plan_upsert(notion, title_prop, index.get(rec["id"]), key, rec, args)  # profiled stages never span an await
+    existing = index.get(rec["id"]) if plan.outcome == "updated" else None
+    if plan.outcome == "skipped" or args.dry_run:
+        return plan.outcome, plan.preview
+    try:
+        page_id = await _write(an, notion, db_id, plan, existing, rec, queue)
+    except notion_api.PageGone:  # archived or deleted in Notion since the mirror last saw it: recreate
+        plan = plan_upsert(notion, title_prop, None, key, rec, args)
+        page_id = await _write(an, notion, db_id, plan, None, rec, queue)
+    if plan.images_due and queue and rec.get("image_urls"):
+        queue.push(page_id, rec["image_urls"], key)
+    settle(plan, index, rec, page_id)
+    return plan.outcome, None
+
+
+async def _write(an: AsyncNotion, notion: NotionClient, db_id: str, plan: Plan, existing: Optional[Dict[str, Any]],
+                 rec: dict, queue: Optional[ImageQueue]) -> str:
+    if plan.images_due and not queue:
+        files = await asyncio.to_thread(notion.upload_images, rec.get("image_urls"))
+        if files:
+            plan.props["Image"] = {"files": files}
+    if existing:
+        await an.update_card_minimal(existing["id"], plan.props)
+        return existing["id"]
+    return await an.create_card_page(db_id, plan.props)
+
+
+async def import_sets(args, notion: NotionClient, db_id: str, title_prop: str, index: Dict[str, Dict[str, Any]],
+                      overrides: dict, queue: Optional[ImageQueue] = None, run: Optional[Run] = None) -> Tuple[Dict[str, int], List[str]]:
+    """Engine behind `import --engine async`.
+
+    Set pages stream in one at a time (the next is fetched while this one is upserted)
+    and cards are upserted as coroutines on one event loop, with at most `args.concurrency`
+    in flight and per-host limits; image transfers reuse the client's bounded image pool."""
+    sets = [s.lower() for s in args.sets]
+    counts = {"created": 0, "updated": 0, "skipped": 0, "failed": 0}
+    previews: List[str] = []
+    if notion.limiter is None:
+        notion.limiter = RateLimiter(rate=args.rate)  # image uploads run on the client in threads: one budget for both
+    async with AsyncHTTP(limits={urlsplit(notion_api.NOTION).hostname: args.concurrency}) as http:
+        an = AsyncNotion(http, notion.h, notion.limiter)
+        if index is None:
+            index = await an.index_by_card_id(db_id) if args.lookup == "index" else {}
+        path = idx = None
+        if args.source == "bulk":
+            path = await asyncio.to_thread(bulk.ensure_bulk_file)
+            idx = await asyncio.to_thread(bulk.load_index, path)
+        gate = asyncio.Semaphore(max(1, args.concurrency))
+
+        async def pages(code: str) -> AsyncIterator[List[Dict[str, Any]]]:
+            if args.source != "bulk":
+                async for page in iter_set_pages(http, code):
+                    yield page
+                return
+            cards = (await asyncio.to_thread(bulk.read_sets, [code], path, idx))[code]
+            for start in range(0, len(cards), scry.PAGE_SIZE):
+                yield cards[start:start + scry.PAGE_SIZE]
+
+        async def one(key: str, rec: dict, plan: Plan) -> Tuple[str, Optional[str]]:
+            async with gate:
+                with tracing.lane(key, card_id=rec["id"]) as span:
+                    outcome, line = await upsert_card(an, notion, db_id, title_prop, index, key, rec, args, queue, plan)
+                    span.set(outcome=outcome)
+                    return outcome, line
+
+        for code in sets:
+            print(timestamp(), "Importing", code.upper(), "…")
+            fetched = 0
+            async for page in pages(code):
+                fetched += len(page)
+                recs = []
+                with stage("normalize"):
+                    for item in page:
+                        base = scry.normalize(item, args.image_tier)
+                        key = f'{base.get("set","")}-{base.get("collector_number","")}'
+                        recs.append((key, apply_overrides(key, base, overrides)))
+                if run and run.done:
+                    todo = [(key, rec) for key, rec in recs if rec["id"] not in run.done]
+                    counts["skipped"] += len(recs) - len(todo)
+                    recs = todo
+                if not recs:
+                    continue
+                if args.lookup == "batch":
+                    try:
+                        index.update(await an.query_by_card_ids(db_id, [rec["id"] for _, rec in recs]))
+                    except Exception as e:
+                        counts["failed"] += len(recs)
+                        if len(previews) < 16:
+                            previews.append(f"ERROR lookup {code.upper()}: {e}")
+                        continue
+                plans = plan_page(notion, title_prop, index, recs, args)
+                results = await asyncio.gather(*[one(key, rec, plan) for (key, rec), plan in zip(recs, plans)],
+                                               return_exceptions=True)
+                for (key, rec), res in zip(recs, results):
+                    if isinstance(res, BaseException):
+                        outcome = "failed"
+                        if len(previews) < 16:
+                            previews.append(f"ERROR {key}: {res}")
+                    else:
+                        outcome, line = res
+                        if line and len(previews) < 16:
+                            previews.append(line)
+                    counts[outcome] += 1
+                    if run:
+                        run.record(rec["id"], key, outcome, (index.get(rec["id"]) or {}).get("id"))
+            print(timestamp(), "Fetched", fetched, "prints for", code.upper())
+    return counts, previews
+
+
+def run_import(args, notion: NotionClient, db_id: str, title_prop: str, index: Optional[Dict[str, Dict[str, Any]]],
+               overrides: dict, queue: Optional[ImageQueue] = None, run: Optional[Run] = None) -> Tuple[Dict[str, int], List[str]]:
+    return asyncio.run(import_sets(args, notion, db_id, title_prop, index, overrides, queue, run))
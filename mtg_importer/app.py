@@ -6,75 +6,23 @@ if PARENT not in sys.path: sys.path.insert(0, PARENT)
 
 import streamlit as st
 from typing import Dict, Any
-import json
 
+from mtg_importer import tracing
+from mtg_importer.images import ImageStore
 from mtg_importer.notion_api import NotionClient
-from mtg_importer.scry import fetch_set, normalize
+from mtg_importer.schema import codec
+from mtg_importer.scry import IMAGE_TIERS, fetch_set, normalize
+from mtg_importer.state import StateStore
+from mtg_importer.sync import record_hash
 from mtg_importer.util import format_title
 
 st.set_page_config(page_title="MTG Notion Importer", page_icon="🗂️", layout="centered")
 st.title("MTG – Notion Importer (Shared DB)")
-st.caption("UPSERT into one shared database. Existing pages: minimal update (Title, Procurement, Oracle/FF names, CN Sort). New pages: full create.")
+st.caption("UPSERT into one shared database. Existing pages: changed properties only (unchanged pages are skipped). New pages: full create.")
 
 def props_create(notion: NotionClient, rec: Dict[str, Any], title_prop: str, title_text: str) -> Dict[str, Any]:
-    def rt(v): return {"rich_text":[{"type":"text","text":{"content":v}}]} if v else {"rich_text":[]}
-    def sel(v): return {"select":{"name":v}} if v else {"select":None}
-    def ms(vs): return {"multi_select":[{"name":x} for x in (vs or [])]}
-    def num(n): return {"number": float(n) if n is not None else None}
-    def url(v): return {"url": v or None}
-    def date(v): return {"date": {"start": v}} if v else {"date": None}
+    props = codec(title_prop).create(rec, title_text)
     files = notion.upload_images(rec.get("image_urls"))
-    props = {
-        title_prop: {"title":[{"type":"text","text":{"content": title_text}}]},
-        "Set": sel(rec.get("set")),
-        "Collector #": rt(rec.get("collector_number","")),
-        "Rarity": sel(rec.get("rarity","")),
-        "Language": sel(rec.get("lang")),
-        "Released At": date(rec.get("released_at")),
-        "Layout": sel(rec.get("layout")),
-        "Artist": rt(rec.get("artist","")),
-        "Prices": rt(json.dumps(rec.get("prices")) if rec.get("prices") else ""),
-        "Legalities": rt(json.dumps(rec.get("legalities")) if rec.get("legalities") else ""),
-        "Mana Cost": rt(rec.get("mana_cost","")),
-        "CMC": num(rec.get("cmc")),
-        "Type Line": rt(rec.get("type_line","")),
-        "Oracle Text": rt(rec.get("oracle_text","")),
-        "Colors": ms(rec.get("colors") or []),
-        "Color Identity": ms(rec.get("color_identity") or []),
-        "Scryfall URL": url(rec.get("scryfall_uri")),
-        "Oracle ID": rt(rec.get("oracle_id","")),
-        "Card ID": rt(rec.get("id","")),
-        "Power": rt(rec.get("power","")),
-        "Toughness": rt(rec.get("toughness","")),
-        "Procurement Method": ms(rec.get("procurement") or []),
-        "Oracle Name": rt(rec.get("oracle_raw","")),
-        "FF Name": rt(rec.get("ff_raw","")),
-        "CN Sort": num(rec.get("cn_sort")),
-    }
-    if files:
-        props["Image"] = {"files": files}
-    return props
-
-def props_update(notion: NotionClient, title_prop: str, title_text: str, rec: Dict[str, Any]) -> Dict[str, Any]:
-    def ms(vs): return {"multi_select":[{"name":x} for x in (vs or [])]}
-    def rt(v): return {"rich_text":[{"type":"text","text":{"content":v}}]} if v else {"rich_text":[]}
-    def num(n): return {"number": float(n) if n is not None else None}
-    def sel(v): return {"select":{"name":v}} if v else {"select":None}
-    def date(v): return {"date": {"start": v}} if v else {"date": None}
-    files = notion.upload_images(rec.get("image_urls"))
-    props = {
-        title_prop: {"title":[{"type":"text","text":{"content": title_text}}]},
-        "Language": sel(rec.get("lang")),
-        "Released At": date(rec.get("released_at")),
-        "Layout": sel(rec.get("layout")),
-        "Artist": rt(rec.get("artist","")),
-        "Prices": rt(json.dumps(rec.get("prices")) if rec.get("prices") else ""),
-        "Legalities": rt(json.dumps(rec.get("legalities")) if rec.get("legalities") else ""),
-        "Procurement Method": ms(rec.get("procurement") or []),
-        "Oracle Name": rt(rec.get("oracle_raw","")),
-        "FF Name": rt(rec.get("ff_raw","")),
-        "CN Sort": num(rec.get("cn_sort")),
-    }
     if files:
         props["Image"] = {"files": files}
     return props
@@ -111,15 +59,24 @@ with tab:
         sets_str = st.text_input("Set codes (space-separated)", value="fca")
         db_title = st.text_input("Database title", value="MTG – Cards")
         title_style = st.selectbox("Title style", ["Oracle — FF","FF — Oracle","Oracle only"], index=0)
+        image_tier = st.selectbox("Image quality", list(IMAGE_TIERS), index=0, help="png is the largest Scryfall rendition")
         update_existing = st.checkbox("Update existing pages", value=True)
+        record_trace = st.checkbox("Record per-card trace", value=False, help="Chrome/Perfetto trace JSON offered for download after the run")
         submitted = st.form_submit_button("Run import")
 
     if submitted:
-        notion = NotionClient(token)
+        notion = NotionClient(token, images=ImageStore())
+        tracing.stop()  # drop a trace left running by an interrupted earlier run
+        tracer = tracing.start() if record_trace else None
         if verify(notion, parent_id):
             db = ensure_db(notion, parent_id, db_title)
             title_prop = notion.get_title_property_name(db["id"])
             st.write(f"Using title property: **{title_prop}**")
+            with st.spinner("Syncing local mirror of existing pages…"):
+                state = StateStore()
+                index, fetched = state.sync_mirror(notion, db["id"])
+                state.close()
+            st.write(f"Indexed **{len(index)}** existing pages ({fetched} fetched from Notion).")
 
             total_created = total_updated = total_skipped = total_failed = 0
             sample = []
@@ -127,37 +84,52 @@ with tab:
             for code in [s.strip().lower() for s in sets_str.split() if s.strip()]:
                 u = code.upper()
                 st.write(f"Fetching Scryfall cards for **{u}**…")
-                cards = fetch_set(code)
+                cards = list(fetch_set(code))
                 st.write(f"Fetched **{len(cards)}** cards for {u}.")
                 created = updated = skipped = failed = 0
 
                 for item in cards:
-                    rec = normalize(item)
+                    rec = normalize(item, image_tier)
                     new_title = format_title(rec.get("oracle_raw",""), rec.get("ff_raw",""), title_style)
-                    try:
-                        existing = notion.query_by_card_id(db["id"], rec["id"])
-                        if existing:
-                            if update_existing:
-                                notion.update_card_minimal(existing["id"], props_update(notion, title_prop, new_title, rec))
-                                updated += 1
-                                if len(sample) < 10:
-                                    sample.append(f'{u}-{rec.get("collector_number","?")}: → {new_title}')
+                    with tracing.lane(f'{rec.get("set","")}-{rec.get("collector_number","")}', card_id=rec["id"]) as span:
+                        try:
+                            existing = index.get(rec["id"])
+                            if existing:
+                                digest = record_hash(rec, new_title)
+                                if update_existing and existing.get("sync_hash") != digest:
+                                    delta = codec(title_prop).delta(rec, new_title, existing.get("props"), digest)
+                                    if not notion.images_unchanged(rec.get("image_urls"), (existing.get("props") or {}).get("Image")):
+                                        files = notion.upload_images(rec.get("image_urls"))
+                                        if files:
+                                            delta["Image"] = {"files": files}
+                                    notion.update_card_minimal(existing["id"], delta)
+                                    existing["sync_hash"] = digest
+                                    updated += 1; span.set(outcome="updated")
+                                    if len(sample) < 10:
+                                        sample.append(f'{u}-{rec.get("collector_number","?")}: → {new_title}')
+                                else:
+                                    skipped += 1; span.set(outcome="skipped")
                             else:
-                                skipped += 1
-                        else:
-                            notion.create_card_page(db["id"], props_create(notion, rec, title_prop, new_title))
-                            created += 1
-                    except Exception as e:
-                        failed += 1
-                        if len(sample) < 10:
-                            sample.append(f'ERROR {u}-{rec.get("collector_number","?")}: {e}')
+                                page_id = notion.create_card_page(db["id"], props_create(notion, rec, title_prop, new_title))
+                                index[rec["id"]] = {"id": page_id}
+                                created += 1; span.set(outcome="created")
+                        except Exception as e:
+                            failed += 1; span.set(outcome="failed")
+                            if len(sample) < 10:
+                                sample.append(f'ERROR {u}-{rec.get("collector_number","?")}: {e}')
 
                 st.info(f"[{u}] created={created} updated={updated} skipped={skipped} failed={failed}")
                 total_created += created; total_updated += updated; total_skipped += skipped; total_failed += failed
 
+            if notion.images:
+                notion.images.save()
             if sample:
                 st.markdown("**Preview (first changes):**\n\n- " + "\n- ".join(sample))
             if total_failed:
                 st.warning("Some items failed; see preview list above.")
             st.success(f"Totals — created={total_created} updated={total_updated} skipped={total_skipped} failed={total_failed}")
             st.info(f"Database: {db.get('url')}")
+        if tracer is not None:
+            tracing.stop()
+            st.download_button("Download trace (open in ui.perfetto.dev)", data=tracer.dumps(),
+                               file_name="mtg-import-trace.json", mime="application/json")
@@ -0,0 +1,162 @@
+import json, mmap, pathlib
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+from . import scry
+from .util import cache_dir
+
+BULK_TYPE = "default_cards"
+CHUNK = 1 << 20
+
+
+def _paths(bulk_type: str = BULK_TYPE):
+    d = cache_dir("bulk")
+    stem = bulk_type.replace("_", "-")
+    return d / f"{stem}.json", d / f"{stem}.meta.json"
+
+
+def _local_meta(meta_path: pathlib.Path) -> Dict[str, Any]:
+    try:
+        return json.loads(meta_path.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+def ensure_bulk_file(bulk_type: str = BULK_TYPE, force: bool = False) -> pathlib.Path:
+    """Download Scryfall's bulk file when its `updated_at` moved; reuse the cached copy otherwise."""
+    path, meta_path = _paths(bulk_type)
+    local = _local_meta(meta_path)
+    try:
+        r = scry._get(f"{scry.SCRY}/bulk-data/{bulk_type.replace('_', '-')}")
+        r.raise_for_status()
+        remote = r.json()
+    except Exception:
+        if path.exists():
+            return path  # offline: fall back to whatever we have
+        raise
+    if not force and path.exists() and local.get("updated_at") == remote.get("updated_at"):
+        return path
+    tmp = path.with_suffix(".part")
+    with scry._get_stream(remote["download_uri"]) as resp:
+        resp.raise_for_status()
+        with open(tmp, "wb") as f:
+            for chunk in resp.iter_content(CHUNK):
+                f.write(chunk)
+    tmp.replace(path)
+    meta_path.write_text(json.dumps({k: remote.get(k) for k in ("updated_at", "download_uri", "size")}), encoding="utf-8")
+    return path
+
+
+def _scan(f, chunk_size: int = CHUNK) -> Iterator[Tuple[Dict[str, Any], int, int]]:
+    """Yield (object, start, end) for each element of a top-level JSON array read from `f`."""
+    dec = json.JSONDecoder()
+    buf, pos, base, eof = "", 0, 0, False
+    while True:
+        n = len(buf)
+        while pos < n and buf[pos] in " \t\r\n,[":
+            pos += 1
+        if pos < n and buf[pos] == "]":
+            return
+        try:
+            obj, end = dec.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                if buf[pos:].strip():
+                    raise
+                return
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            base += pos
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+        yield obj, base + pos, base + end
+        pos = end
+
+
+def iter_cards(path: pathlib.Path, chunk_size: int = CHUNK) -> Iterator[Dict[str, Any]]:
+    """Stream card objects out of a top-level JSON array without loading the whole file."""
+    with open(path, encoding="utf-8") as f:
+        for obj, _, _ in _scan(f, chunk_size):
+            yield obj
+
+
+# sidecar index: set code -> byte ranges, card id -> byte range
+def _index_path(path: pathlib.Path) -> pathlib.Path:
+    return path.with_name(path.name + ".idx")
+
+
+def build_index(path: pathlib.Path, chunk_size: int = CHUNK) -> Dict[str, Any]:
+    """Single pass over the bulk file recording where every set and card lives.
+
+    The file is decoded as latin-1 so string offsets equal byte offsets; only the
+    ASCII `set`/`id` fields are read here, cards are re-decoded as UTF-8 on lookup."""
+    sets: Dict[str, List[List[int]]] = {}
+    ids: Dict[str, List[int]] = {}
+    prev = None
+    with open(path, encoding="latin-1", newline="") as f:
+        for obj, start, end in _scan(f, chunk_size):
+            code = (obj.get("set") or "").lower()
+            ranges = sets.setdefault(code, [])
+            if code == prev:
+                ranges[-1][1] = end  # contiguous run of the same set
+            else:
+                ranges.append([start, end])
+            prev = code
+            if obj.get("id"):
+                ids[obj["id"]] = [start, end]
+    st = path.stat()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sets": sets, "ids": ids}
+
+
+def load_index(path: pathlib.Path) -> Dict[str, Any]:
+    """Load the sidecar index, rebuilding it when the bulk file changed."""
+    ipath = _index_path(path)
+    st = path.stat()
+    try:
+        idx = json.loads(ipath.read_text(encoding="utf-8"))
+        if idx.get("size") == st.st_size and idx.get("mtime_ns") == st.st_mtime_ns:
+            return idx
+    except Exception:
+        pass
+    idx = build_index(path)
+    tmp = ipath.with_name(ipath.name + ".part")
+    tmp.write_text(json.dumps(idx, separators=(",", ":")), encoding="utf-8")
+    tmp.replace(ipath)
+    return idx
+
+
+def _decode_range(mm: mmap.mmap, start: int, end: int) -> List[Dict[str, Any]]:
+    text = mm[start:end].decode("utf-8")
+    dec, out, pos, n = json.JSONDecoder(), [], 0, len(text)
+    while True:
+        while pos < n and text[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= n:
+            return out
+        obj, pos = dec.raw_decode(text, pos)
+        out.append(obj)
+
+
+def read_sets(codes: Iterable[str], path: pathlib.Path, index: Optional[Dict[str, Any]] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Decode only the byte ranges belonging to `codes`, via mmap."""
+    idx = index or load_index(path)
+    codes = [c.lower() for c in codes]
+    out: Dict[str, List[Dict[str, Any]]] = {c: [] for c in codes}
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for c in codes:
+            for start, end in idx["sets"].get(c, []):
+                out[c].extend(_decode_range(mm, start, end))
+    return out
+
+
+def get_card(card_id: str, path: Optional[pathlib.Path] = None, index: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    path = path or ensure_bulk_file()
+    idx = index or load_index(path)
+    span = idx["ids"].get(card_id)
+    if not span:
+        return None
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return _decode_range(mm, *span)[0]
+
+
+def fetch_sets(codes: Iterable[str], path: Optional[pathlib.Path] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Cards for `codes` grouped by set code (lowercase), read through the sidecar index."""
+    return read_sets(codes, path or ensure_bulk_file())
@@ -1,80 +1,171 @@
-import argparse, sys, os, time, getpass, json
-from typing import List, Dict, Any
-from .notion_api import NotionClient
-from .scry import fetch_set, normalize
-from .util import format_title, mask_token
+import argparse, sys, os, time, getpass
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from .images import ImageQueue, ImageStore, Transcoder
+from .notion_api import NotionClient, PageGone
+from .ratelimit import RateLimiter, NOTION_AVG_RATE
+from . import bulk, metrics, profiling, scry, tracing, transport
+from .scry import IMAGE_TIERS, PAGE_SIZE as SCRY_PAGE_SIZE, iter_set_pages, normalize
+from .util import mask_token, timestamp as _ts
 from .overrides import load_overrides, apply_overrides
+from .decklist import identifier, load_list
+from .names import load_name_index
+from .pipeline import Prefetcher
+from .profiling import STAGES, stage
+from .schema import codec
+from .state import Run, StateStore
+from .upsert import Plan, plan_page, plan_upsert, settle
 
-def _ts(): return time.strftime("[%Y-%m-%d %H:%M:%S]")
-
-def build_props_for_create(rec: dict, title_prop: str, title_text: str, notion: NotionClient) -> Dict[str, Any]:
-    def rt(v): return {"rich_text":[{"type":"text","text":{"content":v}}]} if v else {"rich_text":[]}
-    def sel(v): return {"select":{"name":v}} if v else {"select":None}
-    def ms(vs): return {"multi_select":[{"name":x} for x in (vs or [])]}
-    def num(n): return {"number": float(n) if n is not None else None}
-    def url(v): return {"url": v or None}
-    def date(v): return {"date": {"start": v}} if v else {"date": None}
-    files = notion.upload_images(rec.get("image_urls"))
-    props = {
-        title_prop: {"title":[{"type":"text","text":{"content": title_text}}]},
-        "Set": sel(rec.get("set")),
-        "Collector #": rt(rec.get("collector_number","")),
-        "Rarity": sel(rec.get("rarity","")),
-        "Language": sel(rec.get("lang")),
-        "Released At": date(rec.get("released_at")),
-        "Layout": sel(rec.get("layout")),
-        "Artist": rt(rec.get("artist","")),
-        "Prices": rt(json.dumps(rec.get("prices")) if rec.get("prices") else ""),
-        "Legalities": rt(json.dumps(rec.get("legalities")) if rec.get("legalities") else ""),
-        "Mana Cost": rt(rec.get("mana_cost","")),
-        "CMC": num(rec.get("cmc")),
-        "Type Line": rt(rec.get("type_line","")),
-        "Oracle Text": rt(rec.get("oracle_text","")),
-        "Colors": ms(rec.get("colors") or []),
-        "Color Identity": ms(rec.get("color_identity") or []),
-        "Scryfall URL": url(rec.get("scryfall_uri")),
-        "Oracle ID": rt(rec.get("oracle_id","")),
-        "Card ID": rt(rec.get("id","")),
-        "Power": rt(rec.get("power","")),
-        "Toughness": rt(rec.get("toughness","")),
-        "Procurement Method": ms(rec.get("procurement") or []),
-        "Oracle Name": rt(rec.get("oracle_raw","")),
-        "FF Name": rt(rec.get("ff_raw","")),
-        "CN Sort": num(rec.get("cn_sort")),
-    }
+def build_props_for_create(rec: dict, title_prop: str, title_text: str, notion: NotionClient, images: bool = True) -> Dict[str, Any]:
+    props = codec(title_prop).create(rec, title_text)
+    files = notion.upload_images(rec.get("image_urls")) if images else []
     if files:
         props["Image"] = {"files": files}
     return props
 
-def build_props_for_update(title_prop: str, title_text: str, rec: dict, notion: NotionClient) -> Dict[str, Any]:
-    def ms(vs): return {"multi_select":[{"name":x} for x in (vs or [])]}
-    def rt(v): return {"rich_text":[{"type":"text","text":{"content":v}}]} if v else {"rich_text":[]}
-    def num(n): return {"number": float(n) if n is not None else None}
-    def sel(v): return {"select":{"name":v}} if v else {"select":None}
-    def date(v): return {"date": {"start": v}} if v else {"date": None}
-    files = notion.upload_images(rec.get("image_urls"))
-    props = {
-        title_prop: {"title":[{"type":"text","text":{"content": title_text}}]},
-        "Language": sel(rec.get("lang")),
-        "Released At": date(rec.get("released_at")),
-        "Layout": sel(rec.get("layout")),
-        "Artist": rt(rec.get("artist","")),
-        "Prices": rt(json.dumps(rec.get("prices")) if rec.get("prices") else ""),
-        "Legalities": rt(json.dumps(rec.get("legalities")) if rec.get("legalities") else ""),
-        "Procurement Method": ms(rec.get("procurement") or []),
-        "Oracle Name": rt(rec.get("oracle_raw","")),
-        "FF Name": rt(rec.get("ff_raw","")),
-        "CN Sort": num(rec.get("cn_sort")),
-    }
+def build_props_for_update(title_prop: str, title_text: str, rec: dict, notion: NotionClient, images: bool = True) -> Dict[str, Any]:
+    props = codec(title_prop).update(rec, title_text)
+    files = notion.upload_images(rec.get("image_urls")) if images else []
     if files:
         props["Image"] = {"files": files}
     return props
 
-def cmd_import(args):
+def upsert_card(notion: NotionClient, db_id: str, title_prop: str, index: Dict[str, Dict[str, Any]],
+                key: str, rec: dict, args, queue: Optional[ImageQueue] = None,
+                plan: Optional[Plan] = None) -> Tuple[str, Optional[str]]:
+    """Create or update one card page; returns (outcome, preview line).
+
+    With a `queue`, pages are written text-only and their images are queued for backfill.
+    `plan` is the card's entry from `plan_page` when the caller planned a whole page."""
+    with tracing.lane(key, card_id=rec["id"]) as span:
+        outcome, line = _upsert_card(notion, db_id, title_prop, index, key, rec, args, queue, plan)
+        span.set(outcome=outcome)
+        return outcome, line
+
+def _upsert_card(notion: NotionClient, db_id: str, title_prop: str, index: Dict[str, Dict[str, Any]],
+                 key: str, rec: dict, args, queue: Optional[ImageQueue] = None,
+                 plan: Optional[Plan] = None) -> Tuple[str, Optional[str]]:
+    if plan is None:
+        plan = plan_upsert(notion, title_prop, index.get(rec["id"]), key, rec, args)
+    existing = index.get(rec["id"]) if plan.outcome == "updated" else None
+    if plan.outcome == "skipped" or args.dry_run:
+        return plan.outcome, plan.preview
+    try:
+        page_id = _write(notion, db_id, plan, existing, rec, queue)
+    except PageGone:  # archived or deleted in Notion since the mirror last saw it: recreate
+        plan = plan_upsert(notion, title_prop, None, key, rec, args)
+        page_id = _write(notion, db_id, plan, None, rec, queue)
+    if plan.images_due and queue and rec.get("image_urls"):
+        queue.push(page_id, rec["image_urls"], key)
+    settle(plan, index, rec, page_id)
+    return plan.outcome, None
+
+def _write(notion: NotionClient, db_id: str, plan: Plan, existing: Optional[Dict[str, Any]], rec: dict,
+           queue: Optional[ImageQueue]) -> str:
+    """Perform a create/patch plan (uploading its images unless they are queued); returns the page id."""
+    if plan.images_due and not queue:
+        files = notion.upload_images(rec.get("image_urls"))
+        if files:
+            plan.props["Image"] = {"files": files}
+    if existing:
+        notion.update_card_minimal(existing["id"], plan.props)
+        return existing["id"]
+    return notion.create_card_page(db_id, plan.props)
+
+def _token(args) -> str:
+    return args.token or os.environ.get("NOTION_TOKEN") or getpass.getpass("Notion token (ntn_*): ").strip()
+
+def _client(args, token: str) -> NotionClient:
+    """NotionClient wired to the shared transport, rate limiter and image store per CLI flags."""
+    transport.configure(pool_size=max(args.pool_size, args.workers + args.image_workers))
+    limiter = RateLimiter(rate=args.rate) if args.workers > 1 else None
+    images = None if args.no_image_cache else ImageStore()
+    transcoder = Transcoder(args.transcode, args.image_quality, args.image_max_width) if args.transcode != "none" else None
+    return NotionClient(token, limiter=limiter, images=images, image_workers=args.image_workers,
+                        image_budget=args.image_budget_mb << 20, transcoder=transcoder)
+
+def _source_pages(sets: List[str], args) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+    """(set code, page of raw Scryfall cards) across all sets, fetched lazily."""
+    path = idx = None
+    if args.source == "bulk":
+        with stage("fetch"):
+            path = bulk.ensure_bulk_file()
+            idx = bulk.load_index(path)
+    for code in sets:
+        if args.source == "bulk":
+            with stage("fetch"):
+                cards = bulk.read_sets([code], path, idx)[code]
+            for start in range(0, len(cards), SCRY_PAGE_SIZE):
+                yield code, cards[start:start + SCRY_PAGE_SIZE]
+        else:
+            for page in iter_set_pages(code):
+                yield code, page
+
+def _import_sync(args, notion: NotionClient, db_id: str, title_prop: str, overrides: dict,
+                 queue: Optional[ImageQueue], run: Optional[Run] = None,
+                 index: Optional[Dict[str, Dict[str, Any]]] = None,
+                 pages: Optional[Iterator[Tuple[str, List[Dict[str, Any]]]]] = None) -> Tuple[int, int, int, int, List[str]]:
     sets = [s.lower() for s in (args.sets or [])]
-    token = args.token or os.environ.get("NOTION_TOKEN") or getpass.getpass("Notion token (ntn_*): ").strip()
-    print(_ts(), "Starting import — parent=", args.parent, ", token=", mask_token(token), ", sets=", sets)
-    notion = NotionClient(token)
+    if index is None:
+        index = {}
+    if args.lookup == "index":
+        print(_ts(), "Indexing existing pages by Card ID …")
+        index = notion.index_by_card_id(db_id)
+        print(_ts(), "Indexed", len(index), "existing pages")
+
+    created=updated=skipped=failed=0
+    previews=[]
+    pool = ThreadPoolExecutor(max_workers=max(1, args.workers))
+    fetched: Dict[str, int] = {}
+    for code, page in Prefetcher(pages if pages is not None else _source_pages(sets, args), depth=args.prefetch):
+        if code not in fetched:
+            print(_ts(), "Importing", code.upper(), "…")
+        fetched[code] = fetched.get(code, 0) + len(page)
+        recs = []
+        with stage("normalize"):
+            for item in page:
+                base = normalize(item, args.image_tier)
+                key = f'{base.get("set","")}-{base.get("collector_number","")}'
+                recs.append((key, apply_overrides(key, base, overrides)))
+        if run and run.done:
+            todo = [(key, rec) for key, rec in recs if rec["id"] not in run.done]
+            skipped += len(recs) - len(todo)
+            recs = todo
+        if not recs:
+            continue
+        if args.lookup == "batch":
+            try:
+                index.update(notion.query_by_card_ids(db_id, [rec["id"] for _, rec in recs]))
+            except Exception as e:
+                failed += len(recs)
+                if len(previews) < 16:
+                    previews.append(f"ERROR lookup {code.upper()}: {e}")
+                continue
+        plans = plan_page(notion, title_prop, index, recs, args)
+        futures = [(key, rec, pool.submit(upsert_card, notion, db_id, title_prop, index, key, rec, args, queue, plan))
+                   for (key, rec), plan in zip(recs, plans)]
+        for key, rec, fut in futures:
+            try:
+                outcome, line = fut.result()
+                if outcome == "created": created += 1
+                elif outcome == "updated": updated += 1
+                else: skipped += 1
+                if line and len(previews) < 16:
+                    previews.append(line)
+            except Exception as e:
+                outcome = "failed"
+                failed += 1
+                if len(previews) < 16:
+                    previews.append(f"ERROR {key}: {e}")
+            if run:
+                run.record(rec["id"], key, outcome, (index.get(rec["id"]) or {}).get("id"))
+    for code, n in fetched.items():
+        print(_ts(), "Fetched", n, "prints for", code.upper())
+    pool.shutdown()
+    return created, updated, skipped, failed, previews
+
+def _open_database(args, notion: NotionClient) -> Tuple[str, str]:
+    """Check token and parent access, ensure the database and its columns; returns (db id, title property)."""
     if not notion.verify_token():
         print(_ts(), "Auth failed (401). Check your token & workspace."); sys.exit(2)
     r = notion.get_parent(args.parent)
@@ -91,49 +182,193 @@ def cmd_import(args):
     notion.ensure_columns(db["id"])
     title_prop = notion.get_title_property_name(db["id"])
     print(_ts(), "Using DB:", db["id"], "title property:", title_prop)
+    return db["id"], title_prop
 
+def _upsert_all(args, notion: NotionClient, db_id: str, title_prop: str, labels: List[str],
+                pages: Optional[Iterator[Tuple[str, List[Dict[str, Any]]]]] = None):
+    """Shared tail of `import` and `import-list`: lookup, journal, upserts and the totals report."""
+    started = time.time()
+    images = notion.images
+    queue = ImageQueue() if args.images == "deferred" else None
     overrides = load_overrides() if not args.no_overrides else {}
-    created=updated=skipped=failed=0
-    previews=[]
-    for code in sets:
-        print(_ts(), "Fetching Scryfall cards for", code.upper(), "…")
-        cards = fetch_set(code)
-        print(_ts(), "Fetched", len(cards), "prints for", code.upper())
-        for item in cards:
-            base = normalize(item)
-            key = f'{base.get("set","")}-{base.get("collector_number","")}'
-            rec = apply_overrides(key, base, overrides)
-            title_text = rec.get("title_override") or format_title(rec["oracle_raw"], rec["ff_raw"], args.title_style)
-            try:
-                existing = notion.query_by_card_id(db["id"], rec["id"])
-                if existing:
-                    if args.dry_run:
-                        if len(previews) < 16:
-                            previews.append(f'UPDATE {key}: "{title_text}" | methods={rec.get("procurement")}')
-                        updated += 1
-                    else:
-                        props = build_props_for_update(title_prop, title_text, rec, notion)
-                        notion.update_card_minimal(existing["id"], props)
-                        updated += 1
-                else:
-                    if args.dry_run:
-                        if len(previews) < 16:
-                            previews.append(f'CREATE {key}: "{title_text}" | methods={rec.get("procurement")}')
-                        created += 1
-                    else:
-                        props = build_props_for_create(rec, title_prop, title_text, notion)
-                        notion.create_card_page(db["id"], props)
-                        created += 1
-            except Exception as e:
-                failed += 1
-                if len(previews) < 16:
-                    previews.append(f"ERROR {key}: {e}")
+    state = StateStore()
+    index = None
+    if args.lookup == "mirror":
+        print(_ts(), "Syncing local mirror of", db_id, "…" if args.full_sync else "(incremental) …")
+        index, fetched = state.sync_mirror(notion, db_id, full=args.full_sync)
+        print(_ts(), "Mirror holds", len(index), "pages;", fetched, "fetched from Notion")
+    run = None
+    if not args.dry_run:  # dry runs write nothing, so there is nothing to journal
+        run = state.open_run(db_id, labels, resume=args.resume)
+        if run.resumed:
+            print(_ts(), f"Resuming run #{run.id}:", len(run.done), "cards already done")
+        elif args.resume:
+            print(_ts(), "No interrupted run to resume; starting run", f"#{run.id}")
+    if args.engine == "async" and pages is None:
+        from . import aio
+        counts, previews = aio.run_import(args, notion, db_id, title_prop, index, overrides, queue, run)
+        created, updated, skipped, failed = (counts[k] for k in ("created", "updated", "skipped", "failed"))
+    else:
+        created, updated, skipped, failed, previews = _import_sync(args, notion, db_id, title_prop, overrides, queue, run, index, pages)
+    if images:
+        images.save()
+    if run:
+        if failed:
+            print(_ts(), f"{failed} cards failed; rerun with --resume to retry only the unfinished cards")
+        else:
+            run.finish()
+    state.close()
 
     if previews:
         print("\n--- PREVIEW (first changes) ---")
         for line in previews: print("  ", line)
     print("\n--- TOTALS ---")
     print("created=", created, "updated=", updated, "skipped=", skipped, "failed=", failed)
+    if queue and not args.dry_run:
+        print(_ts(), "Images queued for backfill; run `mtg-importer images --backfill` to attach them.")
+    if args.metrics_out:
+        elapsed = time.time() - started
+        m = metrics.get_metrics()
+        m.set_run(created=created, updated=updated, skipped=skipped, failed=failed, labels=labels,
+                  engine=args.engine, duration_seconds=round(elapsed, 3),
+                  cards_per_second=round((created + updated + skipped + failed) / elapsed, 3) if elapsed else 0.0,
+                  finished_timestamp_seconds=round(time.time(), 3))
+        for path in args.metrics_out:
+            m.write(path)
+            print(_ts(), "Metrics written to", path)
+
+def _profile_session(args):
+    return profiling.session(args.profile, memory=args.profile_memory, top=args.profile_top)
+
+def cmd_import(args):
+    sets = [s.lower() for s in (args.sets or [])]
+    token = _token(args)
+    print(_ts(), "Starting import — parent=", args.parent, ", token=", mask_token(token), ", sets=", sets)
+    scry.configure_cache(enabled=not args.no_cache, ttl=args.cache_ttl, max_mb=args.cache_max_mb)
+    notion = _client(args, token)
+    with _profile_session(args), tracing.session(args.trace):
+        db_id, title_prop = _open_database(args, notion)
+        _upsert_all(args, notion, db_id, title_prop, sets)
+
+def _fix_misspelled(entries: List[Dict[str, str]], cards: List[Optional[Dict[str, Any]]]):
+    """Retry unresolved names with their closest match from the offline name index."""
+    idx = load_name_index()
+    if idx is None:
+        print(_ts(), "No local name index for fuzzy matching; build one with `mtg-importer names --rebuild --download`")
+        return
+    retry = []
+    for n, (e, card) in enumerate(zip(entries, cards)):
+        fixed = idx.resolve(e["name"]) if card is None and e["name"] else None
+        if fixed and fixed != e["name"]:
+            print(_ts(), f'Fuzzy match: "{e["name"]}" → "{fixed}"')
+            retry.append((n, dict(e, name=fixed, collector_number="")))
+    for (n, e), card in zip(retry, scry.fetch_collection([identifier(e) for _, e in retry])):
+        cards[n] = card
+
+def cmd_names(args):
+    idx = load_name_index(rebuild=args.rebuild, download=args.download)
+    if idx is None:
+        print(_ts(), "No cached bulk data to index; rerun with --download"); sys.exit(1)
+    print(_ts(), "Name index:", len(idx), "names")
+    for q in args.query:
+        t0 = time.perf_counter()
+        hits = idx.search(q, limit=args.limit)
+        ms = (time.perf_counter() - t0) * 1000
+        print(f'{q!r} ({ms:.2f} ms):')
+        for name, oracle, score in hits:
+            print(f"   {score:.3f}  {name}" + (f"  → {oracle}" if oracle != name else ""))
+        if not hits:
+            print("   no match")
+
+def cmd_import_list(args):
+    entries = load_list(args.list)
+    token = _token(args)
+    print(_ts(), "Starting list import — parent=", args.parent, ", token=", mask_token(token), ", entries=", len(entries))
+    notion = _client(args, token)
+    with _profile_session(args), tracing.session(args.trace):
+        cards = scry.fetch_collection([identifier(e) for e in entries])
+        if not args.no_fuzzy and None in cards:
+            _fix_misspelled(entries, cards)
+        missing = [e for e, card in zip(entries, cards) if card is None]
+        for e in missing:
+            print(_ts(), "Not found on Scryfall:", " ".join(x for x in (e["name"], e["set"].upper(), e["collector_number"]) if x))
+        unique = list({c["id"]: c for c in cards if c}.values())  # the same print listed twice is written once
+        print(_ts(), "Resolved", len(unique), "cards;", len(missing), "not found")
+        label = f"list:{os.path.basename(args.list)}"
+        pages = ((label, unique[i:i + SCRY_PAGE_SIZE]) for i in range(0, len(unique), SCRY_PAGE_SIZE))
+        db_id, title_prop = _open_database(args, notion)
+        _upsert_all(args, notion, db_id, title_prop, [label], pages)
+
+def cmd_images(args):
+    if not args.backfill:
+        queue = ImageQueue()
+        print(_ts(), len(queue.pending()), "pages waiting for images in", queue.path); return
+    token = _token(args)
+    notion = _client(args, token)
+    if not notion.verify_token():
+        print(_ts(), "Auth failed (401). Check your token & workspace."); sys.exit(2)
+    queue = ImageQueue()
+    items = queue.take()
+    print(_ts(), "Backfilling images for", len(items), "pages …")
+
+    def attach(it):
+        files = notion.upload_images(it["urls"])
+        if files:
+            notion.update_card_minimal(it["page_id"], {"Image": {"files": files}})
+
+    done = failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = [(it, pool.submit(attach, it)) for it in items]
+        for it, fut in futures:
+            try:
+                fut.result(); done += 1
+            except Exception as e:
+                failed += 1
+                queue.push(it["page_id"], it["urls"], it.get("key", ""))
+                print(_ts(), "ERROR", it.get("key") or it["page_id"], e)
+    queue.done()
+    if notion.images:
+        notion.images.save()
+    print("\n--- TOTALS ---")
+    print("attached=", done, "failed=", failed, "(failed pages stay queued)" if failed else "")
+
+def _add_client_args(p: argparse.ArgumentParser):
+    p.add_argument("--no-image-cache", action="store_true", help="Re-download and re-upload every image")
+    p.add_argument("--image-workers", type=int, default=4, help="Concurrent image transfers")
+    p.add_argument("--image-budget-mb", type=int, default=8, help="In-flight image bytes held in memory across transfers")
+    p.add_argument("--transcode", default="none", choices=["none","jpeg","webp"], help="Re-encode images locally before upload (needs Pillow)")
+    p.add_argument("--image-quality", type=int, default=80, help="JPEG/WebP quality for --transcode")
+    p.add_argument("--image-max-width", type=int, help="Downscale wider images to this many pixels for --transcode")
+    p.add_argument("--workers", type=int, default=1, help="Concurrent create/update workers (shared rate limiter)")
+    p.add_argument("--rate", type=float, default=NOTION_AVG_RATE, help="Notion requests/second ceiling for --workers")
+    p.add_argument("--pool-size", type=int, default=10, help="Keep-alive connections per host")
+
+def _add_upsert_args(p: argparse.ArgumentParser):
+    p.add_argument("--db-title", required=True, help='Notion database title, e.g. "MTG – Cards"')
+    p.add_argument("--parent", required=True, help="Notion parent page ID")
+    p.add_argument("--token", help="Notion token (ntn_*)")
+    p.add_argument("--title-style", default="Oracle — FF", choices=["Oracle — FF","FF — Oracle","Oracle only"])
+    p.add_argument("--dry-run", action="store_true", help="No writes; show planned changes")
+    p.add_argument("--no-overrides", action="store_true", help="Ignore overrides.json")
+    p.add_argument("--lookup", default="mirror", choices=["mirror","index","batch"],
+                   help="mirror: local copy refreshed with pages edited since the last run; "
+                        "index: scan the whole DB; batch: OR-filtered queries per Scryfall page")
+    p.add_argument("--full-sync", action="store_true", help="Rebuild the local mirror from a full scan (drops pages deleted in Notion)")
+    p.add_argument("--image-tier", default="png", choices=list(IMAGE_TIERS), help="Scryfall rendition to upload (png is largest)")
+    p.add_argument("--images", default="inline", choices=["inline","deferred"],
+                   help="deferred: write pages text-only and queue images for `images --backfill`")
+    p.add_argument("--resume", action="store_true", help="Skip cards the last interrupted run against this database already finished")
+    p.add_argument("--metrics-out", action="append", default=[], metavar="PATH",
+                   help="Write request/throttling/latency metrics: *.prom for the Prometheus textfile collector, "
+                        "anything else as JSON (repeatable)")
+    p.add_argument("--profile", metavar="DIR",
+                   help=f"Profile each stage ({', '.join(STAGES)}) with cProfile; writes <stage>.pstats and summary.txt to DIR "
+                        "(async engine: fetch/query/write run as coroutines and are not staged)")
+    p.add_argument("--profile-memory", action="store_true", help="With --profile: also trace allocations per stage (tracemalloc; slow)")
+    p.add_argument("--trace", metavar="PATH",
+                   help="Write a per-card span waterfall (query, image download/upload, create/update, retries) "
+                        "as Chrome/Perfetto trace JSON")
+    p.add_argument("--profile-top", type=int, default=20, metavar="N", help="Functions listed per stage in summary.txt")
 
 def build_parser():
     p = argparse.ArgumentParser(prog="mtg-importer", description="Scryfall → Notion importer")
@@ -141,13 +376,37 @@ def build_parser():
 
     ip = sub.add_parser("import", help="Import sets into a shared Notion database (UPSERT)")
     ip.add_argument("--sets", nargs="+", required=True, help="Set codes, e.g. fin fic fca")
-    ip.add_argument("--db-title", required=True, help='Notion database title, e.g. "MTG – Cards"')
-    ip.add_argument("--parent", required=True, help="Notion parent page ID")
-    ip.add_argument("--token", help="Notion token (ntn_*)")
-    ip.add_argument("--title-style", default="Oracle — FF", choices=["Oracle — FF","FF — Oracle","Oracle only"])
-    ip.add_argument("--dry-run", action="store_true", help="No writes; show planned changes")
-    ip.add_argument("--no-overrides", action="store_true", help="Ignore overrides.json")
+    _add_upsert_args(ip)
+    ip.add_argument("--source", default="search", choices=["search","bulk"],
+                    help="search: paginated /cards/search per set; bulk: cached default_cards bulk file")
+    ip.add_argument("--no-cache", action="store_true", help="Bypass the on-disk Scryfall response cache")
+    ip.add_argument("--cache-ttl", type=float, default=12 * 3600, help="Seconds a cached Scryfall response is served without revalidation")
+    ip.add_argument("--cache-max-mb", type=int, default=256, help="Size cap for the Scryfall response cache (LRU eviction)")
+    ip.add_argument("--prefetch", type=int, default=4, help="Scryfall pages fetched ahead of the Notion writes")
+    ip.add_argument("--engine", default="sync", choices=["sync","async"], help="async: asyncio engine (needs aiohttp)")
+    ip.add_argument("--concurrency", type=int, default=16, help="Cards in flight for --engine async")
+    _add_client_args(ip)
     ip.set_defaults(func=cmd_import)
+
+    lp = sub.add_parser("import-list", help="Import the cards of a decklist or CSV (name, set, collector number)")
+    lp.add_argument("list", help="Decklist (`1 Sol Ring (C21) 263`) or .csv with name/set/collector_number columns")
+    _add_upsert_args(lp)
+    _add_client_args(lp)
+    lp.add_argument("--no-fuzzy", action="store_true", help="Do not correct unresolved names with the offline name index")
+    lp.set_defaults(func=cmd_import_list, sets=[], engine="sync", prefetch=1)
+
+    np_ = sub.add_parser("names", help="Fuzzy-match card names offline (oracle, flavor and printed names)")
+    np_.add_argument("query", nargs="*", help="Names to look up, e.g. \"jace mind sculptr\"")
+    np_.add_argument("--limit", type=int, default=5, help="Matches shown per query")
+    np_.add_argument("--rebuild", action="store_true", help="Rebuild the index from the cached bulk file")
+    np_.add_argument("--download", action="store_true", help="Download the bulk file first if it is not cached")
+    np_.set_defaults(func=cmd_names)
+
+    mp = sub.add_parser("images", help="Attach queued images to pages written with --images deferred")
+    mp.add_argument("--backfill", action="store_true", help="Upload queued images and set each page's Image property")
+    mp.add_argument("--token", help="Notion token (ntn_*)")
+    _add_client_args(mp)
+    mp.set_defaults(func=cmd_images)
     return p
 
 def main(argv: List[str] | None = None):
@@ -0,0 +1,64 @@
+import csv, io, pathlib, re
+from typing import Dict, List
+
+SECTION_HEADERS = {"deck", "commander", "companion", "sideboard", "maybeboard", "mainboard", "about"}
+_LINE = re.compile(r"^(?:(\d+)\s*[xX]?\s+)?(.+?)(?:\s+\(([A-Za-z0-9]{2,6})\)(?:\s+([^\s*]+))?)?(?:\s+\*[A-Z]\*)*$")
+_CSV_COLUMNS = {
+    "name": ("name", "card", "card name"),
+    "set": ("set", "set code", "setcode", "edition"),
+    "collector_number": ("collector_number", "collector number", "collector #", "cn", "number"),
+    "qty": ("qty", "quantity", "count"),
+}
+
+
+def parse_line(line: str) -> Dict[str, str]:
+    """One decklist line (`1 Sol Ring`, `1x Sol Ring (C21) 263 *F*`, `SB: 2 Island`); {} for blanks/headers."""
+    line = line.strip()
+    if line[:3].upper() == "SB:":
+        line = line[3:].strip()
+    if not line or line.startswith(("#", "//")) or line.lower().rstrip(":") in SECTION_HEADERS:
+        return {}
+    m = _LINE.match(line)
+    if not m:
+        return {}
+    qty, name, setcode, cn = m.groups()
+    return {"name": name.strip(), "set": (setcode or "").lower(), "collector_number": cn or "", "qty": qty or "1"}
+
+
+def parse_csv(text: str) -> List[Dict[str, str]]:
+    rows = csv.DictReader(io.StringIO(text))
+    cols = {}
+    for field in rows.fieldnames or []:
+        for key, aliases in _CSV_COLUMNS.items():
+            if field.strip().lower() in aliases and key not in cols:
+                cols[key] = field
+    if "name" not in cols and "collector_number" not in cols:
+        raise ValueError("CSV needs a name column (or set + collector number)")
+    out = []
+    for row in rows:
+        e = {k: (row.get(f) or "").strip() for k, f in cols.items()}
+        e["set"] = e.get("set", "").lower()
+        if e.get("name") or (e.get("set") and e.get("collector_number")):
+            out.append({"name": e.get("name", ""), "set": e["set"], "collector_number": e.get("collector_number", ""),
+                        "qty": e.get("qty") or "1"})
+    return out
+
+
+def parse_list(text: str, csv_format: bool = False) -> List[Dict[str, str]]:
+    if csv_format:
+        return parse_csv(text)
+    return [e for e in map(parse_line, text.splitlines()) if e]
+
+
+def load_list(path: str) -> List[Dict[str, str]]:
+    p = pathlib.Path(path)
+    return parse_list(p.read_text(encoding="utf-8-sig"), csv_format=p.suffix.lower() == ".csv")
+
+
+def identifier(entry: Dict[str, str]) -> Dict[str, str]:
+    """Scryfall /cards/collection identifier: set + collector number wins over name (+ set)."""
+    if entry.get("set") and entry.get("collector_number"):
+        return {"set": entry["set"], "collector_number": entry["collector_number"]}
+    if entry.get("set"):
+        return {"name": entry["name"], "set": entry["set"]}
+    return {"name": entry["name"]}
@@ -0,0 +1,125 @@
+import gzip, hashlib, json, os, pathlib, threading, time
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlencode
+
+import requests
+
+from .util import cache_dir
+
+KEEP_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+SIDECAR_BYTES = 512  # what an entry's json sidecar adds, roughly
+
+
+class DiskCache:
+    """gzip-compressed GET responses on disk, with TTL, conditional revalidation and LRU eviction.
+
+    Each entry is `<key>.gz` (body) plus `<key>.json` (url, headers, stored_at); file mtimes
+    double as the LRU clock. A running byte total means the directory is only scanned
+    once up front and then whenever a write takes the cache over `max_bytes`."""
+
+    def __init__(self, root: Optional[pathlib.Path] = None, ttl: float = 12 * 3600, max_bytes: int = 256 << 20):
+        self.root = pathlib.Path(root) if root else cache_dir("http")
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total: Optional[int] = None  # bytes on disk; None until the first scan
+
+    @staticmethod
+    def key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        q = urlencode(sorted((params or {}).items()))
+        return hashlib.sha256(f"{url}?{q}".encode("utf-8")).hexdigest()
+
+    def _files(self, key: str) -> Tuple[pathlib.Path, pathlib.Path]:
+        return self.root / f"{key}.gz", self.root / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        body_p, meta_p = self._files(key)
+        try:
+            meta = json.loads(meta_p.read_text(encoding="utf-8"))
+            body = gzip.decompress(body_p.read_bytes())
+        except (OSError, ValueError):
+            return None
+        self.touch(key)
+        return meta, body
+
+    def fresh(self, meta: Dict[str, Any]) -> bool:
+        return time.time() - meta.get("stored_at", 0) < self.ttl
+
+    def touch(self, key: str, revalidated: bool = False):
+        body_p, meta_p = self._files(key)
+        try:
+            os.utime(body_p)
+            if revalidated:
+                meta = json.loads(meta_p.read_text(encoding="utf-8"))
+                meta["stored_at"] = time.time()
+                self._write(meta_p, json.dumps(meta).encode("utf-8"))
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def _write(p: pathlib.Path, data: bytes):
+        tmp = p.with_name(f"{p.name}.{threading.get_ident()}.part")
+        tmp.write_bytes(data)
+        tmp.replace(p)
+
+    def put(self, key: str, resp: requests.Response):
+        body_p, meta_p = self._files(key)
+        meta = {
+            "url": resp.url,
+            "headers": {h: resp.headers[h] for h in KEEP_HEADERS if h in resp.headers},
+            "stored_at": time.time(),
+        }
+        body = gzip.compress(resp.content)
+        try:
+            replaced = body_p.stat().st_size + SIDECAR_BYTES
+        except OSError:
+            replaced = 0
+        self._write(body_p, body)
+        self._write(meta_p, json.dumps(meta).encode("utf-8"))
+        with self._lock:
+            if self._total is not None:
+                self._total += len(body) + SIDECAR_BYTES - replaced
+            over = self._total is None or self._total > self.max_bytes
+        if over:
+            self.evict()
+
+    def evict(self):
+        """Drop least-recently-used entries until the cache fits under `max_bytes`."""
+        with self._lock:
+            entries, total = [], 0
+            for p in self.root.glob("*.gz"):
+                try:
+                    st = p.stat()
+                except OSError:
+                    continue
+                size = st.st_size + SIDECAR_BYTES
+                entries.append((st.st_mtime, size, p))
+                total += size
+            if total > self.max_bytes:
+                for _, size, p in sorted(entries):
+                    for f in (p, p.with_suffix(".json")):
+                        try: f.unlink()
+                        except OSError: pass
+                    total -= size
+                    if total <= self.max_bytes:
+                        break
+            self._total = total
+
+    def clear(self):
+        for p in list(self.root.glob("*.gz")) + list(self.root.glob("*.json")):
+            try: p.unlink()
+            except OSError: pass
+        with self._lock:
+            self._total = 0
+
+
+def as_response(url: str, meta: Dict[str, Any], body: bytes) -> requests.Response:
+    r = requests.Response()
+    r.status_code = 200
+    r.url = meta.get("url") or url
+    r.headers.update(meta.get("headers") or {})
+    r.headers["X-Cache"] = "HIT"
+    r._content = body
+    r.encoding = "utf-8"
+    return r
@@ -0,0 +1,293 @@
+import hashlib, io, json, os, pathlib, threading, time, uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+from urllib.parse import urlsplit
+from .util import cache_dir
+
+try:
+    from PIL import Image as PILImage
+except ImportError:  # optional: pip install "mtg-notion-importer[images]"
+    PILImage = None
+
+CONTENT_TYPES = {"jpg": "image/jpeg", "png": "image/png", "webp": "image/webp"}
+TRANSCODE_RESERVE = 4 << 20  # decoded pixels + re-encoded output of one card image
+
+
+def upload_name(sha: str, ext: str = "jpg") -> str:
+    """Uploaded files are named after their content so pages can be compared without downloading."""
+    return f"{sha[:16]}.{ext}"
+
+
+def url_ext(url: str) -> str:
+    ext = os.path.splitext(urlsplit(url).path)[1].lower().lstrip(".")
+    return "jpg" if ext in ("", "jpeg") else ext
+
+
+class Transcoder:
+    """Optional local resize + JPEG/WebP re-encode applied before upload (needs Pillow)."""
+
+    def __init__(self, fmt: str = "jpeg", quality: int = 80, max_width: Optional[int] = None):
+        if PILImage is None:
+            raise RuntimeError("Image transcoding needs Pillow: pip install Pillow")
+        self.fmt = "jpeg" if fmt.lower() in ("jpg", "jpeg") else fmt.lower()
+        self.quality = quality
+        self.max_width = max_width
+        self.ext = "jpg" if self.fmt == "jpeg" else self.fmt
+        self.content_type = CONTENT_TYPES.get(self.ext, "application/octet-stream")
+
+    @property
+    def key(self) -> str:
+        return f"{self.fmt}-q{self.quality}-w{self.max_width or 0}"
+
+    def __call__(self, data: bytes) -> bytes:
+        im = PILImage.open(io.BytesIO(data))
+        im.load()
+        if self.max_width and im.width > self.max_width:
+            im = im.resize((self.max_width, round(im.height * self.max_width / im.width)), PILImage.LANCZOS)
+        if self.fmt == "jpeg" and im.mode != "RGB":
+            rgba = im.convert("RGBA")
+            bg = PILImage.new("RGB", rgba.size, (255, 255, 255))  # PNG corners are transparent
+            bg.paste(rgba, mask=rgba.getchannel("A"))
+            im = bg
+        out = io.BytesIO()
+        im.save(out, format=self.fmt.upper(), quality=self.quality, optimize=True)
+        return out.getvalue()
+
+
+class ByteBudget:
+    """Caps the bytes held in memory by concurrent transfers; each transfer reserves its chunk size."""
+
+    def __init__(self, limit: int):
+        self.limit = max(1, int(limit))
+        self.used = 0
+        self._cv = threading.Condition()
+
+    @contextmanager
+    def reserve(self, n: int):
+        n = min(max(1, n), self.limit)
+        with self._cv:
+            while self.used + n > self.limit:
+                self._cv.wait()
+            self.used += n
+        try:
+            yield
+        finally:
+            with self._cv:
+                self.used -= n
+                self._cv.notify_all()
+
+
+# multipart/form-data bodies that never hold the whole file in memory
+def multipart_boundary() -> str:
+    return uuid.uuid4().hex
+
+
+def _part_head(boundary: str, filename: str, content_type: str) -> bytes:
+    return (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n").encode("utf-8")
+
+
+def _part_tail(boundary: str) -> bytes:
+    return f"\r\n--{boundary}--\r\n".encode("utf-8")
+
+
+def multipart_chunks(boundary: str, filename: str, chunks: Iterable[bytes], content_type: str = "image/jpeg") -> Iterator[bytes]:
+    """Generator body (sent with chunked transfer encoding) wrapping a streamed download."""
+    yield _part_head(boundary, filename, content_type)
+    for chunk in chunks:
+        if chunk:
+            yield chunk
+    yield _part_tail(boundary)
+
+
+class MultipartFile:
+    """File-like multipart body over a file on disk; `len` lets requests send a Content-Length."""
+
+    def __init__(self, boundary: str, filename: str, path: pathlib.Path, content_type: str = "image/jpeg"):
+        self._head = _part_head(boundary, filename, content_type)
+        self._tail = _part_tail(boundary)
+        self._path = path
+        self.len = len(self._head) + os.path.getsize(path) + len(self._tail)
+        self._parts = None
+
+    def read(self, n: int = -1) -> bytes:
+        if self._parts is None:
+            self._parts = [self._head, open(self._path, "rb"), self._tail]
+        out = b""
+        while self._parts and (n < 0 or len(out) < n):
+            part = self._parts[0]
+            want = -1 if n < 0 else n - len(out)
+            if isinstance(part, bytes):
+                take = part if want < 0 else part[:want]
+                out += take
+                rest = part[len(take):]
+                if rest: self._parts[0] = rest
+                else: self._parts.pop(0)
+            else:
+                data = part.read(want)
+                if want < 0 or len(data) < want:
+                    part.close(); self._parts.pop(0)
+                out += data
+        return out
+
+
+def _expired(file_obj: Dict[str, Any], margin: timedelta = timedelta(minutes=10)) -> bool:
+    exp = ((file_obj or {}).get("file") or {}).get("expiry_time")
+    if not exp:
+        return False
+    try:
+        when = datetime.fromisoformat(exp.replace("Z", "+00:00"))
+    except ValueError:
+        return True
+    return when - margin <= datetime.now(timezone.utc)
+
+
+class ImageStore:
+    """Content-addressed local image cache.
+
+    `urls` maps a Scryfall image URL to the sha256 of its bytes, blobs live under
+    `blobs/<sha[:2]>/<sha>`, and `uploads` remembers the Notion file object from the
+    last upload of each blob so unchanged art is never transferred twice."""
+
+    def __init__(self, root: Optional[pathlib.Path] = None, variant: str = ""):
+        self.root = pathlib.Path(root) if root else cache_dir("images")
+        self.variant = variant  # transcode settings; part of the URL key
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._manifest_path = self.root / "manifest.json"
+        self._lock = threading.Lock()
+        try:
+            m = json.loads(self._manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            m = {}
+        self.urls: Dict[str, str] = m.get("urls") or {}
+        self.uploads: Dict[str, Dict[str, Any]] = m.get("uploads") or {}
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps({"urls": self.urls, "uploads": self.uploads}, separators=(",", ":"))
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        tmp = self._manifest_path.with_name(f"manifest.{threading.get_ident()}.part")
+        tmp.write_text(data, encoding="utf-8")
+        tmp.replace(self._manifest_path)
+
+    def maybe_save(self, interval: float = 30.0):
+        """Persist the manifest at most every `interval` seconds (call `save()` at the end of a run)."""
+        if self._dirty and time.monotonic() - self._saved_at >= interval:
+            self.save()
+
+    # blobs
+    def blob_path(self, sha: str) -> pathlib.Path:
+        return self.root / "blobs" / sha[:2] / sha
+
+    def put_stream(self, url: str, chunks: Iterable[bytes]) -> str:
+        """Spool `chunks` to disk while hashing them; returns the blob's sha256."""
+        h = hashlib.sha256()
+        tmp_dir = self.root / "blobs"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        tmp = tmp_dir / f"incoming.{threading.get_ident()}.part"
+        with open(tmp, "wb") as f:
+            for chunk in chunks:
+                h.update(chunk)
+                f.write(chunk)
+        sha = h.hexdigest()
+        p = self.blob_path(sha)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp.replace(p)
+        with self._lock:
+            self.urls[self._key(url)] = sha
+            self._dirty = True
+        return sha
+
+    def has_blob(self, sha: str) -> bool:
+        return self.blob_path(sha).exists()
+
+    # uploads
+    def _key(self, url: str) -> str:
+        return f"{url}#{self.variant}" if self.variant else url
+
+    def sha_for(self, url: str) -> Optional[str]:
+        with self._lock:
+            return self.urls.get(self._key(url))
+
+    def uploaded(self, sha: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            ref = self.uploads.get(sha)
+        return ref if ref and not _expired(ref) else None
+
+    def record_upload(self, sha: str, file_obj: Dict[str, Any]):
+        with self._lock:
+            self.uploads[sha] = file_obj
+            self._dirty = True
+
+    def names_for(self, urls: List[str]) -> Optional[List[str]]:
+        """Upload names recorded for `urls`, or None if any of them has never been uploaded."""
+        names = []
+        for u in urls or []:
+            sha = self.sha_for(u)
+            with self._lock:
+                ref = self.uploads.get(sha) if sha else None
+            if not ref:
+                return None
+            names.append(ref["name"])
+        return names
+
+
+class ImageQueue:
+    """Append-only JSONL queue of pages whose `Image` property is filled in later by `images --backfill`."""
+
+    def __init__(self, path: Optional[pathlib.Path] = None):
+        self.path = pathlib.Path(path) if path else cache_dir("images") / "backfill.jsonl"
+        self._lock = threading.Lock()
+
+    def push(self, page_id: str, urls: List[str], key: str = ""):
+        line = json.dumps({"page_id": page_id, "key": key, "urls": list(urls or [])}, ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def _read(self, path: pathlib.Path) -> Dict[str, Dict[str, Any]]:
+        items: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        it = json.loads(line)
+                    except ValueError:
+                        continue  # torn write from an interrupted run
+                    items.pop(it["page_id"], None)
+                    items[it["page_id"]] = it  # the most recent entry per page wins
+        except OSError:
+            pass
+        return items
+
+    def pending(self) -> List[Dict[str, Any]]:
+        return list(self._read(self.path).values())
+
+    def take(self) -> List[Dict[str, Any]]:
+        """Claim every queued entry; imports running meanwhile append to a fresh file.
+
+        Entries left in `<queue>.inflight` by an interrupted backfill are claimed again."""
+        inflight = self.path.with_name(self.path.name + ".inflight")
+        items = self._read(inflight)
+        with self._lock:
+            if self.path.exists():
+                claimed = self.path.with_name(self.path.name + ".claimed")
+                self.path.replace(claimed)
+                items.update(self._read(claimed))
+                with open(inflight, "w", encoding="utf-8") as f:
+                    for it in items.values():
+                        f.write(json.dumps(it, ensure_ascii=False) + "\n")
+                claimed.unlink()
+        return list(items.values())
+
+    def done(self):
+        """Drop the claimed batch (failures should have been `push`ed back)."""
+        try:
+            self.path.with_name(self.path.name + ".inflight").unlink()
+        except OSError:
+            pass
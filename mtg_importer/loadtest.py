@@ -0,0 +1,89 @@
+import argparse, os, tempfile, time
+from typing import Any, Dict, List, Optional
+from . import cli, notion_api, scry, transport
+from .mockapi import Faults, MockNotion, MockScryfall, point_at
+
+
+def _summary(server, label: str) -> List[str]:
+    by_status: Dict[int, int] = {}
+    for (_, _, status), n in server.requests.items():
+        by_status[status] = by_status.get(status, 0) + n
+    lines = [f"{label}: {sum(by_status.values())} requests " + " ".join(f"{s}={n}" for s, n in sorted(by_status.items()))]
+    for (method, route, status), n in sorted(server.requests.items(), key=lambda kv: -kv[1])[:8]:
+        lines.append(f"    {n:6d}  {method:5s} /{route} → {status}")
+    return lines
+
+
+def run_load(sets: List[str], import_args: List[str], cards_per_set: int = 300, passes: int = 1,
+             notion_faults: Optional[Faults] = None, scry_faults: Optional[Faults] = None,
+             image_bytes: int = 64 << 10) -> List[Dict[str, Any]]:
+    """Run `import` against fresh mock servers `passes` times; returns per-pass throughput figures.
+
+    The importer's cache dir is pointed at a temporary directory so runs start cold
+    and never touch the user's real cache or state."""
+    results = []
+    with MockNotion(notion_faults) as notion, MockScryfall(scry_faults, cards_per_set=cards_per_set, image_bytes=image_bytes) as scryfall, \
+            tempfile.TemporaryDirectory(prefix="mtg-load-") as cache:
+        old_cache = os.environ.get("MTG_IMPORTER_CACHE")
+        saved = (notion_api.NOTION, scry.SCRY)
+        os.environ["MTG_IMPORTER_CACHE"] = cache
+        point_at(notion.url, scryfall.url)
+        try:
+            argv = ["import", "--sets", *sets, "--db-title", "Load Test", "--parent", "mock-parent",
+                    "--token", "secret_mock_token", "--no-overrides", *import_args]
+            for n in range(passes):
+                before = sum(notion.requests.values())
+                t0 = time.perf_counter()
+                cli.main(argv)
+                dt = time.perf_counter() - t0
+                cards = len(sets) * cards_per_set
+                reqs = sum(notion.requests.values()) - before
+                results.append({"pass": n + 1, "seconds": round(dt, 3), "cards": cards, "cards_per_s": round(cards / dt, 1),
+                                "notion_requests": reqs, "notion_rps": round(reqs / dt, 1), "pages": len(notion.pages),
+                                "uploads": notion.uploads})
+        finally:
+            point_at(*saved)
+            transport.configure()  # drop keep-alive connections to the mocks
+            if old_cache is None:
+                os.environ.pop("MTG_IMPORTER_CACHE", None)
+            else:
+                os.environ["MTG_IMPORTER_CACHE"] = old_cache
+        report = _summary(notion, "Notion") + _summary(scryfall, "Scryfall")
+    print("\n=== LOAD TEST ===")
+    for line in report:
+        print(line)
+    for r in results:
+        print(f'pass {r["pass"]}: {r["cards"]} cards in {r["seconds"]:.2f}s → {r["cards_per_s"]} cards/s, '
+              f'{r["notion_requests"]} Notion requests ({r["notion_rps"]}/s), {r["pages"]} pages, {r["uploads"]} uploads')
+    return results
+
+
+def main(argv: Optional[List[str]] = None):
+    p = argparse.ArgumentParser(prog="python -m mtg_importer.loadtest",
+                                description="Run `import` against local mock Notion/Scryfall servers and report throughput. "
+                                            "Arguments after `--` are passed to `import` (e.g. -- --workers 8 --rate 30 --engine async); "
+                                            "without --rate the importer holds Notion to its documented 3 requests/s.")
+    p.add_argument("--sets", nargs="+", default=["la1", "la2"], help="Synthetic set codes to import")
+    p.add_argument("--cards-per-set", type=int, default=100)
+    p.add_argument("--passes", type=int, default=2, help="Imports run back to back (the second exercises the skip path)")
+    p.add_argument("--image-kb", type=int, default=64, help="Size of each mock card image")
+    for side in ("notion", "scry"):
+        p.add_argument(f"--{side}-latency", type=float, default=0.05 if side == "notion" else 0.02, help="Seconds per request")
+        p.add_argument(f"--{side}-jitter", type=float, default=0.02, help="± seconds of uniform jitter")
+        p.add_argument(f"--{side}-429", type=float, default=0.02 if side == "notion" else 0.0, help="Fraction of requests answered 429")
+        p.add_argument(f"--{side}-5xx", type=float, default=0.01, help="Fraction of requests answered 503")
+    p.add_argument("--retry-after", type=float, default=0.5, help="Retry-After seconds sent with injected 429s")
+    p.add_argument("--seed", type=int, default=0)
+    args, rest = p.parse_known_args(argv)
+    rest = [a for a in rest if a != "--"]
+
+    def faults(side: str) -> Faults:
+        g = lambda k: getattr(args, f"{side}_{k}")
+        return Faults(g("latency"), g("jitter"), g("429"), g("5xx"), args.retry_after, seed=args.seed)
+
+    run_load([s.lower() for s in args.sets], rest, args.cards_per_set, args.passes,
+             faults("notion"), faults("scry"), args.image_kb << 10)
+
+
+if __name__ == "__main__":
+    main()
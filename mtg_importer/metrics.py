@@ -0,0 +1,164 @@
+import json, pathlib, threading, time
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+from urllib.parse import urlsplit
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)  # seconds
+PREFIX = "mtg_importer"
+
+
+def endpoint(method: str, url: str) -> Tuple[str, str]:
+    """(host, "METHOD /route") with page/database/card ids collapsed so label sets stay small."""
+    parts = urlsplit(url)
+    path = "/".join("{id}" if len(seg) >= 20 else seg for seg in parts.path.split("/"))
+    return parts.netloc, f"{method} {path or '/'}"
+
+
+def _label(v: Any) -> str:
+    return str(v).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _labels(**kw) -> str:
+    return "{" + ",".join(f'{k}="{_label(v)}"' for k, v in kw.items()) + "}"
+
+
+class Metrics:
+    """Thread-safe HTTP counters and latency histograms for one process.
+
+    Every attempt the transports send is observed per (host, endpoint); `snapshot`
+    renders a JSON report and `prometheus` the node_exporter textfile format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.requests: Counter = Counter()  # (host, endpoint, status) -> attempts
+        self.retries: Counter = Counter()  # (host, endpoint, reason) -> retried attempts
+        self.latency: Dict[Tuple[str, str], List[float]] = {}  # bucket counts..., +Inf, sum, max
+        self.image_bytes: Counter = Counter()  # direction -> bytes
+        self.run: Dict[str, Any] = {}
+
+    def observe(self, host: str, ep: str, status: Any, seconds: float):
+        key = (host, ep)
+        with self._lock:
+            self.requests[(host, ep, str(status))] += 1
+            h = self.latency.get(key)
+            if h is None:
+                h = self.latency[key] = [0.0] * (len(LATENCY_BUCKETS) + 3)
+            for i, le in enumerate(LATENCY_BUCKETS):
+                if seconds <= le:
+                    h[i] += 1
+                    break
+            else:
+                h[len(LATENCY_BUCKETS)] += 1
+            h[-2] += seconds
+            h[-1] = max(h[-1], seconds)
+
+    def retry(self, host: str, ep: str, reason: str):
+        with self._lock:
+            self.retries[(host, ep, reason)] += 1
+
+    def add_bytes(self, direction: str, n: int):
+        with self._lock:
+            self.image_bytes[direction] += n
+
+    def count_bytes(self, chunks: Iterable[bytes], direction: str) -> Iterator[bytes]:
+        """Pass `chunks` through, adding their size to the image byte counter as they stream."""
+        for chunk in chunks:
+            self.add_bytes(direction, len(chunk))
+            yield chunk
+
+    def set_run(self, **values):
+        with self._lock:
+            self.run.update(values)
+
+    # reports
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints: Dict[Tuple[str, str], Dict[str, Any]] = {}
+            for (host, ep, status), n in sorted(self.requests.items()):
+                e = endpoints.setdefault((host, ep), {"host": host, "endpoint": ep, "requests": 0, "status": {},
+                                                      "throttled": 0, "retries": 0, "errors": 0})
+                e["requests"] += n
+                e["status"][status] = n
+                if status == "429": e["throttled"] += n
+                if status == "error": e["errors"] += n
+            for (host, ep, _), n in self.retries.items():
+                endpoints[(host, ep)]["retries"] += n
+            for key, h in self.latency.items():
+                count = sum(h[:-2])
+                cumulative, buckets = 0, {}
+                for le, c in zip([*map(str, LATENCY_BUCKETS), "+Inf"], h):
+                    cumulative += int(c)
+                    buckets[le] = cumulative
+                endpoints[key]["latency"] = {"count": int(count), "sum": round(h[-2], 4),
+                                             "mean": round(h[-2] / count, 4) if count else 0.0,
+                                             "max": round(h[-1], 4), "buckets": buckets}
+            return {"started": self.started, "written": time.time(), "run": dict(self.run),
+                    "image_bytes": dict(self.image_bytes), "endpoints": list(endpoints.values())}
+
+    def prometheus(self) -> str:
+        snap = self.snapshot()
+        out: List[str] = []
+
+        def family(name: str, kind: str, help_text: str):
+            out.append(f"# HELP {PREFIX}_{name} {help_text}")
+            out.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+        family("http_requests_total", "counter", "HTTP attempts by endpoint and status (error = no response).")
+        for e in snap["endpoints"]:
+            for status, n in e["status"].items():
+                out.append(f"{PREFIX}_http_requests_total{_labels(host=e['host'], endpoint=e['endpoint'], status=status)} {n}")
+        family("http_retries_total", "counter", "Attempts retried after a 429, 5xx or connection error.")
+        with self._lock:
+            retries = sorted(self.retries.items())
+        for (host, ep, reason), n in retries:
+            out.append(f"{PREFIX}_http_retries_total{_labels(host=host, endpoint=ep, reason=reason)} {n}")
+        family("http_request_duration_seconds", "histogram", "Latency of one HTTP attempt, to response headers.")
+        for e in snap["endpoints"]:
+            lat = e.get("latency")
+            if not lat:
+                continue
+            for le, n in lat["buckets"].items():
+                out.append(f"{PREFIX}_http_request_duration_seconds_bucket"
+                           f"{_labels(host=e['host'], endpoint=e['endpoint'], le=le)} {n}")
+            base = _labels(host=e["host"], endpoint=e["endpoint"])
+            out.append(f"{PREFIX}_http_request_duration_seconds_sum{base} {lat['sum']}")
+            out.append(f"{PREFIX}_http_request_duration_seconds_count{base} {lat['count']}")
+        family("image_bytes_total", "counter", "Image bytes downloaded from Scryfall and uploaded to Notion.")
+        for direction, n in sorted(snap["image_bytes"].items()):
+            out.append(f"{PREFIX}_image_bytes_total{_labels(direction=direction)} {n}")
+        run = snap["run"]
+        if run:
+            family("run_cards", "gauge", "Cards per outcome in the last run.")
+            for outcome in ("created", "updated", "skipped", "failed"):
+                out.append(f"{PREFIX}_run_cards{_labels(outcome=outcome)} {run.get(outcome, 0)}")
+            for name, help_text in (("duration_seconds", "Wall time of the last run."),
+                                    ("cards_per_second", "Throughput of the last run."),
+                                    ("finished_timestamp_seconds", "Unix time the last run finished.")):
+                if name in run:
+                    family(f"run_{name}", "gauge", help_text)
+                    out.append(f"{PREFIX}_run_{name} {run[name]}")
+        return "\n".join(out) + "\n"
+
+    def write(self, path: str):
+        """Atomically write a `.prom` textfile, or a JSON report for any other suffix."""
+        p = pathlib.Path(path)
+        text = self.prometheus() if p.suffix == ".prom" else json.dumps(self.snapshot(), indent=2) + "\n"
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_name(p.name + ".part")
+        tmp.write_text(text, encoding="utf-8")
+        tmp.replace(p)  # the textfile collector must never see a half-written file
+
+
+_default = Metrics()
+
+
+def get_metrics() -> Metrics:
+    return _default
+
+
+def reset() -> Metrics:
+    """Start a fresh registry (e.g. between load-test passes)."""
+    global _default
+    _default = Metrics()
+    return _default
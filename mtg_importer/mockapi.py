@@ -0,0 +1,314 @@
+import hashlib, json, random, threading, time, uuid
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from . import notion_api, scry
+from .bench import synthetic_cards
+
+SCRY_PAGE = 175
+
+
+class Faults:
+    """Latency and error injection applied to every request a mock server handles."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, rate_429: float = 0.0, rate_5xx: float = 0.0,
+                 retry_after: float = 0.5, seed: Optional[int] = None):
+        self.latency, self.jitter = latency, jitter
+        self.rate_429, self.rate_5xx = rate_429, rate_5xx
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self) -> Tuple[float, Optional[int]]:
+        """(seconds to sleep, injected status or None) for one request."""
+        with self._lock:
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+            roll = self._rng.random()
+        if roll < self.rate_429:
+            return delay, 429
+        if roll < self.rate_429 + self.rate_5xx:
+            return delay, 503
+        return delay, None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+
+    def log_message(self, *a):
+        pass
+
+    def _body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            data = b""
+            while True:
+                n = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                if n == 0:
+                    self.rfile.readline()
+                    return data
+                data += self.rfile.read(n)
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def send_bytes(self, status: int, body: bytes, ctype: str = "application/json", headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, obj: Any, status: int = 200):
+        self.send_bytes(status, json.dumps(obj).encode("utf-8"))
+
+    def _handle(self, method: str):
+        server: "_MockServer" = self.server.owner
+        path = urlsplit(self.path).path
+        body = self._body() if method in ("POST", "PATCH") else b""
+        delay, fault = server.faults.draw()
+        if delay:
+            time.sleep(delay)
+        if fault == 429:
+            server.count(method, path, 429)
+            return self.send_bytes(429, b'{"object":"error","status":429,"code":"rate_limited"}',
+                                   headers={"Retry-After": f"{server.faults.retry_after:g}"})
+        if fault:
+            server.count(method, path, fault)
+            return self.send_json({"object": "error", "status": fault, "code": "service_unavailable"}, fault)
+        status = server.route(self, method, path, body) or 200
+        server.count(method, path, status)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+
+class _MockServer:
+    """Threaded HTTP server on 127.0.0.1 (ephemeral port) recording requests by route and status."""
+
+    def __init__(self, faults: Optional[Faults] = None, port: int = 0):
+        self.faults = faults or Faults()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.owner = self
+        self.requests: Counter = Counter()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def start(self) -> "_MockServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True, name=type(self).__name__)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def count(self, method: str, path: str, status: int):
+        parts = path.strip("/").split("/")
+        route = "/".join(p if len(p) < 20 else "{id}" for p in parts)  # collapse ids and image names
+        with self._lock:
+            self.requests[(method, route, status)] += 1
+
+    def route(self, h: _Handler, method: str, path: str, body: bytes) -> int:
+        raise NotImplementedError
+
+
+def _stored(value: Dict[str, Any]) -> Dict[str, Any]:
+    """A property value as Notion returns it: typed, with `plain_text` on text segments."""
+    t = value.get("type") or next(iter(value))
+    v = value[t]
+    if t in ("title", "rich_text"):
+        v = [dict(seg, type="text", plain_text=(seg.get("text") or {}).get("content", "")) for seg in v or []]
+    return {"type": t, t: v}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:00.000Z")  # Notion rounds to the minute
+
+
+class MockNotion(_MockServer):
+    """In-memory Notion: search, databases, query (cursor pagination and the filters the importer sends),
+    pages and file uploads under `/v1`."""
+
+    def __init__(self, faults: Optional[Faults] = None, port: int = 0):
+        super().__init__(faults, port)
+        self.databases: Dict[str, Dict[str, Any]] = {}
+        self.pages: Dict[str, Dict[str, Any]] = {}
+        self.uploads = 0
+        self._data_lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return self.base + "/v1"
+
+    def _match(self, page: Dict[str, Any], flt: Optional[Dict[str, Any]]) -> bool:
+        if not flt:
+            return True
+        if "or" in flt:
+            return any(self._match(page, f) for f in flt["or"])
+        if flt.get("timestamp") == "last_edited_time":
+            return page["last_edited_time"] >= flt["last_edited_time"]["on_or_after"]
+        prop = page["properties"].get(flt.get("property"), {})
+        want = (flt.get("rich_text") or {}).get("equals")
+        text = "".join(seg.get("plain_text", "") for seg in prop.get("rich_text") or [])
+        return want is None or text == want
+
+    def _page(self, pid: str) -> Dict[str, Any]:
+        p = self.pages[pid]
+        return {"object": "page", "id": pid, "url": f"{self.base}/{pid}", "last_edited_time": p["last_edited_time"],
+                "properties": p["properties"]}
+
+    def route(self, h: _Handler, method: str, path: str, body: bytes) -> int:
+        parts = path.strip("/").split("/")[1:]  # drop "v1"
+        req = json.loads(body) if body and not h.headers.get("Content-Type", "").startswith("multipart/") else {}
+        with self._data_lock:
+            if parts == ["users", "me"]:
+                h.send_json({"object": "user", "id": "bot"}); return 200
+            if parts == ["search"]:
+                res = [{"object": "database", "id": i, "title": [{"plain_text": d["title"]}]}
+                       for i, d in self.databases.items() if req.get("query", "") in d["title"]]
+                h.send_json({"results": res, "has_more": False}); return 200
+            if parts == ["databases"] and method == "POST":
+                db_id = str(uuid.uuid4())
+                title = "".join(seg["text"]["content"] for seg in req.get("title") or [])
+                self.databases[db_id] = {"title": title, "properties": {k: dict(v, type=next(iter(v)))
+                                                                        for k, v in req.get("properties", {}).items()}}
+                h.send_json({"object": "database", "id": db_id}); return 200
+            if len(parts) == 2 and parts[0] == "databases":
+                db = self.databases.get(parts[1])
+                if db is None:
+                    h.send_json({"object": "error", "status": 404}, 404); return 404
+                if method == "PATCH":
+                    db["properties"].update({k: dict(v, type=next(iter(v))) for k, v in req.get("properties", {}).items()})
+                h.send_json({"object": "database", "id": parts[1], "properties": db["properties"]}); return 200
+            if len(parts) == 3 and parts[0] == "databases" and parts[2] == "query":
+                hits = [pid for pid, p in self.pages.items()
+                        if p["db"] == parts[1] and not p.get("archived") and self._match(p, req.get("filter"))]
+                start = int(req.get("start_cursor") or 0)
+                size = min(100, int(req.get("page_size") or 100))
+                chunk = hits[start:start + size]
+                more = start + size < len(hits)
+                h.send_json({"results": [self._page(pid) for pid in chunk], "has_more": more,
+                             "next_cursor": str(start + size) if more else None}); return 200
+            if parts == ["pages"] and method == "POST":
+                pid = str(uuid.uuid4())
+                self.pages[pid] = {"db": (req.get("parent") or {}).get("database_id"), "last_edited_time": _now(),
+                                   "properties": {k: _stored(v) for k, v in req.get("properties", {}).items()}}
+                h.send_json(self._page(pid)); return 200
+            if len(parts) == 2 and parts[0] == "pages":
+                p = self.pages.get(parts[1])
+                if method == "PATCH" and p is not None and p.get("archived") and req.get("archived") is not False:
+                    h.send_json({"object": "error", "status": 400, "code": "validation_error",
+                                 "message": "Can't edit block that is archived. You must unarchive the block before editing."}, 400)
+                    return 400
+                if method == "PATCH" and p is not None:
+                    if "archived" in req:
+                        p["archived"] = bool(req["archived"])
+                    p["properties"].update({k: _stored(v) for k, v in req.get("properties", {}).items()})
+                    p["last_edited_time"] = _now()
+                if p is None:  # parent pages are not modelled; any id is a reachable page
+                    h.send_json({"object": "page", "id": parts[1], "properties": {}}); return 200
+                h.send_json(self._page(parts[1])); return 200
+            if parts == ["files"] and method == "POST":
+                self.uploads += 1
+                name = body.split(b'filename="', 1)[-1].split(b'"', 1)[0].decode("utf-8", "replace")
+                h.send_json({"file": {"name": name, "url": f"{self.base}/files/{uuid.uuid4()}/{name}",
+                                      "expiry_time": None}}); return 200
+        h.send_json({"object": "error", "status": 404, "code": "object_not_found"}, 404)
+        return 404
+
+
+class MockScryfall(_MockServer):
+    """Scryfall stand-in serving synthetic sets: `/cards/search`, `/cards/named`, `/cards/collection`
+    and the card images themselves under `/img`."""
+
+    def __init__(self, faults: Optional[Faults] = None, port: int = 0, cards_per_set: int = 300, image_bytes: int = 64 << 10):
+        super().__init__(faults, port)
+        self.cards_per_set = cards_per_set
+        self.image_bytes = image_bytes
+        self._sets: Dict[str, List[Dict[str, Any]]] = {}
+        self._sets_lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return self.base
+
+    def cards(self, code: str) -> List[Dict[str, Any]]:
+        code = code.lower()
+        with self._sets_lock:
+            if code not in self._sets:
+                seed = int(hashlib.sha1(code.encode()).hexdigest()[:8], 16)
+                cards = synthetic_cards(self.cards_per_set, seed=seed)
+                for i, c in enumerate(cards, 1):
+                    c["set"], c["collector_number"] = code, str(i)
+                    for holder in [c] + (c.get("card_faces") or []):
+                        for tier, u in (holder.get("image_uris") or {}).items():
+                            holder["image_uris"][tier] = f"{self.base}/img/{u.rsplit('/', 1)[-1]}"
+                self._sets[code] = cards
+            return self._sets[code]
+
+    def _all(self) -> List[Dict[str, Any]]:
+        with self._sets_lock:
+            return [c for cards in self._sets.values() for c in cards]
+
+    def route(self, h: _Handler, method: str, path: str, body: bytes) -> int:
+        q = {k: v[0] for k, v in parse_qs(urlsplit(h.path).query).items()}
+        if path.startswith("/img/"):
+            seed = hashlib.sha256(path.encode()).digest()
+            h.send_bytes(200, (seed * (self.image_bytes // len(seed) + 1))[:self.image_bytes], "image/jpeg"); return 200
+        if path == "/cards/search":
+            terms = dict(t.split(":", 1) for t in q.get("q", "").split() if ":" in t)
+            if "set" in terms:
+                cards = self.cards(terms["set"])
+            else:
+                name = q.get("q", "").split('"')[1] if '"' in q.get("q", "") else ""
+                cards = [c for c in self._all() if c["name"] == name]
+            page = int(q.get("page") or 1)
+            chunk = cards[(page - 1) * SCRY_PAGE:page * SCRY_PAGE]
+            if not chunk:
+                h.send_json({"object": "error", "status": 404}, 404); return 404
+            more = page * SCRY_PAGE < len(cards)
+            nxt = f'{self.base}/cards/search?q={q.get("q", "").replace(" ", "+")}&unique=prints&page={page + 1}'
+            h.send_json({"object": "list", "total_cards": len(cards), "data": chunk, "has_more": more,
+                         "next_page": nxt if more else None}); return 200
+        if path == "/cards/named":
+            want = (q.get("exact") or q.get("fuzzy") or "").lower()
+            for c in self._all():
+                if c["name"].lower() == want and (not q.get("set") or c["set"] == q["set"].lower()):
+                    h.send_json(c); return 200
+            h.send_json({"object": "error", "status": 404}, 404); return 404
+        if path == "/cards/collection" and method == "POST":
+            found, missing = [], []
+            cards = self._all()
+            for ident in json.loads(body).get("identifiers", []):
+                hit = next((c for c in cards if all(str(c.get(k, "")).lower() == str(v).lower() for k, v in ident.items())), None)
+                (found if hit else missing).append(hit or ident)
+            h.send_json({"object": "list", "data": found, "not_found": missing}); return 200
+        h.send_json({"object": "error", "status": 404}, 404)
+        return 404
+
+
+def point_at(notion_url: Optional[str] = None, scry_url: Optional[str] = None):
+    """Send this process's Notion/Scryfall calls to other base URLs (e.g. the mocks)."""
+    if notion_url:
+        notion_api.NOTION = notion_url.rstrip("/")
+    if scry_url:
+        scry.SCRY = scry_url.rstrip("/")
@@ -0,0 +1,153 @@
+import json, pathlib, re, unicodedata
+from collections import Counter
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from . import bulk
+from .scry import alt_name
+from .util import cache_dir
+
+_APOSTROPHES = re.compile(r"['\u2019]")
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+PROBE = 6  # rarest query trigrams probed for candidates
+CANDIDATES = 48  # best-voted candidates scored exactly
+
+
+def norm_name(name: str) -> str:
+    """Lowercase, accent-free, punctuation collapsed to single spaces ("Lim-Dûl's Vault" -> "lim duls vault")."""
+    s = unicodedata.normalize("NFKD", _APOSTROPHES.sub("", name or "")).encode("ascii", "ignore").decode("ascii").lower()
+    return _NON_ALNUM.sub(" ", s).strip()
+
+
+def trigrams(normed: str) -> Set[str]:
+    s = f"  {normed} "
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+def card_names(card: Dict[str, Any]) -> List[str]:
+    """Oracle name, face names and the alternate name (`scry.alt_name`) of one Scryfall card."""
+    out = [card.get("name"), alt_name(card)] + [face.get("name") for face in card.get("card_faces") or []]
+    return [n for n in dict.fromkeys(out) if n]
+
+
+class NameIndex:
+    """Offline fuzzy lookup from any known card name to its oracle name.
+
+    Names are matched exactly after `norm_name`, otherwise by trigram Dice
+    similarity: the posting lists of the `PROBE` rarest query trigrams vote for
+    candidates, and the `CANDIDATES` best-voted are scored against their trigram
+    sets. Normalized names and postings are persisted with the names, so loading
+    the index does no trigram work."""
+
+    def __init__(self, names: Optional[List[str]] = None, oracle: Optional[List[str]] = None,
+                 source: Optional[Dict[str, Any]] = None, norm: Optional[List[str]] = None,
+                 postings: Optional[Dict[str, List[int]]] = None):
+        self.names: List[str] = names or []
+        self.oracle: List[str] = oracle or []  # oracle name per entry in `names`
+        self.source = source or {}
+        self._norm = norm if norm is not None else [norm_name(n) for n in self.names]
+        self._grams: Dict[int, FrozenSet[str]] = {}  # trigram sets of scored candidates, built on demand
+        self._exact: Dict[str, int] = {}
+        for i, n in enumerate(self._norm):
+            self._exact.setdefault(n, i)
+        if postings is None:
+            postings = {}
+            for i, n in enumerate(self._norm):
+                for g in trigrams(n):
+                    postings.setdefault(g, []).append(i)
+        self._postings: Dict[str, List[int]] = postings
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_cards(cls, cards: Iterable[Dict[str, Any]], source: Optional[Dict[str, Any]] = None) -> "NameIndex":
+        seen: Dict[str, str] = {}
+        for card in cards:
+            oracle = card.get("name")
+            if not oracle:
+                continue
+            for n in card_names(card):
+                seen.setdefault(n, oracle)
+        return cls(list(seen), list(seen.values()), source)
+
+    # persistence
+    def save(self, path: pathlib.Path):
+        tmp = path.with_name(path.name + ".part")
+        tmp.write_text(json.dumps({"source": self.source, "names": self.names, "oracle": self.oracle,
+                                   "norm": self._norm, "postings": self._postings},
+                                  ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> "NameIndex":
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return cls(data["names"], data["oracle"], data.get("source"), data["norm"], data["postings"])
+
+    # lookup
+    def search(self, query: str, limit: int = 5, cutoff: float = 0.35) -> List[Tuple[str, str, float]]:
+        """Best (matched name, oracle name, score) tuples, score in [0, 1]."""
+        q = norm_name(query)
+        if not q:
+            return []
+        hit = self._exact.get(q)
+        if hit is not None:
+            return [(self.names[hit], self.oracle[hit], 1.0)]
+        qg = trigrams(q)
+        lists = sorted((self._postings[g] for g in qg if g in self._postings), key=len)
+        votes: Counter = Counter()
+        for post in lists[:PROBE]:  # a typo spoils at most three trigrams; the rest still vote
+            votes.update(post)
+        nq, grams, scored = len(qg), self._grams, []
+        for i, _ in votes.most_common(CANDIDATES):
+            tg = grams.get(i)
+            if tg is None:
+                tg = grams[i] = frozenset(trigrams(self._norm[i]))
+            score = 2 * len(qg & tg) / (nq + len(tg))
+            if score >= cutoff:
+                scored.append((score, -len(tg), i))
+        scored.sort(reverse=True)
+        return [(self.names[i], self.oracle[i], round(s, 3)) for s, _, i in scored[:limit]]
+
+    def resolve(self, query: str, cutoff: float = 0.5) -> Optional[str]:
+        """Oracle name for `query`, or None when nothing is close enough."""
+        best = self.search(query, limit=1, cutoff=cutoff)
+        return best[0][1] if best else None
+
+
+_loaded: Optional[NameIndex] = None
+
+
+def index_path() -> pathlib.Path:
+    return cache_dir("names") / "names.json"
+
+
+def _bulk_source(path: pathlib.Path) -> Dict[str, Any]:
+    st = path.stat()
+    return {"bulk": path.name, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def load_name_index(rebuild: bool = False, download: bool = False) -> Optional[NameIndex]:
+    """The persisted index, rebuilt from the cached bulk file when that changed.
+
+    Never touches the network unless `download` is set (to fetch a missing bulk
+    file); returns None when there is no cached card data to build from."""
+    global _loaded
+    if _loaded is not None and not rebuild:
+        return _loaded
+    path = index_path()
+    bulk_path = bulk._paths()[0]
+    if download and not bulk_path.exists():
+        bulk_path = bulk.ensure_bulk_file()
+    if not rebuild and path.exists():
+        try:
+            idx = NameIndex.load(path)
+            if not bulk_path.exists() or idx.source == _bulk_source(bulk_path):
+                _loaded = idx
+                return idx
+        except (OSError, ValueError, KeyError):
+            pass
+    if not bulk_path.exists():
+        return None
+    idx = NameIndex.from_cards(bulk.iter_cards(bulk_path), _bulk_source(bulk_path))
+    idx.save(path)
+    _loaded = idx
+    return idx
@@ -1,56 +1,163 @@
-import time, requests, json
-from typing import Dict, Any, Optional, List
+import contextvars, requests, json, os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, Optional, List
+from .images import (ByteBudget, CONTENT_TYPES, ImageStore, MultipartFile, TRANSCODE_RESERVE, Transcoder,
+                     multipart_boundary, multipart_chunks, upload_name, url_ext)
+from .metrics import get_metrics
+from .profiling import stage
+from . import tracing
+from .ratelimit import RateLimiter
+from .schema import database_properties, missing_columns
+from .sync import SYNC_HASH_PROP, plain_props
+from .transport import Transport, get_transport
 
-NOTION = "https://api.notion.com/v1"
+NOTION = os.environ.get("MTG_IMPORTER_NOTION_URL", "https://api.notion.com/v1").rstrip("/")  # override for mocks
 NV = "2022-06-28"
 
+
+class PageGone(Exception):
+    """The page was archived or deleted in Notion after the mirror last saw it."""
+
+
+def page_gone(status: int, body: bytes) -> bool:
+    """A PATCH answer meaning the page is archived (400 validation error) or no longer exists (404)."""
+    return status == 404 or (status == 400 and b"archived" in body)
+
+
 class NotionClient:
-    def __init__(self, token: str):
+    def __init__(self, token: str, limiter: Optional[RateLimiter] = None, transport: Optional[Transport] = None,
+                 images: Optional[ImageStore] = None, image_workers: int = 4,
+                 image_budget: int = 8 << 20, chunk_size: int = 256 << 10, transcoder: Optional[Transcoder] = None):
         self.h = {"Authorization": f"Bearer {token}", "Notion-Version": NV, "Content-Type": "application/json"}
+        self.limiter = limiter
+        self.http = transport or get_transport()
+        self.images = images
+        self.image_pool = ThreadPoolExecutor(max_workers=max(1, image_workers), thread_name_prefix="images")
+        self.budget = ByteBudget(image_budget)
+        self.chunk_size = min(chunk_size, image_budget)
+        self.transcoder = transcoder
+        if images is not None and transcoder is not None:
+            images.variant = transcoder.key
+
+    def _send(self, method: str, url: str, headers: Optional[Dict[str, str]] = None, **kw) -> requests.Response:
+        """Send one Notion request through the pooled transport and shared limiter."""
+        return self.http.request(method, url, limiter=self.limiter, headers=headers or self.h, **kw)
+
+    def images_unchanged(self, urls: List[str], current: Optional[List[str]]) -> bool:
+        """True when the page already carries exactly the stored uploads for `urls`."""
+        if not self.images or current is None:
+            return False
+        names = self.images.names_for(urls)
+        return names is not None and names == current
 
     # auth / lookup
     def verify_token(self) -> bool:
-        return requests.get(f"{NOTION}/users/me", headers=self.h, timeout=30).status_code == 200
+        return self._send("GET", f"{NOTION}/users/me", timeout=30).status_code == 200
 
     def get_parent(self, page_id: str):
-        return requests.get(f"{NOTION}/pages/{page_id}", headers=self.h, timeout=30)
+        return self._send("GET", f"{NOTION}/pages/{page_id}", timeout=30)
 
     def upload_images(self, urls: List[str]) -> List[Dict[str, Any]]:
         """Download image URLs and upload to Notion storage.
 
-        Falls back to external links when a download or upload fails."""
-        files: List[Dict[str, Any]] = []
-        for idx, url in enumerate(urls or []):
-            name = f"image_{idx}.jpg"
-            try:
-                resp = requests.get(url, timeout=60)
-                resp.raise_for_status()
-                up_headers = {k: v for k, v in self.h.items() if k != "Content-Type"}
-                upload = requests.post(
-                    f"{NOTION}/files", headers=up_headers, files={"file": (name, resp.content)}, timeout=60
-                )
-                upload.raise_for_status()
-                info = upload.json().get("file", {})
-                files.append(
-                    {
-                        "type": "file",
-                        "name": info.get("name", name),
-                        "file": {"url": info.get("url"), "expiry_time": info.get("expiry_time")},
-                    }
-                )
-            except Exception:
-                files.append(
-                    {
-                        "type": "external",
-                        "name": name,
-                        "external": {"url": url},
-                    }
-                )
-        return files
+        Faces are transferred concurrently on the image pool, streamed in chunks under
+        the in-flight byte budget. With an image store, art already uploaded is reused by
+        content hash and only new or changed images are transferred. Falls back to
+        external links when a download or upload fails."""
+        with stage("images"), tracing.span("images", cat="image"):
+            urls = list(urls or [])
+            names = [f"image_{idx}.jpg" for idx in range(len(urls))]
+            if tracing.active():  # carry the card's trace context into the pool threads
+                futures = [self.image_pool.submit(contextvars.copy_context().run, self._image_or_external, u, n)
+                           for u, n in zip(urls, names)]
+            else:
+                futures = [self.image_pool.submit(self._image_or_external, u, n) for u, n in zip(urls, names)]
+            files = [f.result() for f in futures]
+            if self.images:
+                self.images.maybe_save()
+            return files
+
+    def _image_or_external(self, url: str, name: str) -> Dict[str, Any]:
+        try:
+            with stage("images", timed=False), tracing.lane(name, cat="image", url=url):  # the caller's section already times this
+                return self._upload_image(url, name)
+        except Exception:
+            return {
+                "type": "external",
+                "name": name,
+                "external": {"url": url},
+            }
+
+    def _upload_image(self, url: str, name: str) -> Dict[str, Any]:
+        store, tc = self.images, self.transcoder
+        sha = store.sha_for(url) if store else None
+        if sha:
+            ref = store.uploaded(sha)
+            if ref:
+                return ref
+        ext = tc.ext if tc else url_ext(url)
+        ctype = tc.content_type if tc else CONTENT_TYPES.get(ext, "image/jpeg")
+        name = f"{os.path.splitext(name)[0]}.{ext}"
+        boundary = multipart_boundary()
+        with self.budget.reserve(TRANSCODE_RESERVE if tc else self.chunk_size):
+            if store:
+                if not sha or not store.has_blob(sha):
+                    if tc:
+                        sha = store.put_stream(url, [self._transcoded(url)])
+                    else:
+                        with tracing.span("image download", cat="http"), \
+                                self.http.request("GET", url, stream=True, timeout=60, endpoint="GET image") as resp:
+                            resp.raise_for_status()
+                            sha = store.put_stream(url, get_metrics().count_bytes(resp.iter_content(self.chunk_size),
+                                                                                  "download"))
+                name = upload_name(sha, ext)
+                path = store.blob_path(sha)
+                size = [os.path.getsize(path)]
+                body = lambda: MultipartFile(boundary, name, path, ctype)
+            elif tc:
+                data = self._transcoded(url)
+                size = [len(data)]
+                body = lambda: multipart_chunks(boundary, name, [data], ctype)
+            else:
+                size = [0]  # measured as the download streams through; reset per attempt
+
+                def streamed() -> Iterator[bytes]:
+                    size[0] = 0
+                    for chunk in self._download_chunks(url):
+                        size[0] += len(chunk)
+                        yield chunk
+                body = lambda: multipart_chunks(boundary, name, streamed(), ctype)
+            up_headers = {k: v for k, v in self.h.items() if k != "Content-Type"}
+            up_headers["Content-Type"] = f"multipart/form-data; boundary={boundary}"
+            with tracing.span("image upload", cat="http") as sp:
+                upload = self._send("POST", f"{NOTION}/files", headers=up_headers, data=body, timeout=60)
+                sp.set(status=upload.status_code, bytes=size[0], streamed=not store and not tc)
+        upload.raise_for_status()
+        get_metrics().add_bytes("upload", size[0])
+        info = upload.json().get("file", {})
+        ref = {
+            "type": "file",
+            "name": name if store else info.get("name", name),
+            "file": {"url": info.get("url"), "expiry_time": info.get("expiry_time")},
+        }
+        if store:
+            store.record_upload(sha, ref)
+        return ref
+
+    def _transcoded(self, url: str) -> bytes:
+        with tracing.span("image download", cat="http"):
+            raw = b"".join(self._download_chunks(url))
+        with tracing.span("transcode", cat="image", bytes_in=len(raw)):
+            return self.transcoder(raw)
+
+    def _download_chunks(self, url: str) -> Iterator[bytes]:
+        with self.http.request("GET", url, stream=True, timeout=60, endpoint="GET image") as resp:
+            resp.raise_for_status()
+            yield from get_metrics().count_bytes(resp.iter_content(self.chunk_size), "download")
 
     def search_db_by_title(self, title: str) -> Optional[Dict[str, Any]]:
         body = {"query": title, "filter": {"property": "object", "value": "database"}}
-        r = requests.post(f"{NOTION}/search", headers=self.h, data=json.dumps(body), timeout=60); r.raise_for_status()
+        r = self._send("POST", f"{NOTION}/search", data=json.dumps(body), timeout=60, idempotent=True); r.raise_for_status()
         for it in r.json().get("results", []):
             if it.get("object") == "database":
                 plain = "".join([(seg.get("plain_text") or "") for seg in (it.get("title") or [])])
@@ -59,106 +166,108 @@ class NotionClient:
         return None
 
     def get_title_property_name(self, db_id: str) -> str:
-        r = requests.get(f"{NOTION}/databases/{db_id}", headers=self.h, timeout=60); r.raise_for_status()
+        r = self._send("GET", f"{NOTION}/databases/{db_id}", timeout=60); r.raise_for_status()
         for name, meta in (r.json().get("properties") or {}).items():
             if (meta or {}).get("type") == "title": return name
         return "Name"
 
     # schema
     def create_database(self, parent_page_id: str, title: str) -> Dict[str, Any]:
-        props = {
-            "Name": {"title": {}},
-            "Set": {"select": {}},
-            "Collector #": {"rich_text": {}},
-            "Rarity": {"select": {}},
-            "Mana Cost": {"rich_text": {}},
-            "CMC": {"number": {}},
-            "Type Line": {"rich_text": {}},
-            "Oracle Text": {"rich_text": {}},
-            "Language": {"select": {}},
-            "Released At": {"date": {}},
-            "Layout": {"select": {}},
-            "Artist": {"rich_text": {}},
-            "Prices": {"rich_text": {}},
-            "Legalities": {"rich_text": {}},
-            "Colors": {"multi_select": {}},
-            "Color Identity": {"multi_select": {}},
-            "Scryfall URL": {"url": {}},
-            "Oracle ID": {"rich_text": {}},
-            "Card ID": {"rich_text": {}},
-            "Power": {"rich_text": {}},
-            "Toughness": {"rich_text": {}},
-            "Image": {"files": {}},
-            "Procurement Method": {"multi_select": {}},
-            "Oracle Name": {"rich_text": {}},
-            "FF Name": {"rich_text": {}},
-            "CN Sort": {"number": {}},
-        }
-        body = {"parent":{"type":"page_id","page_id":parent_page_id},"title":[{"type":"text","text":{"content":title}}],"properties":props}
-        r = requests.post(f"{NOTION}/databases", headers=self.h, data=json.dumps(body), timeout=60); r.raise_for_status()
+        body = {"parent":{"type":"page_id","page_id":parent_page_id},"title":[{"type":"text","text":{"content":title}}],
+                "properties": database_properties()}
+        r = self._send("POST", f"{NOTION}/databases", data=json.dumps(body), timeout=60); r.raise_for_status()
         j = r.json(); return {"id": j["id"], "url": j.get("url")}
 
     def ensure_columns(self, db_id: str):
-        need = {
-            "Set": {"select": {}},
-            "Collector #": {"rich_text": {}},
-            "Rarity": {"select": {}},
-            "Mana Cost": {"rich_text": {}},
-            "CMC": {"number": {}},
-            "Type Line": {"rich_text": {}},
-            "Oracle Text": {"rich_text": {}},
-            "Language": {"select": {}},
-            "Released At": {"date": {}},
-            "Layout": {"select": {}},
-            "Artist": {"rich_text": {}},
-            "Prices": {"rich_text": {}},
-            "Legalities": {"rich_text": {}},
-            "Colors": {"multi_select": {}},
-            "Color Identity": {"multi_select": {}},
-            "Scryfall URL": {"url": {}},
-            "Oracle ID": {"rich_text": {}},
-            "Card ID": {"rich_text": {}},
-            "Power": {"rich_text": {}},
-            "Toughness": {"rich_text": {}},
-            "Image": {"files": {}},
-            "Procurement Method": {"multi_select": {}},
-            "Oracle Name": {"rich_text": {}},
-            "FF Name": {"rich_text": {}},
-            "CN Sort": {"number": {}},
-        }
-        r = requests.get(f"{NOTION}/databases/{db_id}", headers=self.h, timeout=60); r.raise_for_status()
-        existing = set((r.json().get("properties") or {}).keys())
-        to_add = {k:v for k,v in need.items() if k not in existing}
+        r = self._send("GET", f"{NOTION}/databases/{db_id}", timeout=60); r.raise_for_status()
+        to_add = missing_columns((r.json().get("properties") or {}).keys())
         if to_add:
-            pr = requests.patch(f"{NOTION}/databases/{db_id}", headers=self.h, data=json.dumps({"properties": to_add}), timeout=60)
+            pr = self._send("PATCH", f"{NOTION}/databases/{db_id}", data=json.dumps({"properties": to_add}), timeout=60)
             pr.raise_for_status()
 
     # data ops
+    @staticmethod
+    def _plain(prop: Optional[Dict[str, Any]]) -> str:
+        prop = prop or {}
+        return "".join([(seg.get("plain_text") or "") for seg in (prop.get(prop.get("type") or "rich_text") or [])])
+
+    @staticmethod
+    def _entry(page: Dict[str, Any]) -> Dict[str, Any]:
+        props = plain_props(page.get("properties"))
+        return {"id": page["id"], "url": page.get("url"), "last_edited_time": page.get("last_edited_time"),
+                "sync_hash": props.pop(SYNC_HASH_PROP, None) or None, "props": props}
+
+    def index_by_card_id(self, db_id: str, edited_since: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Page through the whole database once and map Card ID -> page info.
+
+        With `edited_since` (ISO timestamp) only pages edited at or after it are returned."""
+        index: Dict[str, Dict[str, Any]] = {}
+        body: Dict[str, Any] = {"page_size": 100}
+        if edited_since:
+            body["filter"] = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": edited_since}}
+        with stage("query"), tracing.span("query", cat="notion", edited_since=edited_since):
+            while True:
+                r = self._send("POST", f"{NOTION}/databases/{db_id}/query", data=json.dumps(body), timeout=60, idempotent=True)
+                r.raise_for_status()
+                data = r.json()
+                for page in data.get("results", []):
+                    cid = self._plain((page.get("properties") or {}).get("Card ID"))
+                    if cid and cid not in index:
+                        index[cid] = self._entry(page)
+                if not data.get("has_more") or not data.get("next_cursor"):
+                    break
+                body["start_cursor"] = data["next_cursor"]
+        return index
+
+    def query_by_card_ids(self, db_id: str, card_ids: List[str], chunk_size: int = 50) -> Dict[str, Dict[str, Any]]:
+        """Resolve many Card IDs with one `or`-filtered query per chunk."""
+        found: Dict[str, Dict[str, Any]] = {}
+        ids = list(dict.fromkeys([c for c in card_ids if c]))
+        for i in range(0, len(ids), chunk_size):
+            chunk = ids[i:i + chunk_size]
+            body: Dict[str, Any] = {
+                "page_size": 100,
+                "filter": {"or": [{"property": "Card ID", "rich_text": {"equals": c}} for c in chunk]},
+            }
+            with stage("query"), tracing.span("query", cat="notion", ids=len(chunk)):
+                while True:
+                    r = self._send("POST", f"{NOTION}/databases/{db_id}/query", data=json.dumps(body), timeout=60, idempotent=True)
+                    r.raise_for_status()
+                    data = r.json()
+                    for page in data.get("results", []):
+                        cid = self._plain((page.get("properties") or {}).get("Card ID"))
+                        if cid and cid not in found:
+                            found[cid] = self._entry(page)
+                    if not data.get("has_more") or not data.get("next_cursor"):
+                        break
+                    body["start_cursor"] = data["next_cursor"]
+        return found
+
     def query_by_card_id(self, db_id: str, card_id: str) -> Optional[Dict[str, Any]]:
         body = {"page_size":1, "filter":{"property":"Card ID","rich_text":{"equals": card_id}}}
-        r = requests.post(f"{NOTION}/databases/{db_id}/query", headers=self.h, data=json.dumps(body), timeout=60); r.raise_for_status()
+        with stage("query"), tracing.span("query", cat="notion", ids=1):
+            r = self._send("POST", f"{NOTION}/databases/{db_id}/query", data=json.dumps(body), timeout=60, idempotent=True); r.raise_for_status()
         res = r.json().get("results", [])
         return {"id": res[0]["id"], "url": res[0].get("url")} if res else None
 
     def create_card_page(self, db_id: str, properties: Dict[str, Any]):
         body = {"parent": {"database_id": db_id}, "properties": properties}
-        r = requests.post(f"{NOTION}/pages", headers=self.h, data=json.dumps(body), timeout=60)
-        if r.status_code == 429: time.sleep(1.2); r = requests.post(f"{NOTION}/pages", headers=self.h, data=json.dumps(body), timeout=60)
-        r.raise_for_status(); return r.json().get("id")
+        with stage("write"), tracing.span("create", cat="notion"):
+            r = self._send("POST", f"{NOTION}/pages", data=json.dumps(body), timeout=60)
+            r.raise_for_status(); return r.json().get("id")
 
     def update_card_minimal(self, page_id: str, properties: Dict[str, Any]):
         body = {"properties": properties}
-        r = requests.patch(f"{NOTION}/pages/{page_id}", headers=self.h, data=json.dumps(body), timeout=60)
-        if r.status_code == 429: time.sleep(1.2); r = requests.patch(f"{NOTION}/pages/{page_id}", headers=self.h, data=json.dumps(body), timeout=60)
-        r.raise_for_status(); return True
+        with stage("write"), tracing.span("update", cat="notion", props=len(properties)):
+            r = self._send("PATCH", f"{NOTION}/pages/{page_id}", data=json.dumps(body), timeout=60)
+            if page_gone(r.status_code, r.content):
+                raise PageGone(page_id)
+            r.raise_for_status(); return True
 
 
     def update_card_page(self, page_id: str, properties: Dict[str, Any]):
         """Compat for older app code: patch full properties payload."""
         body = {"properties": properties}
-        r = requests.patch(f"{NOTION}/pages/{page_id}", headers=self.h, data=json.dumps(body), timeout=60)
-        if r.status_code == 429:
-            time.sleep(1.2)
-            r = requests.patch(f"{NOTION}/pages/{page_id}", headers=self.h, data=json.dumps(body), timeout=60)
+        r = self._send("PATCH", f"{NOTION}/pages/{page_id}", data=json.dumps(body), timeout=60)
         r.raise_for_status()
         return True
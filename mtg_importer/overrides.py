@@ -1,4 +1,5 @@
 import json, pathlib, typing as t
+from .record import CardRecord
 
 def load_overrides() -> dict:
     p = pathlib.Path("overrides.json")
@@ -10,21 +11,24 @@ def load_overrides() -> dict:
         pass
     return {}
 
-def apply_overrides(key: str, rec: dict, ov: dict) -> dict:
-    # key can be SET-collector or Scryfall id; try both
-    out = dict(rec)
-    if key in ov and isinstance(ov[key], dict):
-        o = ov[key]
-        if "procurement" in o and isinstance(o["procurement"], list):
-            out["procurement"] = list({str(x) for x in o["procurement"]})
-        if "title" in o and isinstance(o["title"], str):
-            out["title_override"] = o["title"]
-    # also try by Scryfall id
+def apply_overrides(key: str, rec: t.Mapping[str, t.Any], ov: dict) -> t.Mapping[str, t.Any]:
+    """`rec` with overrides for `key` (SET-collector) or its Scryfall id applied, id winning.
+
+    Copy-on-write: records without an override are returned as-is; card records are
+    copied with `replace`, sharing every untouched field."""
     cid = rec.get("id")
-    if cid and cid in ov and isinstance(ov[cid], dict):
-        o = ov[cid]
-        if "procurement" in o and isinstance(o["procurement"], list):
-            out["procurement"] = list({str(x) for x in o["procurement"]})
-        if "title" in o and isinstance(o["title"], str):
-            out["title_override"] = o["title"]
-    return out
+    by_key, by_id = ov.get(key), ov.get(cid) if cid else None  # key can be SET-collector or Scryfall id; try both
+    if by_key is None and by_id is None:  # the common case: nothing to copy
+        return rec
+    changes: t.Dict[str, t.Any] = {}
+    for o in (by_key, by_id):
+        if isinstance(o, dict):
+            if "procurement" in o and isinstance(o["procurement"], list):
+                changes["procurement"] = tuple(sorted({str(x) for x in o["procurement"]}))  # sorted: feeds the Sync Hash
+            if "title" in o and isinstance(o["title"], str):
+                changes["title_override"] = o["title"]
+    if not changes:
+        return rec
+    if isinstance(rec, CardRecord):
+        return rec.replace(**changes)
+    return {**rec, **changes}
@@ -0,0 +1,52 @@
+import queue, threading
+from typing import Any, Iterable, Iterator
+
+_DONE = object()
+
+
+class Prefetcher:
+    """Drain `source` on a background thread into a bounded queue.
+
+    The consumer iterates as usual; the producer runs at most `depth` items ahead,
+    so fetching overlaps with whatever the consumer does without unbounded memory.
+    Producer exceptions are re-raised in the consumer."""
+
+    def __init__(self, source: Iterable[Any], depth: int = 4):
+        self._q: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, depth))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(source,), daemon=True, name="prefetch")
+        self._thread.start()
+
+    def _put(self, item: Any) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self, source: Iterable[Any]):
+        try:
+            for item in source:
+                if not self._put((True, item)):
+                    return
+        except BaseException as e:
+            self._put((False, e))
+            return
+        self._put((True, _DONE))
+
+    def __iter__(self) -> Iterator[Any]:
+        try:
+            while True:
+                ok, item = self._q.get()
+                if not ok:
+                    raise item
+                if item is _DONE:
+                    return
+                yield item
+        finally:
+            self.close()
+
+    def close(self):
+        self._stop.set()
@@ -0,0 +1,184 @@
+import contextlib, cProfile, io, pathlib, pstats, threading, time, tracemalloc
+from collections import Counter, defaultdict
+from typing import Callable, Dict, Iterator, List, Optional, Set
+
+STAGES = ("fetch", "normalize", "props", "images", "query", "write")
+_NULL = contextlib.nullcontext()
+_active: Optional["StageProfiler"] = None
+
+
+def stage(name: str, timed: bool = True):
+    """Profile the enclosed block as pipeline stage `name` while a `session` is active.
+
+    `timed=False` adds the block's functions to the stage's profile without counting
+    its time, for worker-thread code that a timed section is already waiting on.
+    Outside a session this returns one shared no-op context manager, so the hooks
+    left in the hot paths cost a global lookup and nothing else."""
+    p = _active
+    return _NULL if p is None else _Section(p, name, timed)
+
+
+class _Section:
+    __slots__ = ("p", "name", "timed", "prof", "outer", "child", "t0", "mem0")
+
+    def __init__(self, p: "StageProfiler", name: str, timed: bool):
+        self.p, self.name, self.timed = p, name, timed
+
+    def __enter__(self):
+        stack = self.p._stack()
+        self.outer = stack[-1] if stack else None
+        if self.outer is not None and self.outer.prof is not None:
+            self.outer.prof.disable()  # nested stages are charged to themselves, not their caller
+        self.child = 0.0
+        self.mem0 = self.p._memory_enter(self.name) if self.timed else 0
+        stack.append(self)
+        self.prof = self.p._enable(self.name)
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.t0
+        if self.prof is not None:
+            self.prof.disable()
+        self.p._stack().pop()
+        if self.timed:
+            self.p._record(self.name, wall, wall - self.child, self.prof is not None, self.mem0)
+        if self.outer is not None:
+            self.outer.child += wall
+            if self.outer.prof is not None:
+                self.outer.prof = self.p._enable(self.outer.name)
+        return False
+
+
+class StageProfiler:
+    """Per-stage cProfile sections, wall/self time and (optionally) tracemalloc deltas.
+
+    Each thread keeps one `cProfile.Profile` per stage; they are merged per stage
+    when the session ends. When the interpreter refuses a second concurrent
+    profiler (3.12+), the section is still timed, just not profiled."""
+
+    def __init__(self, memory: bool = False):
+        self.memory = memory
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profiles: Dict[str, List[cProfile.Profile]] = defaultdict(list)
+        self._used: Set[cProfile.Profile] = set()
+        self.calls: Counter = Counter()
+        self.unprofiled: Counter = Counter()
+        self.wall: Dict[str, float] = defaultdict(float)
+        self.own: Dict[str, float] = defaultdict(float)
+        self.alloc: Dict[str, int] = defaultdict(int)
+        self.snapshots: Dict[str, List[tracemalloc.StatisticDiff]] = {}  # growth during each stage's first section
+        self._first: Dict[str, tracemalloc.Snapshot] = {}
+
+    def _stack(self) -> List[_Section]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _enable(self, name: str) -> Optional[cProfile.Profile]:
+        profs = getattr(self._local, "profiles", None)
+        if profs is None:
+            profs = self._local.profiles = {}
+        prof = profs.get(name)
+        if prof is None:
+            prof = profs[name] = cProfile.Profile()
+        try:
+            prof.enable()
+        except ValueError:  # another profiler already owns this interpreter
+            return None
+        if prof not in self._used:  # only profiles that ran can be turned into Stats
+            with self._lock:
+                self._used.add(prof)
+                self._profiles[name].append(prof)
+        return prof
+
+    def _memory_enter(self, name: str) -> int:
+        if not self.memory:
+            return 0
+        if name not in self._first and name not in self.snapshots:
+            with self._lock:
+                self._first.setdefault(name, tracemalloc.take_snapshot())
+        return tracemalloc.get_traced_memory()[0]
+
+    def _record(self, name: str, wall: float, own: float, profiled: bool, mem0: int):
+        delta = tracemalloc.get_traced_memory()[0] - mem0 if self.memory else 0
+        with self._lock:
+            self.calls[name] += 1
+            self.wall[name] += wall
+            self.own[name] += own
+            self.alloc[name] += delta
+            if not profiled:
+                self.unprofiled[name] += 1
+            if self.memory and name in self._first and name not in self.snapshots:
+                self.snapshots[name] = tracemalloc.take_snapshot().compare_to(self._first.pop(name), "lineno")
+
+    def stats(self, name: str) -> Optional[pstats.Stats]:
+        profs = self._profiles.get(name)
+        return pstats.Stats(*profs) if profs else None
+
+    def summary(self) -> List[str]:
+        total = time.perf_counter() - self.started
+        head = f"{'stage':<10} {'calls':>8} {'wall s':>9} {'self s':>9} {'self %':>7}"
+        lines = [head + (f" {'net KiB':>9}" if self.memory else "")]
+        for name in sorted(self.calls, key=lambda n: -self.own[n]):
+            row = (f"{name:<10} {self.calls[name]:>8} {self.wall[name]:>9.3f} {self.own[name]:>9.3f} "
+                   f"{100 * self.own[name] / total if total else 0:>6.1f}%")
+            if self.memory:
+                row += f" {self.alloc[name] / 1024:>9.1f}"
+            if self.unprofiled[name]:
+                row += f"  ({self.unprofiled[name]} sections timed only)"
+            lines.append(row)
+        lines.append(f"{'session':<10} {'':>8} {total:>9.3f}")
+        return lines
+
+    def dump(self, out_dir: str, top: int = 20) -> pathlib.Path:
+        """Write `<stage>.pstats` per stage and `summary.txt` (table + top-N functions per stage)."""
+        out = pathlib.Path(out_dir)
+        out.mkdir(parents=True, exist_ok=True)
+        buf = io.StringIO()
+        buf.write("\n".join(self.summary()) + "\n")
+        for name in sorted(self.calls, key=lambda n: -self.own[n]):
+            st = self.stats(name)
+            if st is not None:
+                st.dump_stats(str(out / f"{name}.pstats"))
+                buf.write(f"\n=== {name}: top {top} by cumulative time ===\n")
+                st.stream = buf
+                st.sort_stats("cumulative").print_stats(top)
+            diff = self.snapshots.get(name)
+            if diff:
+                buf.write(f"\n=== {name}: top {top} allocation sites during its first section ===\n")
+                for d in diff[:top]:
+                    buf.write(f"{d}\n")
+        path = out / "summary.txt"
+        path.write_text(buf.getvalue(), encoding="utf-8")
+        return path
+
+
+@contextlib.contextmanager
+def session(out_dir: Optional[str], memory: bool = False, top: int = 20,
+            log: Callable[..., None] = print) -> Iterator[Optional[StageProfiler]]:
+    """Profile every `stage` hook inside the block and dump the reports to `out_dir`.
+
+    A falsy `out_dir` makes this a no-op, leaving the hooks disabled."""
+    global _active
+    if not out_dir:
+        yield None
+        return
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    prof = _active = StageProfiler(memory)
+    try:
+        yield prof
+    finally:
+        _active = None
+        path = prof.dump(out_dir, top)
+        if started_tracing:
+            tracemalloc.stop()
+        log("\n--- PROFILE ---")
+        for line in prof.summary():
+            log(line)
+        log("Per-stage .pstats files and top-N listings:", path)
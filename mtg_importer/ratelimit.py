@@ -0,0 +1,76 @@
+import threading, time
+from typing import Callable, Optional
+
+NOTION_AVG_RATE = 3.0  # requests/second, Notion's documented average
+
+
+class RateLimiter:
+    """Thread-safe token bucket whose refill rate adapts AIMD-style.
+
+    Successful requests add `increase` req/s (default 2% of the configured rate,
+    up to `max_rate`); a 429 halves the rate (down to `min_rate`) and pauses every
+    caller for `Retry-After`. A burst of 429s seen by concurrent workers is one
+    signal: the rate is cut at most once per Retry-After window."""
+
+    def __init__(self, rate: float = NOTION_AVG_RATE, burst: Optional[float] = None,
+                 min_rate: float = 0.5, max_rate: Optional[float] = None, increase: Optional[float] = None,
+                 decrease: float = 0.5, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = float(rate)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate if max_rate is not None else rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self.increase = increase if increase is not None else 0.02 * self.max_rate
+        self.decrease = decrease
+        self._clock, self._sleep = clock, sleep
+        self._tokens = self.burst
+        self._last = clock()
+        self._paused_until = 0.0
+        self._cut_until = 0.0  # end of the window opened by the last rate cut
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def try_acquire(self) -> float:
+        """Take a token if one is available; otherwise return the seconds to wait (non-blocking)."""
+        with self._lock:
+            now = self._clock()
+            if now < self._paused_until:
+                return self._paused_until - now
+            self._refill(now)
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return 0.0
+            return (1.0 - self._tokens) / self.rate
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            self._sleep(wait)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            if now >= self._cut_until:  # later 429s in the window answer requests sent before the cut
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self._cut_until = now + (retry_after or 1.0)
+            self._tokens = 0.0
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+
+def retry_after_seconds(value: Optional[str], default: float = 1.0) -> float:
+    try:
+        return max(0.0, float(value)) if value is not None else default
+    except (TypeError, ValueError):
+        return default
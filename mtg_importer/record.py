@@ -0,0 +1,135 @@
+import operator
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# dict-view keys in the order `normalize` has always produced them
+KEYS = ("name", "alt_name", "set", "collector_number", "rarity", "lang", "released_at", "layout", "artist",
+        "prices", "legalities", "mana_cost", "cmc", "type_line", "oracle_text", "colors", "color_identity",
+        "scryfall_uri", "oracle_id", "id", "image_urls", "power", "toughness", "procurement",
+        "oracle_raw", "ff_raw", "cn_sort")
+_ATTR = {k: k for k in KEYS}
+_ATTR.update(name="oracle_raw", alt_name="ff_raw", title_override="title_override")  # stored once, viewed twice
+_VALUES = operator.attrgetter(*(_ATTR[k] for k in KEYS))
+
+
+class FrozenDict(dict):
+    """Read-only dict: safe to share between records, and still a dict for `json.dumps`."""
+    __slots__ = ()
+
+    def _readonly(self, *a, **kw):
+        raise TypeError("card record mappings are read-only")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = __ior__ = _readonly
+
+
+class SharedDict(FrozenDict):
+    """A FrozenDict handed to many records; caches its JSON text for the property codec."""
+    __slots__ = ("_json",)
+
+
+_EMPTY = FrozenDict()
+_SHARED_MAX = 8192  # distinct legalities across all of Scryfall number in the low thousands
+_shared: Dict[Tuple, SharedDict] = {}  # keyed by values
+_tuples: Dict[Tuple[str, ...], Tuple[str, ...]] = {}  # colors / procurement combinations, few distinct
+
+
+def shared_mapping(d: Optional[Dict[str, Any]]) -> FrozenDict:
+    """One FrozenDict per distinct content (legalities repeat across prints and faces of a card).
+
+    Once `_SHARED_MAX` distinct mappings are cached, new ones get a private copy."""
+    if not d:
+        return _EMPTY
+    try:
+        key = tuple(d.values())  # values only: cheap on a miss; the key order is checked on a hit
+        fd = _shared.get(key)
+    except TypeError:  # unhashable values
+        return FrozenDict(d)
+    if fd is not None and tuple(fd) == tuple(d):
+        return fd
+    if fd is not None or len(_shared) >= _SHARED_MAX:
+        return FrozenDict(d)
+    fd = _shared[key] = SharedDict(d)
+    return fd
+
+
+def frozen(d: Optional[Dict[str, Any]]) -> FrozenDict:
+    return FrozenDict(d) if d else _EMPTY
+
+
+def shared_tuple(values: Optional[List[str]]) -> Tuple[str, ...]:
+    t = tuple(values or ())
+    return _tuples.setdefault(t, t)
+
+
+class CardRecord(Mapping):
+    """One normalized print in slots instead of a 27-key dict.
+
+    Enum-like strings (set, rarity, layout, lang) are interned, legalities and
+    colour/procurement tuples are shared between prints, and prices are frozen.
+    Reads work as on the old dict (`rec["id"]`, `rec.get(...)`, `dict(rec)`),
+    so property builders and `record_hash` are unchanged. Records are treated as
+    immutable: `replace` returns a changed copy that shares every other value."""
+
+    __slots__ = ("oracle_raw", "ff_raw", "set", "collector_number", "rarity", "lang", "released_at", "layout",
+                 "artist", "prices", "legalities", "mana_cost", "cmc", "type_line", "oracle_text", "colors",
+                 "color_identity", "scryfall_uri", "oracle_id", "id", "image_urls", "power", "toughness",
+                 "procurement", "cn_sort", "title_override")
+
+    def __init__(self, oracle_raw: str, ff_raw: str, set: str, collector_number: str, rarity: str, lang: str,
+                 released_at: str, layout: str, artist: str, prices: FrozenDict, legalities: FrozenDict,
+                 mana_cost: str, cmc: Any, type_line: str, oracle_text: str, colors: Tuple[str, ...],
+                 color_identity: Tuple[str, ...], scryfall_uri: Optional[str], oracle_id: str, id: str,
+                 image_urls: List[str], power: str, toughness: str, procurement: Tuple[str, ...], cn_sort: Any,
+                 title_override: Optional[str] = None):
+        self.oracle_raw, self.ff_raw, self.set, self.collector_number = oracle_raw, ff_raw, set, collector_number
+        self.rarity, self.lang, self.released_at, self.layout, self.artist = rarity, lang, released_at, layout, artist
+        self.prices, self.legalities, self.mana_cost, self.cmc = prices, legalities, mana_cost, cmc
+        self.type_line, self.oracle_text, self.colors, self.color_identity = type_line, oracle_text, colors, color_identity
+        self.scryfall_uri, self.oracle_id, self.id, self.image_urls = scryfall_uri, oracle_id, id, image_urls
+        self.power, self.toughness, self.procurement, self.cn_sort = power, toughness, procurement, cn_sort
+        if title_override is not None:  # left unset otherwise, so the key is simply absent
+            self.title_override = title_override
+
+    # dict view; property builders call `get` ~30 times per card, so it stays one lookup + getattr
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, _ATTR[key])
+        except (KeyError, AttributeError):
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return getattr(self, _ATTR[key])
+        except (KeyError, AttributeError):
+            return default
+
+    def __contains__(self, key: object) -> bool:
+        return key in _ATTR and hasattr(self, _ATTR[key])
+
+    def __iter__(self) -> Iterator[str]:
+        yield from KEYS
+        if hasattr(self, "title_override"):
+            yield "title_override"
+
+    def __len__(self) -> int:
+        return len(KEYS) + hasattr(self, "title_override")
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Plain dict in `KEYS` order; much cheaper than `dict(rec)`, which goes key by key."""
+        d = dict(zip(KEYS, _VALUES(self)))
+        if hasattr(self, "title_override"):
+            d["title_override"] = self.title_override
+        return d
+
+    def __repr__(self) -> str:
+        return f"CardRecord({self.as_dict()!r})"
+
+    def replace(self, **changes: Any) -> "CardRecord":
+        """Copy-on-write: a new record sharing every unchanged value with this one."""
+        new = CardRecord.__new__(CardRecord)
+        for attr in CardRecord.__slots__:
+            if attr in changes:
+                setattr(new, attr, changes[attr])
+            elif hasattr(self, attr):
+                setattr(new, attr, getattr(self, attr))
+        return new
@@ -0,0 +1,180 @@
+import json
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+from .record import CardRecord
+from .sync import SYNC_HASH_PROP, record_hash
+
+CREATE, UPDATE = 1, 2
+BOTH = CREATE | UPDATE
+
+
+class Column(NamedTuple):
+    name: str
+    type: str                    # Notion property type
+    field: Optional[str] = None  # record key; None for columns filled in by the caller
+    on: int = 0                  # CREATE / UPDATE / BOTH: which payloads carry it
+    as_json: bool = False        # rich_text holding a JSON-encoded mapping
+
+
+TITLE = "Name"  # the title column when we create the database; existing ones may call it something else
+
+# One row per database column, in the order `create_database` has always used.
+# Update payloads carry what can change on a reprint sync; identity columns are create-only.
+COLUMNS: Tuple[Column, ...] = (
+    Column(TITLE, "title", None, BOTH),
+    Column("Set", "select", "set", CREATE),
+    Column("Collector #", "rich_text", "collector_number", CREATE),
+    Column("Rarity", "select", "rarity", CREATE),
+    Column("Mana Cost", "rich_text", "mana_cost", CREATE),
+    Column("CMC", "number", "cmc", CREATE),
+    Column("Type Line", "rich_text", "type_line", CREATE),
+    Column("Oracle Text", "rich_text", "oracle_text", CREATE),
+    Column("Language", "select", "lang", BOTH),
+    Column("Released At", "date", "released_at", BOTH),
+    Column("Layout", "select", "layout", BOTH),
+    Column("Artist", "rich_text", "artist", BOTH),
+    Column("Prices", "rich_text", "prices", BOTH, as_json=True),
+    Column("Legalities", "rich_text", "legalities", BOTH, as_json=True),
+    Column("Colors", "multi_select", "colors", CREATE),
+    Column("Color Identity", "multi_select", "color_identity", CREATE),
+    Column("Scryfall URL", "url", "scryfall_uri", CREATE),
+    Column("Oracle ID", "rich_text", "oracle_id", CREATE),
+    Column("Card ID", "rich_text", "id", CREATE),
+    Column("Power", "rich_text", "power", CREATE),
+    Column("Toughness", "rich_text", "toughness", CREATE),
+    Column("Image", "files"),  # written by the image uploader, never by the encoder
+    Column("Procurement Method", "multi_select", "procurement", BOTH),
+    Column("Oracle Name", "rich_text", "oracle_raw", BOTH),
+    Column("FF Name", "rich_text", "ff_raw", BOTH),
+    Column("CN Sort", "number", "cn_sort", BOTH),
+    Column(SYNC_HASH_PROP, "rich_text", None, BOTH),
+)
+
+
+def database_properties(title: bool = True) -> Dict[str, Dict[str, Any]]:
+    """The `properties` schema for `COLUMNS`; without the title column for migrating existing databases."""
+    return {c.name: {c.type: {}} for c in COLUMNS if title or c.type != "title"}
+
+
+def missing_columns(existing: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    have = set(existing)
+    return {k: v for k, v in database_properties(title=False).items() if k not in have}
+
+
+# value encoders shared by every codec; each call returns fresh dicts, so callers may mutate a payload
+def _title(v: str) -> Dict[str, Any]:
+    return {"title": [{"type": "text", "text": {"content": v}}]}
+
+
+def _text(v: Any) -> Dict[str, Any]:
+    return {"rich_text": [{"type": "text", "text": {"content": v}}]} if v else {"rich_text": []}
+
+
+def _select(v: Optional[str]) -> Dict[str, Any]:
+    return {"select": {"name": v}} if v else {"select": None}
+
+
+def _multi(vs: Optional[Iterable[str]]) -> Dict[str, Any]:
+    return {"multi_select": [{"name": x} for x in (vs or ())]}
+
+
+def _number(v: Any) -> Dict[str, Any]:
+    return {"number": float(v) if v is not None else None}
+
+
+def _url(v: Optional[str]) -> Dict[str, Any]:
+    return {"url": v or None}
+
+
+def _date(v: Optional[str]) -> Dict[str, Any]:
+    return {"date": {"start": v}} if v else {"date": None}
+
+
+def _json(d: Optional[Mapping[str, Any]]) -> str:
+    """JSON text of a price/legality mapping, computed once per shared mapping."""
+    if not d:
+        return ""
+    s = getattr(d, "_json", None)
+    if s is None:
+        s = json.dumps(d)
+        if hasattr(type(d), "_json"):
+            d._json = s
+    return s
+
+
+def _float(v: Any) -> Optional[float]:
+    return float(v) if v is not None else None
+
+
+# per Notion type: (payload encoder, plain value) for a value;
+# the plain value matches `sync.plain_value` of the payload, so deltas agree with `diff_props`
+_ENCODE: Dict[str, Tuple[Callable[[Any], Dict[str, Any]], Callable[[Any], Any]]] = {
+    "title": (_title, lambda v: v),
+    "rich_text": (_text, lambda v: v or ""),
+    "select": (_select, lambda v: v or None),
+    "multi_select": (_multi, lambda v: sorted(v or ())),
+    "number": (_number, _float),
+    "url": (_url, lambda v: v or None),
+    "date": (_date, lambda v: v or None),
+}
+_MISSING = object()
+_TITLE_TEXT, _DIGEST = object(), object()  # column sources passed in by the caller, not read off the record
+
+# (property name, record field or _TITLE_TEXT/_DIGEST, JSON-encode first, encoder, plain value)
+Step = Tuple[str, Any, bool, Callable[[Any], Dict[str, Any]], Callable[[Any], Any]]
+
+
+class Codec:
+    """Record -> Notion `properties` encoder over `COLUMNS` for one title column.
+
+    `create` / `update` build full payloads; `delta` builds only the update columns
+    whose plain value differs from `current` (the page's `plain_props`), the same
+    result as `diff_props(update(...), current)` without encoding unchanged columns.
+    All three accept a precomputed Sync Hash `digest`."""
+
+    def __init__(self, title_prop: str = TITLE):
+        self.title_prop = title_prop
+        steps = [(c.on, self._step(c)) for c in COLUMNS if c.on]
+        self.create_steps: List[Step] = [s for on, s in steps if on & CREATE]
+        self.update_steps: List[Step] = [s for on, s in steps if on & UPDATE]
+
+    def _step(self, c: Column) -> Step:
+        if c.type == "title":
+            return (self.title_prop, _TITLE_TEXT, False, *_ENCODE[c.type])
+        return (c.name, _DIGEST if c.name == SYNC_HASH_PROP else c.field, c.as_json, *_ENCODE[c.type])
+
+    @staticmethod
+    def _encode(steps: List[Step], rec: Mapping[str, Any], title_text: str, digest: Optional[str],
+                current: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
+        d = rec.as_dict() if type(rec) is CardRecord else rec
+        v = d.get
+        if digest is None:
+            digest = record_hash(d, title_text)
+        out = {}
+        for name, src, as_json, encode, plain in steps:
+            x = title_text if src is _TITLE_TEXT else digest if src is _DIGEST else v(src)
+            if as_json:
+                x = _json(x)
+            if current is None or current.get(name, _MISSING) != plain(x):
+                out[name] = encode(x)
+        return out
+
+    def create(self, rec: Mapping[str, Any], title_text: str, digest: Optional[str] = None) -> Dict[str, Any]:
+        return self._encode(self.create_steps, rec, title_text, digest)
+
+    def update(self, rec: Mapping[str, Any], title_text: str, digest: Optional[str] = None) -> Dict[str, Any]:
+        return self._encode(self.update_steps, rec, title_text, digest)
+
+    def create_batch(self, items: Iterable[Tuple[Mapping[str, Any], str]]) -> List[Dict[str, Any]]:
+        """Create payloads for (record, title text) pairs, e.g. one Scryfall page of new cards."""
+        steps, encode = self.create_steps, self._encode
+        return [encode(steps, rec, title_text, None) for rec, title_text in items]
+
+    def delta(self, rec: Mapping[str, Any], title_text: str, current: Optional[Mapping[str, Any]],
+              digest: Optional[str] = None) -> Dict[str, Any]:
+        return self._encode(self.update_steps, rec, title_text, digest, current)
+
+
+@lru_cache(maxsize=None)
+def codec(title_prop: str = TITLE) -> Codec:
+    return Codec(title_prop)
@@ -1,66 +1,190 @@
-import time, requests
-from typing import Dict, Any, List, Optional, Set
+import os
+import requests
+from sys import intern
+from collections import OrderedDict
+from typing import Dict, Any, Iterator, List, Optional, Set, Tuple
+from .httpcache import DiskCache, as_response
+from .profiling import stage
+from .record import CardRecord, frozen, shared_mapping, shared_tuple
+from . import tracing
+from .transport import get_transport
 from .util import cn_sort as _cn_sort
 
-SCRY = "https://api.scryfall.com"
+SCRY = os.environ.get("MTG_IMPORTER_SCRYFALL_URL", "https://api.scryfall.com").rstrip("/")  # override for mocks
+PAGE_SIZE = 175  # prints per Scryfall search page
+
+_cache: Optional[DiskCache] = None
+_cache_enabled = True
+
+def configure_cache(enabled: bool = True, ttl: Optional[float] = None, max_mb: Optional[int] = None,
+                    root: Optional[str] = None) -> Optional[DiskCache]:
+    """Set up (or disable) the on-disk response cache used by `_get`."""
+    global _cache, _cache_enabled
+    _cache_enabled = enabled
+    _cache = None
+    if enabled:
+        kw: Dict[str, Any] = {}
+        if ttl is not None: kw["ttl"] = ttl
+        if max_mb is not None: kw["max_bytes"] = int(max_mb) << 20
+        _cache = DiskCache(root=root, **kw)
+    return _cache
+
+def cache_lookup(url: str, params: Dict[str, Any]) -> Tuple[Optional[requests.Response], Dict[str, str]]:
+    """(fresh cached response, None) or (None, revalidation headers for the request about to be sent)."""
+    global _cache
+    if _cache is None and _cache_enabled:
+        _cache = DiskCache()
+    if not _cache:
+        return None, {}
+    hit = _cache.get(_cache.key(url, params))
+    if hit and _cache.fresh(hit[0]):
+        return as_response(url, *hit), {}
+    headers: Dict[str, str] = {}
+    if hit:
+        cached_h = hit[0].get("headers") or {}
+        if "ETag" in cached_h: headers["If-None-Match"] = cached_h["ETag"]
+        if "Last-Modified" in cached_h: headers["If-Modified-Since"] = cached_h["Last-Modified"]
+    return None, headers
+
+def cache_store(url: str, params: Dict[str, Any], r):
+    """Settle a sent GET against the cache: a 304 becomes the cached copy, a 200 is stored."""
+    if not _cache:
+        return r
+    key = _cache.key(url, params)
+    if r.status_code == 304:
+        hit = _cache.get(key)
+        if hit:
+            _cache.touch(key, revalidated=True)
+            return as_response(url, *hit)
+    if r.status_code == 200:
+        _cache.put(key, r)
+    return r
 
 def _get(url: str, **params) -> requests.Response:
-    return requests.get(url, params=params or None, timeout=60)
+    hit, headers = cache_lookup(url, params)
+    if hit is not None:
+        return hit
+    r = get_transport().request("GET", url, params=params or None, headers=headers or None, timeout=60)
+    return cache_store(url, params, r)
+
+def _get_stream(url: str) -> requests.Response:
+    return get_transport().request("GET", url, stream=True, timeout=300)
 
-def fetch_set(code: str) -> List[Dict[str, Any]]:
-    url = f"{SCRY}/cards/search"
-    params = {"q": f"set:{code}", "unique": "prints"}
-    out: List[Dict[str, Any]] = []
+def _iter_pages(url: str, params: Dict[str, Any]) -> Iterator[List[Dict[str, Any]]]:
     while True:
-        r = _get(url, **params)
-        if r.status_code == 429:
-            time.sleep(2); continue
-        if r.status_code == 404:
-            break
-        r.raise_for_status()
-        data = r.json()
-        out.extend(data.get("data", []))
+        with stage("fetch"), tracing.span("fetch", cat="scryfall", url=url):
+            r = _get(url, **params)
+            if r.status_code == 404:
+                break
+            r.raise_for_status()
+            data = r.json()
+        yield data.get("data", [])
         if not data.get("has_more"):
             break
         url, params = data.get("next_page"), {}
-    return out
+
+def set_query(code: str) -> Tuple[str, Dict[str, Any]]:
+    """(url, params) of the first search page for a set's prints."""
+    return f"{SCRY}/cards/search", {"q": f"set:{code}", "unique": "prints"}
+
+def iter_set_pages(code: str) -> Iterator[List[Dict[str, Any]]]:
+    """One list per Scryfall search page (up to `PAGE_SIZE` prints), fetched lazily."""
+    return _iter_pages(*set_query(code))
+
+def fetch_set(code: str) -> Iterator[Dict[str, Any]]:
+    for page in iter_set_pages(code):
+        yield from page
 
 def fetch_named(name: str, setcode: Optional[str] = None, fuzzy: bool = False) -> Optional[Dict[str, Any]]:
+    """Card by name; fuzzy names are first resolved offline through the local name index."""
+    if fuzzy:
+        from .names import load_name_index
+        idx = load_name_index()
+        exact = idx.resolve(name) if idx else None
+        if exact:
+            name, fuzzy = exact, False
     params = {"exact": name} if not fuzzy else {"fuzzy": name}
     if setcode: params["set"] = setcode
     r = _get(f"{SCRY}/cards/named", **params)
     return r.json() if r.status_code == 200 else None
 
-def search_prints(name: str, setcode: Optional[str] = None) -> List[Dict[str, Any]]:
+COLLECTION_CHUNK = 75  # identifiers per /cards/collection request (Scryfall's maximum)
+COLLECTION_MEMO_SIZE = 4096
+_MISS: Dict[str, Any] = {}
+_collection_memo: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+
+def collection_key(ident: Dict[str, str]) -> Tuple[str, str, str]:
+    return ((ident.get("name") or "").strip().lower(), (ident.get("set") or "").strip().lower(),
+            (ident.get("collector_number") or "").strip().lower())
+
+def _memo_get(key: Tuple[str, str, str]) -> Optional[Dict[str, Any]]:
+    hit = _collection_memo.get(key)
+    if hit is not None:
+        _collection_memo.move_to_end(key)
+    return hit
+
+def _memo_put(key: Tuple[str, str, str], card: Dict[str, Any]):
+    _collection_memo[key] = card
+    _collection_memo.move_to_end(key)
+    while len(_collection_memo) > COLLECTION_MEMO_SIZE:
+        _collection_memo.popitem(last=False)
+
+def fetch_collection(identifiers: List[Dict[str, str]]) -> List[Optional[Dict[str, Any]]]:
+    """Resolve card identifiers (name / set / collector_number) in batches of 75.
+
+    Returns one card (or None) per identifier. Hits and misses are memoized in an
+    LRU, so repeated names across lists cost no requests."""
+    resolved: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+    todo: "OrderedDict[Tuple[str, str, str], Dict[str, str]]" = OrderedDict()
+    for ident in identifiers:
+        key = collection_key(ident)
+        if key in resolved or key in todo:
+            continue
+        hit = _memo_get(key)
+        if hit is not None:
+            resolved[key] = hit
+        else:
+            todo[key] = {k: v for k, v in ident.items() if v}
+    pending = list(todo.items())
+    for i in range(0, len(pending), COLLECTION_CHUNK):
+        chunk = pending[i:i + COLLECTION_CHUNK]
+        with stage("fetch"), tracing.span("fetch collection", cat="scryfall", ids=len(chunk)):
+            r = get_transport().request("POST", f"{SCRY}/cards/collection", idempotent=True,  # a lookup, safe to resend
+                                        json={"identifiers": [ident for _, ident in chunk]}, timeout=60)
+            r.raise_for_status()
+            data = r.json()
+        missing = {collection_key(ident) for ident in data.get("not_found") or []}
+        found = iter(data.get("data") or [])
+        for key, _ in chunk:  # `data` follows the request order, skipping `not_found`
+            resolved[key] = _MISS if key in missing else next(found, _MISS)
+            _memo_put(key, resolved[key])
+    return [None if resolved[k] is _MISS else resolved[k] for k in map(collection_key, identifiers)]
+
+def iter_prints_pages(name: str, setcode: Optional[str] = None) -> Iterator[List[Dict[str, Any]]]:
     q = f'!"{name}"'
     if setcode: q += f" set:{setcode}"
-    url = f"{SCRY}/cards/search"
-    params = {"q": q, "unique": "prints"}
-    out: List[Dict[str, Any]] = []
-    while True:
-        r = _get(url, **params)
-        if r.status_code == 429:
-            time.sleep(2); continue
-        if r.status_code == 404:
-            break
-        r.raise_for_status()
-        data = r.json()
-        out.extend(data.get("data", []))
-        if not data.get("has_more"):
-            break
-        url, params = data.get("next_page"), {}
-    return out
+    return _iter_pages(f"{SCRY}/cards/search", {"q": q, "unique": "prints"})
+
+def search_prints(name: str, setcode: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    for page in iter_prints_pages(name, setcode):
+        yield from page
+
+IMAGE_TIERS = ("png", "large", "normal", "small")  # largest first
 
-def _from_uris(uris: Dict[str, str]) -> Optional[str]:
-    return (uris or {}).get("png") or (uris or {}).get("large") or (uris or {}).get("normal")
+def _from_uris(uris: Dict[str, str], tier: str = "png") -> Optional[str]:
+    """Preferred rendition, falling back to the next smaller, then larger ones."""
+    i = IMAGE_TIERS.index(tier)
+    for t in IMAGE_TIERS[i:] + IMAGE_TIERS[:i][::-1]:
+        if (uris or {}).get(t): return uris[t]
+    return None
 
-def image_urls(card: Dict[str, Any]) -> List[str]:
+def image_urls(card: Dict[str, Any], tier: str = "png") -> List[str]:
     urls: List[str] = []
     if "image_uris" in card:
-        u = _from_uris(card["image_uris"])
+        u = _from_uris(card["image_uris"], tier)
         if u: urls.append(u)
     for face in card.get("card_faces") or []:
-        u = _from_uris((face or {}).get("image_uris", {}))
+        u = _from_uris((face or {}).get("image_uris", {}), tier)
         if u and u not in urls: urls.append(u)
     return urls[:2]
 
@@ -98,36 +222,32 @@ def procurement_methods(card: Dict[str, Any]) -> List[str]:
             methods.add("Commander Deck Sample Pack")
     return sorted(methods)
 
-def normalize(card: Dict[str, Any]) -> Dict[str, Any]:
-    oracle = card.get("name") or ""
-    ff = alt_name(card) or ""
+def normalize(card: Dict[str, Any], image_tier: str = "png") -> CardRecord:
     cn = card.get("collector_number") or ""
-    return {
-        "name": oracle,
-        "alt_name": ff,
-        "set": (card.get("set") or "").upper(),
-        "collector_number": cn,
-        "rarity": (card.get("rarity") or "").capitalize(),
-        "lang": card.get("lang") or "",
-        "released_at": card.get("released_at") or "",
-        "layout": card.get("layout") or "",
-        "artist": card.get("artist") or "",
-        "prices": card.get("prices") or {},
-        "legalities": card.get("legalities") or {},
-        "mana_cost": card.get("mana_cost") or merged(card, "mana_cost") or "",
-        "cmc": card.get("cmc"),
-        "type_line": card.get("type_line") or merged(card, "type_line") or "",
-        "oracle_text": card.get("oracle_text") or merged(card, "oracle_text") or "",
-        "colors": card.get("colors") or [],
-        "color_identity": card.get("color_identity") or [],
-        "scryfall_uri": card.get("scryfall_uri") or None,
-        "oracle_id": card.get("oracle_id") or "",
-        "id": card.get("id") or "",
-        "image_urls": image_urls(card),
-        "power": card.get("power") or merged(card, "power") or "",
-        "toughness": card.get("toughness") or merged(card, "toughness") or "",
-        "procurement": procurement_methods(card),
-        "oracle_raw": oracle,
-        "ff_raw": ff,
-        "cn_sort": _cn_sort(cn),
-    }
+    rec = CardRecord.__new__(CardRecord)  # filled in place: ~2x cheaper than 25 keyword arguments
+    rec.oracle_raw = card.get("name") or ""
+    rec.ff_raw = alt_name(card) or ""
+    rec.set = intern((card.get("set") or "").upper())
+    rec.collector_number = cn
+    rec.rarity = intern((card.get("rarity") or "").capitalize())
+    rec.lang = intern(card.get("lang") or "")
+    rec.released_at = card.get("released_at") or ""
+    rec.layout = intern(card.get("layout") or "")
+    rec.artist = card.get("artist") or ""
+    rec.prices = frozen(card.get("prices"))
+    rec.legalities = shared_mapping(card.get("legalities"))
+    rec.mana_cost = card.get("mana_cost") or merged(card, "mana_cost") or ""
+    rec.cmc = card.get("cmc")
+    rec.type_line = card.get("type_line") or merged(card, "type_line") or ""
+    rec.oracle_text = card.get("oracle_text") or merged(card, "oracle_text") or ""
+    rec.colors = shared_tuple(card.get("colors"))
+    rec.color_identity = shared_tuple(card.get("color_identity"))
+    rec.scryfall_uri = card.get("scryfall_uri") or None
+    rec.oracle_id = card.get("oracle_id") or ""
+    rec.id = card.get("id") or ""
+    rec.image_urls = image_urls(card, image_tier)
+    rec.power = card.get("power") or merged(card, "power") or ""
+    rec.toughness = card.get("toughness") or merged(card, "toughness") or ""
+    rec.procurement = shared_tuple(procurement_methods(card))
+    rec.cn_sort = _cn_sort(cn)
+    return rec
@@ -0,0 +1,179 @@
+import json, pathlib, sqlite3, threading, time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from .util import cache_dir
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    db_id TEXT NOT NULL,
+    sets TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS outcomes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    card_id TEXT NOT NULL,
+    key TEXT,
+    outcome TEXT NOT NULL,
+    page_id TEXT,
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outcomes_run ON outcomes(run_id, card_id);
+CREATE TABLE IF NOT EXISTS mirror (
+    db_id TEXT NOT NULL,
+    card_id TEXT NOT NULL,
+    page_id TEXT NOT NULL,
+    url TEXT,
+    sync_hash TEXT,
+    last_edited_time TEXT,
+    props TEXT,
+    PRIMARY KEY (db_id, card_id)
+);
+CREATE INDEX IF NOT EXISTS mirror_page ON mirror(db_id, page_id);
+CREATE TABLE IF NOT EXISTS mirror_sync (
+    db_id TEXT PRIMARY KEY,
+    watermark TEXT NOT NULL,
+    synced_at REAL NOT NULL
+);
+"""
+
+DONE_OUTCOMES = ("created", "updated", "skipped")
+SYNC_OVERLAP = 300  # seconds re-read on each incremental sync; Notion rounds last_edited_time to the minute
+
+
+def _iso(ts: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(ts))
+
+
+class StateStore:
+    """Local SQLite state shared across runs (`state.sqlite3` in the cache dir).
+
+    `outcomes` is an append-only journal: one row per card written by a run, so an
+    interrupted import can be resumed with the cards it already finished skipped.
+    `mirror` keeps each database's Card ID -> page entries between runs and is
+    refreshed from pages edited since the last sync."""
+
+    def __init__(self, path: Optional[pathlib.Path] = None):
+        self.path = pathlib.Path(path) if path else cache_dir() / "state.sqlite3"
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")  # WAL keeps committed rows across a crash
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # runs
+    def start_run(self, db_id: str, sets: Iterable[str]) -> int:
+        with self._lock:
+            cur = self._db.execute("INSERT INTO runs (db_id, sets, started_at) VALUES (?, ?, ?)",
+                                   (db_id, json.dumps(list(sets)), time.time()))
+            return cur.lastrowid
+
+    def unfinished_run(self, db_id: str) -> Optional[int]:
+        """The most recent run against `db_id` that did not finish cleanly."""
+        with self._lock:
+            row = self._db.execute("SELECT id FROM runs WHERE db_id = ? AND finished_at IS NULL ORDER BY id DESC LIMIT 1",
+                                   (db_id,)).fetchone()
+        return row[0] if row else None
+
+    def resume_run(self, run_id: int, sets: Iterable[str]):
+        with self._lock:
+            self._db.execute("UPDATE runs SET sets = ? WHERE id = ?", (json.dumps(list(sets)), run_id))
+
+    def finish_run(self, run_id: int):
+        with self._lock:
+            self._db.execute("UPDATE runs SET finished_at = ? WHERE id = ?", (time.time(), run_id))
+
+    # journal
+    def record(self, run_id: int, card_id: str, key: str, outcome: str, page_id: Optional[str] = None):
+        with self._lock:
+            self._db.execute("INSERT INTO outcomes (run_id, card_id, key, outcome, page_id, at) VALUES (?, ?, ?, ?, ?, ?)",
+                             (run_id, card_id, key, outcome, page_id, time.time()))
+
+    def completed(self, run_id: int) -> Set[str]:
+        """Card ids the run has already created, updated or found unchanged."""
+        with self._lock:
+            rows = self._db.execute(f"SELECT DISTINCT card_id FROM outcomes WHERE run_id = ? AND outcome IN ({','.join('?' * len(DONE_OUTCOMES))})",
+                                    (run_id, *DONE_OUTCOMES)).fetchall()
+        return {r[0] for r in rows}
+
+    def outcomes(self, run_id: int) -> List[Tuple[str, str, str, Optional[str]]]:
+        """(card id, key, outcome, page id) rows of a run, oldest first."""
+        with self._lock:
+            return self._db.execute("SELECT card_id, key, outcome, page_id FROM outcomes WHERE run_id = ? ORDER BY seq",
+                                    (run_id,)).fetchall()
+
+    # mirror
+    def mirror_index(self, db_id: str) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            rows = self._db.execute("SELECT card_id, page_id, url, sync_hash, last_edited_time, props FROM mirror WHERE db_id = ?",
+                                    (db_id,)).fetchall()
+        return {cid: {"id": pid, "url": url, "sync_hash": h, "last_edited_time": t, "props": json.loads(p) if p else None}
+                for cid, pid, url, h, t, p in rows}
+
+    def mirror_put(self, db_id: str, entries: Dict[str, Dict[str, Any]], replace: bool = False):
+        """Store index entries; a page whose Card ID was edited moves to its new key."""
+        rows = [(db_id, cid, e["id"], e.get("url"), e.get("sync_hash"), e.get("last_edited_time"),
+                 json.dumps(e.get("props"), separators=(",", ":")) if e.get("props") is not None else None)
+                for cid, e in entries.items()]
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            if replace:
+                self._db.execute("DELETE FROM mirror WHERE db_id = ?", (db_id,))
+            else:
+                self._db.executemany("DELETE FROM mirror WHERE db_id = ? AND page_id = ?", [(db_id, r[2]) for r in rows])
+            self._db.executemany("INSERT OR REPLACE INTO mirror VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def watermark(self, db_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT watermark FROM mirror_sync WHERE db_id = ?", (db_id,)).fetchone()
+        return row[0] if row else None
+
+    def set_watermark(self, db_id: str, watermark: str):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO mirror_sync VALUES (?, ?, ?)", (db_id, watermark, time.time()))
+
+    def sync_mirror(self, notion, db_id: str, full: bool = False) -> Tuple[Dict[str, Dict[str, Any]], int]:
+        """Bring the mirror of `db_id` up to date; returns (Card ID index, pages fetched).
+
+        The first sync (or `full`) scans the database; later ones query only pages
+        edited since the watermark, which also picks up edits made by hand in Notion.
+        Database queries never return archived pages, so pages archived or deleted in
+        Notion stay mirrored until the next full sync; a PATCH to one raises
+        `notion_api.PageGone` and the importers recreate the page."""
+        since = None if full else self.watermark(db_id)
+        started = time.time()
+        fresh = notion.index_by_card_id(db_id, edited_since=since)
+        self.mirror_put(db_id, fresh, replace=since is None)
+        seen = max([e["last_edited_time"] for e in fresh.values() if e.get("last_edited_time")] + [since or ""])
+        # never move past what is surely complete: edits landing during the scan are re-read next time
+        safe = _iso(started - SYNC_OVERLAP)
+        self.set_watermark(db_id, min(seen, safe) if seen else safe)
+        return self.mirror_index(db_id), len(fresh)
+
+    def open_run(self, db_id: str, sets: List[str], resume: bool = False) -> "Run":
+        """Start a run, or with `resume` continue the last unfinished one against `db_id`."""
+        run_id = self.unfinished_run(db_id) if resume else None
+        if run_id is None:
+            return Run(self, self.start_run(db_id, sets))
+        self.resume_run(run_id, sets)
+        return Run(self, run_id, self.completed(run_id), resumed=True)
+
+
+class Run:
+    """One import run's handle on the journal; `done` holds card ids to skip when resuming."""
+
+    def __init__(self, store: StateStore, run_id: int, done: Optional[Set[str]] = None, resumed: bool = False):
+        self.store, self.id = store, run_id
+        self.done: Set[str] = done or set()
+        self.resumed = resumed
+
+    def record(self, card_id: str, key: str, outcome: str, page_id: Optional[str] = None):
+        self.store.record(self.id, card_id, key, outcome, page_id)
+
+    def finish(self):
+        self.store.finish_run(self.id)
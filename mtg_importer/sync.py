@@ -0,0 +1,44 @@
+import hashlib, json
+from typing import Dict, Any, Mapping, Optional
+from .record import CardRecord
+
+SYNC_HASH_PROP = "Sync Hash"
+_TYPES = ("title", "rich_text", "select", "multi_select", "number", "url", "date", "files")
+
+
+def record_hash(rec: Mapping[str, Any], title_text: str) -> str:
+    """Stable digest of a normalized record plus the title it will be written under."""
+    plain = rec.as_dict() if isinstance(rec, CardRecord) else dict(rec)
+    blob = json.dumps({"rec": plain, "title": title_text}, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:32]
+
+
+def plain_value(prop: Optional[Dict[str, Any]]) -> Any:
+    """Reduce a Notion property value (API result or our own payload) to something comparable."""
+    prop = prop or {}
+    t = prop.get("type") or next((k for k in _TYPES if k in prop), None)
+    v = prop.get(t) if t else None
+    if t in ("title", "rich_text"):
+        return "".join([seg.get("plain_text") or (seg.get("text") or {}).get("content") or "" for seg in (v or [])])
+    if t == "select":
+        return (v or {}).get("name")
+    if t == "multi_select":
+        return sorted([x.get("name") for x in (v or [])])
+    if t == "number":
+        return float(v) if v is not None else None
+    if t == "date":
+        return (v or {}).get("start")
+    if t == "files":
+        return [f.get("name") for f in (v or [])]
+    return v
+
+
+def plain_props(properties: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {k: plain_value(v) for k, v in (properties or {}).items()}
+
+
+def diff_props(props: Dict[str, Any], current: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Only the properties whose encoded value differs from the page's current value."""
+    if current is None:
+        return dict(props)
+    return {k: v for k, v in props.items() if k not in current or plain_value(v) != current[k]}
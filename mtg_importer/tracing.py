@@ -0,0 +1,191 @@
+import contextlib, contextvars, heapq, json, pathlib, threading, time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+CARDS_PID, THREADS_PID = 1, 2
+_lane: contextvars.ContextVar = contextvars.ContextVar("mtg_trace_lane", default=None)
+_owner: contextvars.ContextVar = contextvars.ContextVar("mtg_trace_owner", default=None)  # enclosing lane's name
+_active: Optional["Tracer"] = None
+
+
+class _NoSpan:
+    """Shared stand-in returned while tracing is off."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL = _NoSpan()
+
+
+def span(name: str, cat: str = "", min_us: float = 0, **args):
+    """Record the enclosed block as a complete event on the current lane.
+
+    Spans shorter than `min_us` are dropped (e.g. rate-limit waits that did not
+    wait). A no-op singleton while no trace is being recorded."""
+    t = _active
+    return _NULL if t is None else _Span(t, name, cat, min_us, args)
+
+
+def lane(name: str, cat: str = "card", **args):
+    """Like `span`, but the block (and every span inside it, in any thread or task
+    that inherits the context) gets a lane of its own, reused once it ends."""
+    t = _active
+    return _NULL if t is None else _Lane(t, name, cat, 0, args)
+
+
+def active() -> Optional["Tracer"]:
+    return _active
+
+
+class _Span:
+    __slots__ = ("t", "name", "cat", "min_us", "args", "lane", "start")
+
+    def __init__(self, t: "Tracer", name: str, cat: str, min_us: float, args: Dict[str, Any]):
+        self.t, self.name, self.cat, self.min_us, self.args = t, name, cat, min_us, args
+
+    def set(self, **args):
+        self.args.update(args)
+
+    def __enter__(self):
+        self.lane = self.t.current_lane()
+        self.start = self.t.now()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.t.add(self.name, self.cat, self.lane, self.start, self.t.now(), self.args, self.min_us)
+        return False
+
+
+class _Lane(_Span):
+    __slots__ = ("token", "owner")
+
+    def __enter__(self):
+        parent = _owner.get()
+        if parent is not None:
+            self.args.setdefault("parent", parent)
+        self.lane = self.t.acquire_lane()
+        self.token = _lane.set(self.lane)
+        self.owner = _owner.set(self.name)
+        self.start = self.t.now()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        super().__exit__(exc_type, exc, tb)
+        _owner.reset(self.owner)
+        _lane.reset(self.token)
+        self.t.release_lane(self.lane)
+        return False
+
+
+class Tracer:
+    """Collects complete ("X") events in the Chrome trace event format.
+
+    Cards run on numbered lanes under a "cards" process: a lane is taken when a card
+    starts and freed when it ends, so lane count equals peak concurrency and each
+    row reads as a waterfall of the cards that ran in that slot. Spans outside any
+    card land on a per-thread lane under "threads"."""
+
+    def __init__(self):
+        self.t0 = time.perf_counter_ns()
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._free: List[int] = []
+        self._next = 1
+        self._threads: Dict[int, Tuple[int, int]] = {}
+        self._names: Dict[Tuple[int, int], str] = {}
+
+    def now(self) -> float:
+        return (time.perf_counter_ns() - self.t0) / 1000  # µs
+
+    def current_lane(self) -> Tuple[int, int]:
+        lane = _lane.get()
+        if lane is not None:
+            return lane
+        ident = threading.get_ident()
+        lane = self._threads.get(ident)
+        if lane is None:
+            with self._lock:
+                lane = self._threads[ident] = (THREADS_PID, len(self._threads) + 1)
+                self._names[lane] = threading.current_thread().name
+        return lane
+
+    def acquire_lane(self) -> Tuple[int, int]:
+        with self._lock:
+            if self._free:
+                n = heapq.heappop(self._free)
+            else:
+                n, self._next = self._next, self._next + 1
+                self._names[(CARDS_PID, n)] = f"lane {n}"
+        return CARDS_PID, n
+
+    def release_lane(self, lane: Tuple[int, int]):
+        with self._lock:
+            heapq.heappush(self._free, lane[1])
+
+    def add(self, name: str, cat: str, lane: Tuple[int, int], start: float, end: float,
+            args: Optional[Dict[str, Any]] = None, min_us: float = 0):
+        dur = end - start
+        if dur < min_us:
+            return
+        ev = {"name": name, "cat": cat or "run", "ph": "X", "ts": round(start, 1), "dur": round(dur, 1),
+              "pid": lane[0], "tid": lane[1]}
+        if args:
+            ev["args"] = args
+        with self._lock:
+            self.events.append(ev)
+
+    def trace(self) -> Dict[str, Any]:
+        meta: List[Dict[str, Any]] = [
+            {"name": "process_name", "ph": "M", "pid": CARDS_PID, "tid": 0, "args": {"name": "cards"}},
+            {"name": "process_name", "ph": "M", "pid": THREADS_PID, "tid": 0, "args": {"name": "threads"}}]
+        with self._lock:
+            for (pid, tid), name in sorted(self._names.items()):
+                meta.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}})
+                meta.append({"name": "thread_sort_index", "ph": "M", "pid": pid, "tid": tid, "args": {"sort_index": tid}})
+            events = sorted(self.events, key=lambda e: e["ts"])
+        return {"traceEvents": meta + events, "displayTimeUnit": "ms"}
+
+    def dumps(self) -> str:
+        return json.dumps(self.trace(), separators=(",", ":"))
+
+    def save(self, path: str):
+        p = pathlib.Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(self.dumps(), encoding="utf-8")
+
+
+def start() -> Tracer:
+    global _active
+    _active = Tracer()
+    return _active
+
+
+def stop() -> Optional[Tracer]:
+    global _active
+    t, _active = _active, None
+    return t
+
+
+@contextlib.contextmanager
+def session(path: Optional[str], log=print) -> Iterator[Optional[Tracer]]:
+    """Record spans inside the block and write them to `path` as a Chrome/Perfetto trace.
+
+    A falsy `path` leaves tracing off."""
+    if not path:
+        yield None
+        return
+    t = start()
+    try:
+        yield t
+    finally:
+        stop()
+        t.save(path)
+        log("Trace with", len(t.events), "spans written to", path, "(open in https://ui.perfetto.dev)")
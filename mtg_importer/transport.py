@@ -0,0 +1,146 @@
+import random, threading, time
+from typing import Dict, Optional, FrozenSet
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from . import metrics, tracing
+from .ratelimit import RateLimiter, retry_after_seconds
+
+RETRY_STATUSES: FrozenSet[int] = frozenset({429, 500, 502, 503, 504})
+RETRY_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError, requests.exceptions.Timeout)
+IDEMPOTENT_METHODS: FrozenSet[str] = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "PATCH", "DELETE"})
+
+
+def unsent(exc: BaseException) -> bool:
+    """True for errors raised before the request reached the server (safe to resend anything).
+
+    Only a failed connect qualifies; a connection aborted or reset mid-request
+    (`ProtocolError`, `RemoteDisconnected`) may come after the server read the body."""
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    cause = exc.args[0] if exc.args else None
+    return isinstance(cause, MaxRetryError) and isinstance(cause.reason, NewConnectionError)
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter; `Retry-After` wins when present."""
+
+    def __init__(self, max_attempts: int = 5, base: float = 0.5, cap: float = 30.0,
+                 statuses: FrozenSet[int] = RETRY_STATUSES):
+        self.max_attempts = max_attempts
+        self.base = base
+        self.cap = cap
+        self.statuses = statuses
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after is not None:
+            return min(self.cap, retry_after_seconds(retry_after, default=self.base))
+        return random.uniform(0, min(self.cap, self.base * (2 ** attempt)))
+
+
+class Transport:
+    """One pooled keep-alive `requests.Session` per host, shared by Scryfall and Notion calls."""
+
+    def __init__(self, pool_size: int = 10, policy: Optional[RetryPolicy] = None):
+        self.pool_size = pool_size
+        self.policy = policy or RetryPolicy()
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def session(self, url: str) -> requests.Session:
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            s = self._sessions.get(host)
+            if s is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                s.mount(host, adapter)
+                self._sessions[host] = s
+            return s
+
+    def request(self, method: str, url: str, limiter: Optional[RateLimiter] = None, endpoint: Optional[str] = None,
+                idempotent: Optional[bool] = None, **kw) -> requests.Response:
+        """Send a request, retrying 429/5xx responses and dropped connections.
+
+        Non-idempotent requests (POST unless `idempotent=True`, e.g. for queries) are
+        only resent after a 429 or an error raised before sending: a 5xx or a read
+        timeout may mean the page or upload was already created. `data` may be a
+        zero-argument callable returning a fresh (streaming) body, so generator and
+        file-like uploads can be replayed on retry. Every attempt is recorded in the
+        shared metrics under `endpoint` (default: method + route)."""
+        kw.setdefault("timeout", 60)
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        s = self.session(url)
+        m = metrics.get_metrics()
+        host, ep = metrics.endpoint(method, url)
+        ep = endpoint or ep
+        attempts = self.policy.max_attempts
+        throttled: Dict[str, object] = {}  # set after a 429: the next acquire() is that retry's backoff
+        for attempt in range(attempts):
+            last = attempt + 1 >= attempts
+            if limiter:
+                with tracing.span("retry" if throttled else "rate limit", cat="wait", min_us=0 if throttled else 1000,
+                                  **throttled):
+                    limiter.acquire()
+                throttled = {}
+            send = kw
+            if callable(kw.get("data")):  # body factory: fresh stream per attempt
+                send = dict(kw, data=kw["data"]())
+            t0 = time.perf_counter()
+            try:
+                r = s.request(method, url, **send)
+            except RETRY_ERRORS as e:
+                m.observe(host, ep, "error", time.perf_counter() - t0)
+                if last or not (idempotent or unsent(e)): raise
+                m.retry(host, ep, "error")
+                with tracing.span("retry", cat="wait", endpoint=ep, reason="error", attempt=attempt + 1):
+                    time.sleep(self.policy.delay(attempt))
+                continue
+            m.observe(host, ep, r.status_code, time.perf_counter() - t0)
+            if r.status_code not in self.policy.statuses or last or not (idempotent or r.status_code == 429):
+                if limiter and r.status_code < 400: limiter.on_success()
+                return r
+            m.retry(host, ep, "429" if r.status_code == 429 else "5xx")
+            wait = self.policy.delay(attempt, r.headers.get("Retry-After"))
+            r.close()
+            if limiter and r.status_code == 429:
+                limiter.on_throttle(wait)  # acquire() honours the pause
+                throttled = {"endpoint": ep, "reason": "429", "attempt": attempt + 1}
+            else:
+                with tracing.span("retry", cat="wait", endpoint=ep, reason=str(r.status_code), attempt=attempt + 1):
+                    time.sleep(wait)
+        return r
+
+    def close(self):
+        with self._lock:
+            for s in self._sessions.values():
+                s.close()
+            self._sessions.clear()
+
+
+_default: Optional[Transport] = None
+_default_lock = threading.Lock()
+
+
+def get_transport() -> Transport:
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Transport()
+        return _default
+
+
+def configure(pool_size: Optional[int] = None, policy: Optional[RetryPolicy] = None) -> Transport:
+    """Replace the shared transport (e.g. to size the pool for --workers)."""
+    global _default
+    with _default_lock:
+        old = _default
+        _default = Transport(pool_size=pool_size or (old.pool_size if old else 10),
+                             policy=policy or (old.policy if old else None))
+    if old: old.close()
+    return _default
@@ -0,0 +1,64 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from .profiling import stage
+from .schema import codec
+from .sync import SYNC_HASH_PROP, plain_props, record_hash
+from .util import format_title
+
+
+class Plan(NamedTuple):
+    """What one upsert has to do; the engines only perform the I/O it describes."""
+    outcome: str                               # "created" | "updated" | "skipped"
+    title_text: str
+    props: Optional[Dict[str, Any]] = None     # delta to PATCH, or the full create payload
+    digest: Optional[str] = None               # Sync Hash the page will carry after a PATCH
+    images_due: bool = False                   # upload (or queue) the record's images
+    preview: Optional[str] = None              # dry-run line
+
+
+def plan_upsert(notion, title_prop: str, existing: Optional[Dict[str, Any]], key: str, rec, args,
+                encode: bool = True) -> Plan:
+    """Skip, patch or create `rec` against its page index entry `existing` (None: no page yet).
+
+    Without `encode`, create plans leave `props` for the caller to fill (see `plan_page`)."""
+    title_text = rec.get("title_override") or format_title(rec["oracle_raw"], rec["ff_raw"], args.title_style)
+    if existing:
+        digest = record_hash(rec, title_text)
+        if existing.get("sync_hash") == digest:
+            return Plan("skipped", title_text)
+        with stage("props"):
+            delta = codec(title_prop).delta(rec, title_text, existing.get("props"), digest)
+        if args.dry_run:
+            return Plan("updated", title_text, delta, digest,
+                        preview=f'UPDATE {key}: "{title_text}" | changed={sorted(k for k in delta if k != SYNC_HASH_PROP)}')
+        images_due = not notion.images_unchanged(rec.get("image_urls"), (existing.get("props") or {}).get("Image"))
+        return Plan("updated", title_text, delta, digest, images_due)
+    if args.dry_run:
+        return Plan("created", title_text, preview=f'CREATE {key}: "{title_text}" | methods={list(rec.get("procurement") or ())}')
+    props = None
+    if encode:
+        with stage("props"):
+            props = codec(title_prop).create(rec, title_text)
+    return Plan("created", title_text, props, images_due=bool(rec.get("image_urls")))
+
+
+def plan_page(notion, title_prop: str, index: Dict[str, Dict[str, Any]], items: List[Tuple[str, Any]], args) -> List[Plan]:
+    """`plan_upsert` for each (key, record) of a page; new cards' payloads come from one `Codec.create_batch`."""
+    plans = [plan_upsert(notion, title_prop, index.get(rec["id"]), key, rec, args, encode=False) for key, rec in items]
+    todo = [i for i, p in enumerate(plans) if p.outcome == "created" and not args.dry_run]
+    if todo:
+        with stage("props"):
+            payloads = codec(title_prop).create_batch([(items[i][1], plans[i].title_text) for i in todo])
+        for i, props in zip(todo, payloads):
+            plans[i] = plans[i]._replace(props=props)
+    return plans
+
+
+def settle(plan: Plan, index: Dict[str, Dict[str, Any]], rec, page_id: Optional[str]):
+    """Record a written plan in the page index, so later lookups and deltas see the page as it now is."""
+    if plan.outcome == "created":
+        index[rec["id"]] = {"id": page_id}
+        return
+    existing = index[rec["id"]]
+    existing["sync_hash"] = plan.digest
+    if existing.get("props") is not None:
+        existing["props"].update(plain_props(plan.props))
@@ -1,4 +1,7 @@
-import re
+import os, pathlib, re, time
+
+def timestamp() -> str:
+    return time.strftime("[%Y-%m-%d %H:%M:%S]")
 
 def mask_token(tok: str) -> str:
     if not tok:
@@ -30,3 +33,10 @@ def cn_sort(cn: str):
     if m2:
         return base + (ord(m2.group(1)) - 96) / 10.0
     return float(base)
+
+def cache_dir(*parts: str) -> pathlib.Path:
+    """Local cache root (override with MTG_IMPORTER_CACHE); created on demand."""
+    root = pathlib.Path(os.environ.get("MTG_IMPORTER_CACHE") or pathlib.Path.home() / ".cache" / "mtg-importer")
+    p = root.joinpath(*parts)
+    p.mkdir(parents=True, exist_ok=True)
+    return p
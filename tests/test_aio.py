@@ -0,0 +1,65 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from mtg_importer import aio, cli, notion_api, scry, transport
+from mtg_importer.mockapi import MockNotion, MockScryfall, _stored
+from mtg_importer.notion_api import NotionClient
+from mtg_importer.sync import SYNC_HASH_PROP
+
+from test_normalization_mapping import _sample_card
+
+pytest.importorskip("aiohttp")
+
+
+def _totals(out):
+    words = out.split("--- TOTALS ---")[1].split()
+    return {words[i].rstrip("="): int(words[i + 1]) for i in range(0, 8, 2)}
+
+
+def _import_twice(engine, tmp_path, monkeypatch, capsys):
+    """Import a two-page set, touch some pages' Sync Hash, import again; (totals per pass, Notion mix, Scryfall mix)."""
+    monkeypatch.setenv("MTG_IMPORTER_CACHE", str(tmp_path / engine))
+    argv = ["import", "--sets", "aaa", "--db-title", "Engines", "--parent", "mock-parent", "--token", "secret_mock",
+            "--no-overrides", "--images", "deferred", "--rate", "1000", "--engine", engine]
+    with MockNotion() as notion, MockScryfall(cards_per_set=180) as scryfall:
+        monkeypatch.setattr(notion_api, "NOTION", notion.url)
+        monkeypatch.setattr(scry, "SCRY", scryfall.url)
+        try:
+            cli.main(argv)
+            first = _totals(capsys.readouterr().out)
+            for page in list(notion.pages.values())[::30]:
+                page["properties"][SYNC_HASH_PROP] = _stored({"rich_text": []})
+            cli.main(argv)
+            second = _totals(capsys.readouterr().out)
+        finally:
+            transport.configure()
+    return [first, second], notion.requests, scryfall.requests
+
+
+def test_async_engine_matches_sync(tmp_path, monkeypatch, capsys):
+    sync = _import_twice("sync", tmp_path, monkeypatch, capsys)
+    aio = _import_twice("async", tmp_path, monkeypatch, capsys)
+    assert sync[0] == aio[0]
+    assert sync[0][0]["created"] == 180 and sync[0][1]["updated"] == 6 and sync[0][1]["skipped"] == 174
+    assert sync[1] == aio[1] and sync[2] == aio[2]
+    assert sum(aio[2].values()) == 2  # two pages, and the second run reads them from the cache
+
+
+def test_patch_of_an_archived_page_recreates_it(monkeypatch):
+    args = SimpleNamespace(title_style="Oracle — FF", dry_run=False)
+    rec = scry.normalize(dict(_sample_card(), image_uris={}))
+    with MockNotion() as mock:
+        monkeypatch.setattr(notion_api, "NOTION", mock.url)
+        notion = NotionClient("tok")
+        old = notion.create_card_page("db1", {})
+        mock.pages[old]["archived"] = True
+        index = {rec["id"]: {"id": old, "sync_hash": "stale", "props": {}}}
+
+        async def go():
+            async with aio.AsyncHTTP() as http:
+                return await aio.upsert_card(aio.AsyncNotion(http, notion.h), notion, "db1", "Name", index, "TST-123", rec, args)
+
+        assert asyncio.run(go()) == ("created", None)
+        assert index[rec["id"]]["id"] != old and mock.pages[index[rec["id"]]["id"]]["db"] == "db1"
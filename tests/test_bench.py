@@ -0,0 +1,25 @@
+from mtg_importer.bench import CASES, compare, retained, synthetic_cards
+
+
+def test_synthetic_corpus_is_deterministic_and_mixed():
+    cards = synthetic_cards(300)
+    assert cards == synthetic_cards(300)
+    layouts = {c["layout"] for c in cards}
+    assert {"normal", "transform", "split"} <= layouts
+    assert any("image_uris" not in c and len(c["card_faces"]) == 2 for c in cards)
+
+
+def test_every_case_runs_on_a_small_corpus():
+    cards = synthetic_cards(50)
+    for name, case in CASES.items():
+        assert len(case(cards)()) == 50, name
+
+
+def test_compare_flags_only_slowdowns_beyond_threshold():
+    base = {"units": {"a@1k": 1.0, "b@1k": 1.0, "c@1k": 1.0}}
+    cur = {"units": {"a@1k": 1.1, "b@1k": 1.5, "c@1k": 0.5, "new@1k": 9.0}}
+    assert compare(cur, base, 0.25) == [("b@1k", 1.5)]
+
+
+def test_retained_counts_what_the_result_holds():
+    assert 1000 <= retained(lambda: [bytearray(1000) for _ in range(10)], 10) < 1200
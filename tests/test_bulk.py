@@ -0,0 +1,37 @@
+import json
+
+from mtg_importer import bulk
+
+
+def _write(tmp_path, cards, indent=None):
+    p = tmp_path / "default-cards.json"
+    p.write_text(json.dumps(cards, indent=indent), encoding="utf-8")
+    return p
+
+
+def test_iter_cards_streams_small_chunks(tmp_path):
+    cards = [{"id": str(i), "set": "fin" if i % 2 else "fca", "name": "Cloud {x}"} for i in range(50)]
+    p = _write(tmp_path, cards, indent=1)
+    assert list(bulk.iter_cards(p, chunk_size=37)) == cards
+
+
+def test_fetch_sets_groups_requested_codes(tmp_path):
+    cards = [{"id": "a", "set": "fin"}, {"id": "b", "set": "fic"}, {"id": "c", "set": "FIN"}, {"id": "d", "set": "xyz"}]
+    out = bulk.fetch_sets(["FIN", "fic", "fca"], path=_write(tmp_path, cards))
+    assert [c["id"] for c in out["fin"]] == ["a", "c"]
+    assert [c["id"] for c in out["fic"]] == ["b"]
+    assert out["fca"] == []
+
+
+def test_sidecar_index_random_access(tmp_path):
+    cards = [{"id": f"id-{i}", "set": ["fin", "fic", "fin"][i % 3], "name": f"Tidus — {i}"} for i in range(30)]
+    p = tmp_path / "default-cards.json"
+    p.write_text("[\n" + ",\n".join(json.dumps(c, ensure_ascii=False) for c in cards) + "\n]", encoding="utf-8")
+    idx = bulk.load_index(p)
+    assert (tmp_path / "default-cards.json.idx").exists()
+    assert len(idx["ids"]) == 30
+    out = bulk.read_sets(["fic", "fin"], p, idx)
+    assert out["fic"] == [c for c in cards if c["set"] == "fic"]
+    assert out["fin"] == [c for c in cards if c["set"] == "fin"]
+    assert bulk.get_card("id-7", p)["name"] == "Tidus — 7"
+    assert bulk.get_card("missing", p) is None
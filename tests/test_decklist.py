@@ -0,0 +1,58 @@
+from mtg_importer import scry
+from mtg_importer.decklist import identifier, parse_list
+
+
+def test_parse_decklist_formats():
+    text = """Commander
+1 Atraxa, Praetors' Voice
+1x Sol Ring (C21) 263 *F*
+// ramp
+SB: 2 Fire // Ice (MH2)
+Island
+"""
+    entries = parse_list(text)
+    assert [e["name"] for e in entries] == ["Atraxa, Praetors' Voice", "Sol Ring", "Fire // Ice", "Island"]
+    assert entries[1] == {"name": "Sol Ring", "set": "c21", "collector_number": "263", "qty": "1"}
+    assert entries[2]["qty"] == "2" and entries[2]["set"] == "mh2"
+    assert [identifier(e) for e in entries[1:3]] == [{"set": "c21", "collector_number": "263"},
+                                                      {"name": "Fire // Ice", "set": "mh2"}]
+
+
+def test_parse_csv_aliases():
+    text = "Quantity,Card Name,Set Code,Collector Number\n4,Lightning Bolt,m10,146\n1,Counterspell,,\n"
+    entries = parse_list(text, csv_format=True)
+    assert entries == [{"name": "Lightning Bolt", "set": "m10", "collector_number": "146", "qty": "4"},
+                       {"name": "Counterspell", "set": "", "collector_number": "", "qty": "1"}]
+
+
+class _Resp:
+    def __init__(self, payload):
+        self._payload = payload
+    def raise_for_status(self):
+        pass
+    def json(self):
+        return self._payload
+
+
+class _Transport:
+    def __init__(self):
+        self.bodies = []
+    def request(self, method, url, json=None, **kw):
+        assert method == "POST" and url.endswith("/cards/collection")
+        self.bodies.append(json["identifiers"])
+        found = [{"id": f'id-{i["name"]}', "name": i["name"]} for i in json["identifiers"] if not i["name"].startswith("Bogus")]
+        return _Resp({"data": found, "not_found": [i for i in json["identifiers"] if i["name"].startswith("Bogus")]})
+
+
+def test_fetch_collection_batches_and_memoizes_misses(monkeypatch):
+    t = _Transport()
+    monkeypatch.setattr(scry, "get_transport", lambda: t)
+    monkeypatch.setattr(scry, "_collection_memo", scry.OrderedDict())
+    idents = [{"name": f"Card {n}"} for n in range(99)] + [{"name": "Bogus"}]
+    cards = scry.fetch_collection(idents)
+    assert [len(b) for b in t.bodies] == [75, 25]
+    assert cards[0]["id"] == "id-Card 0" and cards[98]["id"] == "id-Card 98" and cards[99] is None
+
+    again = scry.fetch_collection([{"name": "card 5"}, {"name": "Bogus"}, {"name": "Card 100"}])
+    assert again[0]["id"] == "id-Card 5" and again[1] is None
+    assert t.bodies[-1] == [{"name": "Card 100"}]  # hits and the known miss cost no request
@@ -0,0 +1,68 @@
+import time
+
+import requests
+
+from mtg_importer import scry
+from mtg_importer.httpcache import DiskCache
+
+
+def _resp(status, body=b"", headers=None):
+    r = requests.Response()
+    r.status_code = status
+    r._content = body
+    r.url = "https://api.scryfall.com/cards/search"
+    r.headers.update(headers or {})
+    return r
+
+
+class _Transport:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+    def request(self, method, url, **kw):
+        self.calls.append(kw.get("headers"))
+        return self.responses.pop(0)
+
+
+def test_cached_then_revalidated(tmp_path, monkeypatch):
+    t = _Transport(_resp(200, b'{"data": [1]}', {"ETag": '"v1"'}), _resp(304))
+    monkeypatch.setattr(scry, "get_transport", lambda: t)
+    cache = scry.configure_cache(root=str(tmp_path), ttl=60)
+    try:
+        assert scry._get("https://api.scryfall.com/cards/search", q="set:fin").json() == {"data": [1]}
+        assert scry._get("https://api.scryfall.com/cards/search", q="set:fin").json() == {"data": [1]}
+        assert len(t.calls) == 1
+        cache.ttl = 0
+        r = scry._get("https://api.scryfall.com/cards/search", q="set:fin")
+        assert r.json() == {"data": [1]}
+        assert t.calls[-1] == {"If-None-Match": '"v1"'}
+    finally:
+        scry.configure_cache(enabled=False)
+
+
+def test_lru_eviction(tmp_path):
+    cache = DiskCache(root=tmp_path)
+    cache.put("probe", _resp(200, bytes(range(256)) * 4))
+    entry = (tmp_path / "probe.gz").stat().st_size + 512
+    cache.clear()
+    cache.max_bytes = entry * 5
+    for i in range(5):
+        cache.put(str(i), _resp(200, bytes(range(256)) * 4))
+        time.sleep(0.01)
+    cache.get("0")  # touch: most recently used now
+    cache.put("5", _resp(200, bytes(range(256)) * 4))
+    left = {p.stem for p in tmp_path.glob("*.gz")}
+    assert "0" in left and "5" in left and "1" not in left
+
+
+def test_puts_under_the_cap_do_not_rescan(tmp_path):
+    cache = DiskCache(root=tmp_path, max_bytes=1 << 20)
+    scans = []
+    evict = cache.evict
+    cache.evict = lambda: (scans.append(1), evict())
+    for i in range(20):
+        cache.put(str(i), _resp(200, bytes(range(256)) * 4))
+    assert len(scans) == 1  # the first put learns the size on disk, later ones keep a running total
+    cache.max_bytes = cache._total - 1
+    cache.put("0", _resp(200, bytes(range(256)) * 4))  # overwrite: counted once, and now over the cap
+    assert len(scans) == 2 and len(list(tmp_path.glob("*.gz"))) == 19
@@ -0,0 +1,135 @@
+from mtg_importer.images import ImageStore, upload_name
+from mtg_importer.notion_api import NotionClient
+
+
+class _Resp:
+    def __init__(self, content=b"", payload=None):
+        self.content = content
+        self.status_code = 200
+        self._payload = payload or {}
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+    def iter_content(self, n):
+        for i in range(0, len(self.content), n):
+            yield self.content[i:i + n]
+    def raise_for_status(self):
+        pass
+    def json(self):
+        return self._payload
+
+
+def _read_body(data):
+    body = data()
+    raw = body.read() if hasattr(body, "read") else b"".join(body)
+    name = raw.split(b'filename="')[1].split(b'"')[0].decode()
+    content = raw.split(b"\r\n\r\n", 1)[1].rsplit(b"\r\n--", 1)[0]
+    if hasattr(body, "len"):
+        assert body.len == len(raw)
+    return name, content
+
+
+class _Transport:
+    def __init__(self):
+        self.downloads = self.uploads = 0
+        self.bodies = []
+    def request(self, method, url, limiter=None, **kw):
+        if method == "GET":
+            self.downloads += 1
+            return _Resp(content=b"art:" + url.encode())
+        self.uploads += 1
+        name, content = _read_body(kw["data"])
+        self.bodies.append(content)
+        return _Resp(payload={"file": {"name": name, "url": f"https://files/{name}", "expiry_time": None}})
+
+
+def test_unchanged_art_is_not_transferred_again(tmp_path):
+    t = _Transport()
+    notion = NotionClient("tok", transport=t, images=ImageStore(tmp_path))
+    first = notion.upload_images(["https://img/a.png", "https://img/b.png"])
+    assert (t.downloads, t.uploads) == (2, 2)
+
+    again = NotionClient("tok", transport=t, images=ImageStore(tmp_path))
+    assert again.images.urls == {}  # manifest only flushed on save()
+    notion.images.save()
+    again = NotionClient("tok", transport=t, images=ImageStore(tmp_path))
+    assert again.upload_images(["https://img/a.png", "https://img/b.png"]) == first
+    assert (t.downloads, t.uploads) == (2, 2)
+    assert again.images_unchanged(["https://img/a.png", "https://img/b.png"], [f["name"] for f in first])
+    assert first[0]["name"] == upload_name(again.images.sha_for("https://img/a.png"), "png")
+
+
+def test_expired_reference_reuploads_from_local_blob(tmp_path):
+    t = _Transport()
+    notion = NotionClient("tok", transport=t, images=ImageStore(tmp_path))
+    notion.upload_images(["https://img/a.png"])
+    sha = notion.images.sha_for("https://img/a.png")
+    notion.images.uploads[sha]["file"]["expiry_time"] = "2000-01-01T00:00:00.000Z"
+    notion.upload_images(["https://img/a.png"])
+    assert (t.downloads, t.uploads) == (1, 2)
+
+
+def test_streamed_upload_without_store_pipes_download():
+    t = _Transport()
+    notion = NotionClient("tok", transport=t, chunk_size=4)
+    files = notion.upload_images(["https://img/front.png", "https://img/back.png"])
+    assert [f["name"] for f in files] == ["image_0.png", "image_1.png"]
+    assert sorted(t.bodies) == [b"art:https://img/back.png", b"art:https://img/front.png"]
+
+
+def test_byte_budget_blocks_until_released():
+    import threading
+    from mtg_importer.images import ByteBudget
+    budget, order = ByteBudget(10), []
+    with budget.reserve(8):
+        th = threading.Thread(target=lambda: budget.reserve(8).__enter__() or order.append("second"))
+        th.start()
+        th.join(0.05)
+        order.append("first")
+    th.join(1)
+    assert order == ["first", "second"]
+
+
+def test_backfill_queue_claims_and_requeues(tmp_path):
+    from mtg_importer.images import ImageQueue
+    q = ImageQueue(tmp_path / "backfill.jsonl")
+    q.push("p1", ["https://img/a.png"], "FIN-1")
+    q.push("p2", ["https://img/b.png"], "FIN-2")
+    q.push("p1", ["https://img/a2.png"], "FIN-1")
+    items = q.take()
+    assert [(it["page_id"], it["urls"]) for it in items] == [("p2", ["https://img/b.png"]), ("p1", ["https://img/a2.png"])]
+    q.push("p3", ["https://img/c.png"])  # written by a concurrent import
+    assert ImageQueue(tmp_path / "backfill.jsonl").take() == items + [{"page_id": "p3", "key": "", "urls": ["https://img/c.png"]}]
+    q.done()
+    assert q.take() == []
+
+
+def test_transcoded_variant_is_cached_separately(tmp_path):
+    import io
+    import pytest
+    PIL = pytest.importorskip("PIL.Image")
+    from mtg_importer.images import Transcoder
+
+    buf = io.BytesIO()
+    PIL.new("RGBA", (600, 840), (200, 10, 10, 255)).save(buf, format="PNG")
+    png = buf.getvalue()
+
+    class _PngTransport(_Transport):
+        def request(self, method, url, limiter=None, **kw):
+            if method == "GET":
+                self.downloads += 1
+                return _Resp(content=png)
+            return super().request(method, url, limiter, **kw)
+
+    t = _PngTransport()
+    notion = NotionClient("tok", transport=t, images=ImageStore(tmp_path), transcoder=Transcoder("jpeg", 70, 300))
+    ref = notion.upload_images(["https://img/a.png"])[0]
+    assert ref["name"].endswith(".jpg")
+    out = PIL.open(io.BytesIO(t.bodies[0]))
+    assert (out.format, out.size) == ("JPEG", (300, 420))
+    assert len(t.bodies[0]) < len(png)
+
+    plain = NotionClient("tok", transport=t, images=ImageStore(tmp_path))
+    plain.images.urls.update(notion.images.urls)
+    assert plain.images.sha_for("https://img/a.png") is None  # untranscoded variant not cached yet
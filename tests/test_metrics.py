@@ -0,0 +1,47 @@
+import json
+
+from mtg_importer import metrics
+from mtg_importer.loadtest import run_load
+from mtg_importer.mockapi import Faults
+from mtg_importer.metrics import Metrics, endpoint
+
+
+def test_endpoint_collapses_ids():
+    assert endpoint("PATCH", "https://api.notion.com/v1/pages/0f2c6f4e-5b7a-4a53-9a0e-2f0c1d2e3f40") == \
+        ("api.notion.com", "PATCH /v1/pages/{id}")
+    assert endpoint("GET", "https://api.scryfall.com/cards/search?q=set:fin") == ("api.scryfall.com", "GET /cards/search")
+
+
+def test_histogram_and_textfile(tmp_path):
+    m = Metrics()
+    for seconds, status in ((0.02, 200), (0.3, 429), (0.3, 200), (45.0, "error")):
+        m.observe("api.notion.com", "POST /v1/pages", status, seconds)
+    m.retry("api.notion.com", "POST /v1/pages", "429")
+    m.add_bytes("upload", 1234)
+    m.set_run(created=3, failed=1, duration_seconds=2.0)
+    e = m.snapshot()["endpoints"][0]
+    assert (e["requests"], e["throttled"], e["errors"], e["retries"]) == (4, 1, 1, 1)
+    assert e["latency"]["buckets"]["0.05"] == 1 and e["latency"]["buckets"]["0.5"] == 3 and e["latency"]["buckets"]["+Inf"] == 4
+
+    m.write(str(tmp_path / "run.prom"))
+    text = (tmp_path / "run.prom").read_text()
+    assert 'mtg_importer_http_requests_total{host="api.notion.com",endpoint="POST /v1/pages",status="429"} 1' in text
+    assert 'mtg_importer_http_request_duration_seconds_bucket{host="api.notion.com",endpoint="POST /v1/pages",le="+Inf"} 4' in text
+    assert 'mtg_importer_image_bytes_total{direction="upload"} 1234' in text
+    assert 'mtg_importer_run_cards{outcome="skipped"} 0' in text
+    assert text.count("# TYPE mtg_importer_run_duration_seconds gauge") == 1
+
+
+def test_import_writes_metrics(tmp_path):
+    metrics.reset()
+    out = tmp_path / "metrics.json"
+    run_load(["aaa"], ["--metrics-out", str(out), "--metrics-out", str(tmp_path / "m.prom")], cards_per_set=10,
+             notion_faults=Faults(rate_429=0.2, retry_after=0.01, seed=3), image_bytes=2048)
+    report = json.loads(out.read_text())
+    assert report["run"]["created"] == 10 and report["run"]["failed"] == 0
+    eps = {e["endpoint"]: e for e in report["endpoints"]}
+    assert eps["POST /v1/pages"]["requests"] >= 10
+    assert sum(e["throttled"] for e in eps.values()) == sum(e["retries"] for e in eps.values()) > 0
+    assert report["image_bytes"]["download"] == report["image_bytes"]["upload"] > 0
+    assert "GET image" in eps and "GET /cards/search" in eps
+    assert (tmp_path / "m.prom").read_text().startswith("# HELP")
@@ -0,0 +1,21 @@
+import requests
+
+from mtg_importer.loadtest import run_load
+from mtg_importer.mockapi import Faults, MockScryfall
+
+
+def test_import_against_mocks_creates_then_skips(capsys):
+    results = run_load(["aaa", "bbb"], ["--images", "deferred"], cards_per_set=20, passes=2)
+    assert [r["pages"] for r in results] == [40, 40]
+    out = capsys.readouterr().out
+    assert "created= 40" in out and "skipped= 40" in out
+
+
+def test_injected_429_carries_retry_after():
+    with MockScryfall(Faults(rate_429=1.0, retry_after=2)) as scry:
+        r = requests.get(f"{scry.url}/cards/search", params={"q": "set:abc"}, timeout=5)
+        assert r.status_code == 429 and r.headers["Retry-After"] == "2"
+    with MockScryfall(cards_per_set=200) as scry:
+        page = requests.get(f"{scry.url}/cards/search", params={"q": "set:abc"}, timeout=5).json()
+        assert len(page["data"]) == 175 and page["has_more"]
+        assert requests.get(page["next_page"], timeout=5).json()["data"][0]["collector_number"] == "176"
@@ -0,0 +1,49 @@
+import json
+
+from mtg_importer import names
+from mtg_importer.names import NameIndex, load_name_index
+
+CARDS = [
+    {"name": "Lim-Dûl's Vault"},
+    {"name": "Jace, the Mind Sculptor"},
+    {"name": "Cloud, Midgar Mercenary", "printed_name": "Cloud, Ex-SOLDIER"},
+    {"name": "Fire // Ice", "card_faces": [{"name": "Fire"}, {"name": "Ice"}]},
+    {"name": "Lightning Bolt", "flavor_name": "Thunder Spear"},
+]
+
+
+def test_exact_typo_and_alt_names():
+    idx = NameIndex.from_cards(CARDS)
+    assert idx.resolve("lim duls vault") == "Lim-Dûl's Vault"
+    assert idx.resolve("jace the mind sculptr") == "Jace, the Mind Sculptor"
+    assert idx.resolve("Thunder Spear") == "Lightning Bolt"
+    assert idx.resolve("cloud ex soldier") == "Cloud, Midgar Mercenary"
+    assert idx.resolve("ice") == "Fire // Ice"
+    assert idx.resolve("completely unrelated") is None
+
+
+def test_persisted_index_rebuilds_when_bulk_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv("MTG_IMPORTER_CACHE", str(tmp_path))
+    monkeypatch.setattr(names, "_loaded", None)
+    assert load_name_index() is None  # no cached card data, no network
+    bulk_path = tmp_path / "bulk" / "default-cards.json"
+    bulk_path.write_text(json.dumps(CARDS[:2]), encoding="utf-8")
+    assert len(load_name_index()) == 2
+    assert names.index_path().exists()
+
+    monkeypatch.setattr(names, "_loaded", None)
+    assert load_name_index().resolve("jace mind sculptor") == "Jace, the Mind Sculptor"
+    bulk_path.write_text(json.dumps(CARDS), encoding="utf-8")
+    monkeypatch.setattr(names, "_loaded", None)
+    assert load_name_index().resolve("thunder spear") == "Lightning Bolt"
+
+
+def test_names_agree_with_normalize_and_load_skips_trigram_work(tmp_path, monkeypatch):
+    card = {"name": "Fire // Ice", "card_faces": [{"name": "Fire", "flavor_name": "Blaze"}, {"name": "Ice"}]}
+    assert names.card_names(card) == ["Fire // Ice", "Blaze", "Fire", "Ice"]  # alt name as scry.alt_name sees it
+    path = tmp_path / "names.json"
+    NameIndex.from_cards(CARDS + [card]).save(path)
+    with monkeypatch.context() as m:
+        m.setattr(names, "trigrams", lambda s: (_ for _ in ()).throw(AssertionError("rebuilt on load")))
+        idx = NameIndex.load(path)
+    assert idx.resolve("thundr spear") == "Lightning Bolt" and idx.resolve("blaze") == "Fire // Ice"
@@ -60,3 +60,11 @@ def test_property_mapping_includes_new_fields():
     props_u = build_props_for_update("Name", "Title", rec, _DummyNotion())
     assert props_u["Language"]["select"]["name"] == "en"
     assert props_u["Released At"]["date"]["start"] == "2023-01-01"
+
+
+def test_image_tier_preference_and_fallback():
+    card = _sample_card()
+    card["image_uris"] = {"png": "p.png", "large": "l.jpg", "small": "s.jpg"}
+    assert normalize(card)["image_urls"] == ["p.png"]
+    assert normalize(card, "small")["image_urls"] == ["s.jpg"]
+    assert normalize(card, "normal")["image_urls"] == ["s.jpg"]  # next smaller before larger
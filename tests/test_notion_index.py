@@ -0,0 +1,41 @@
+import pytest
+
+from mtg_importer import notion_api
+from mtg_importer.mockapi import MockNotion, _stored
+from mtg_importer.notion_api import NotionClient
+
+QUERY = ("POST", "v1/databases/{id}/query", 200)
+
+
+@pytest.fixture
+def mock(monkeypatch):
+    with MockNotion() as m:
+        monkeypatch.setattr(notion_api, "NOTION", m.url)
+        yield m
+
+
+def _seed(mock, db, n, blank=0):
+    """`n` pages with Card IDs card-0000.., then `blank` pages without one."""
+    for i in range(n + blank):
+        props = {"Card ID": _stored({"rich_text": [{"text": {"content": f"card-{i:04d}"}}] if i < n else []})}
+        mock.pages[f"page-{db}-{i}"] = {"db": db, "last_edited_time": "2025-01-01T00:00:00.000Z", "properties": props}
+
+
+def test_index_pages_through_every_cursor(mock):
+    db = "0f2c6f4e-5b7a-4a53-9a0e-2f0c1d2e3f40"
+    _seed(mock, db, 240, blank=10)
+    _seed(mock, "other-db", 5)
+    index = NotionClient("tok").index_by_card_id(db)
+    assert len(index) == 240 and "" not in index
+    assert index["card-0239"]["id"] == f"page-{db}-239"
+    assert mock.requests[QUERY] == 3  # 250 rows at 100 per page
+
+
+def test_query_by_card_ids_chunks_the_or_filter(mock):
+    db = "0f2c6f4e-5b7a-4a53-9a0e-2f0c1d2e3f40"
+    _seed(mock, db, 120)
+    wanted = [f"card-{i:04d}" for i in range(0, 120, 2)] + ["card-9999", "", "card-0000"]
+    found = NotionClient("tok").query_by_card_ids(db, wanted, chunk_size=25)
+    assert mock.requests[QUERY] == 3  # 61 distinct ids, 25 per request
+    assert set(found) == {f"card-{i:04d}" for i in range(0, 120, 2)}
+    assert "card-9999" not in found and found["card-0002"]["id"] == f"page-{db}-2"
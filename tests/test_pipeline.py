@@ -0,0 +1,32 @@
+import threading
+
+import pytest
+
+from mtg_importer.pipeline import Prefetcher
+
+
+def test_yields_in_order():
+    assert list(Prefetcher(iter(range(50)), depth=3)) == list(range(50))
+
+
+def test_producer_stays_bounded():
+    produced = []
+    def source():
+        for i in range(100):
+            produced.append(i)
+            yield i
+    it = iter(Prefetcher(source(), depth=2))
+    assert next(it) == 0
+    threading.Event().wait(0.05)
+    assert len(produced) <= 4  # one handed over + depth queued + one blocked in put
+    it.close()
+
+
+def test_producer_errors_reach_consumer():
+    def source():
+        yield "page-1"
+        raise RuntimeError("scryfall down")
+    it = iter(Prefetcher(source()))
+    assert next(it) == "page-1"
+    with pytest.raises(RuntimeError, match="scryfall down"):
+        next(it)
@@ -0,0 +1,43 @@
+import pstats
+import threading
+import time
+
+from mtg_importer import profiling
+from mtg_importer.profiling import session, stage
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_stage_is_a_shared_noop_without_session():
+    assert stage("normalize") is stage("write") is profiling._NULL
+
+
+def test_session_profiles_nested_stages_per_thread(tmp_path):
+    logged = []
+    with session(str(tmp_path), top=5, log=lambda *a: logged.append(" ".join(map(str, a)))) as prof:
+        with stage("props"):
+            _busy(0.02)
+            with stage("images"):
+                _busy(0.05)
+        t = threading.Thread(target=lambda: stage("normalize").__enter__().__exit__(None, None, None))
+        t.start(); t.join()
+    assert profiling._active is None
+    assert prof.calls == {"props": 1, "images": 1, "normalize": 1}
+    assert prof.wall["props"] >= 0.07 and prof.own["props"] < 0.05  # nested time is charged to images
+    assert (tmp_path / "props.pstats").exists() and (tmp_path / "images.pstats").exists()
+    funcs = {f[2] for f in pstats.Stats(str(tmp_path / "images.pstats")).stats}
+    assert "_busy" in funcs
+    assert "=== images: top 5 by cumulative time ===" in (tmp_path / "summary.txt").read_text()
+    assert any(line.startswith("images") for line in logged)
+
+
+def test_memory_tracing_reports_net_allocations(tmp_path):
+    with session(str(tmp_path), memory=True, log=lambda *a: None) as prof:
+        with stage("normalize"):
+            keep = [bytes(1024) for _ in range(256)]
+    assert prof.alloc["normalize"] >= 256 * 1024 and keep
+    assert "allocation sites during its first section" in (tmp_path / "summary.txt").read_text()
@@ -0,0 +1,56 @@
+import threading
+
+from mtg_importer.ratelimit import RateLimiter, retry_after_seconds
+
+
+class _Clock:
+    def __init__(self):
+        self.t = 0.0
+    def __call__(self):
+        return self.t
+    def sleep(self, s):
+        self.t += s
+
+
+def test_token_bucket_paces_requests():
+    clock = _Clock()
+    lim = RateLimiter(rate=2.0, burst=1, clock=clock, sleep=clock.sleep)
+    for _ in range(5):
+        lim.acquire()
+    assert abs(clock.t - 2.0) < 1e-9
+
+
+def test_aimd_backoff_and_recovery():
+    clock = _Clock()
+    lim = RateLimiter(rate=3.0, increase=0.5, clock=clock, sleep=clock.sleep)
+    lim.on_throttle(4.0)
+    assert lim.rate == 1.5
+    lim.acquire()
+    assert clock.t >= 4.0
+    for _ in range(10):
+        lim.on_success()
+    assert lim.rate == 3.0
+
+
+def test_concurrent_429s_cut_the_rate_once():
+    clock = _Clock()
+    lim = RateLimiter(rate=200.0, clock=clock, sleep=clock.sleep)
+    workers = [threading.Thread(target=lim.on_throttle, args=(2.0,)) for _ in range(16)]
+    for w in workers: w.start()
+    for w in workers: w.join()
+    assert lim.rate == 100.0
+    clock.t = 1.9
+    lim.on_throttle(2.0)
+    assert lim.rate == 100.0
+    clock.t = 2.0
+    lim.on_throttle(2.0)
+    assert lim.rate == 50.0
+    for _ in range(10):
+        lim.on_success()
+    assert lim.rate == 90.0  # the additive step scales with the configured rate (2% of 200)
+
+
+def test_retry_after_parsing():
+    assert retry_after_seconds("2") == 2.0
+    assert retry_after_seconds(None, default=1.2) == 1.2
+    assert retry_after_seconds("soon", default=1.0) == 1.0
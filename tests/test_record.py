@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from mtg_importer.overrides import apply_overrides
+from mtg_importer.record import KEYS, CardRecord, FrozenDict
+from mtg_importer.scry import normalize
+from mtg_importer.sync import record_hash
+
+
+def _card(**kw):
+    card = {
+        "id": "id-1", "oracle_id": "o-1", "name": "Llanowar Elves", "set": "dom", "collector_number": "168",
+        "rarity": "common", "lang": "en", "layout": "normal", "type_line": "Creature — Elf Druid",
+        "colors": ["G"], "color_identity": ["G"], "prices": {"usd": "0.25"},
+        "legalities": {"standard": "not_legal", "modern": "legal"},
+        "image_uris": {"normal": "http://example.com/a.jpg"},
+    }
+    card.update(kw)
+    return card
+
+
+def _plain(rec):
+    return {k: list(v) if isinstance(v, tuple) else v for k, v in rec.items()}
+
+
+def test_record_reads_like_the_old_dict():
+    rec = normalize(_card())
+    assert isinstance(rec, CardRecord) and list(rec) == list(KEYS) and len(rec) == len(KEYS)
+    assert rec["name"] == rec["oracle_raw"] == "Llanowar Elves" and rec["set"] == "DOM"
+    assert rec.get("title_override") is None and "title_override" not in rec and rec.get("nope", 1) == 1
+    with pytest.raises(KeyError):
+        rec["title_override"]
+    assert record_hash(rec, "t") == record_hash(_plain(rec), "t")  # Sync Hash is unchanged
+    assert json.loads(json.dumps(dict(rec))) == _plain(rec)
+
+
+def test_values_are_shared_and_read_only():
+    a, b = normalize(_card()), normalize(_card(id="id-2", collector_number="169"))
+    assert a["legalities"] is b["legalities"] and a["colors"] is b["colors"]
+    assert a["rarity"] is b["rarity"]
+    assert isinstance(a["prices"], FrozenDict)
+    with pytest.raises(TypeError):
+        a["legalities"]["modern"] = "banned"
+    with pytest.raises(AttributeError):
+        a.extra = 1
+
+
+def test_overrides_copy_on_write():
+    rec = normalize(_card())
+    assert apply_overrides("DOM-168", rec, {"OTHER-1": {"title": "x"}}) is rec
+    out = apply_overrides("DOM-168", rec, {"DOM-168": {"title": "Elf"}, "id-1": {"procurement": ["Promo"]}})
+    assert out["title_override"] == "Elf" and list(out["procurement"]) == ["Promo"]
+    assert list(out)[-1] == "title_override" and "title_override" not in rec
+    assert out["legalities"] is rec["legalities"] and out["image_urls"] is rec["image_urls"]
@@ -0,0 +1,40 @@
+from mtg_importer.cli import build_props_for_update
+from mtg_importer.schema import COLUMNS, codec, database_properties, missing_columns
+from mtg_importer.scry import normalize
+from mtg_importer.sync import SYNC_HASH_PROP, diff_props, plain_props, record_hash
+
+from test_normalization_mapping import _DummyNotion, _sample_card
+
+
+def test_schema_and_migration_come_from_one_table():
+    props = database_properties()
+    assert list(props) == [c.name for c in COLUMNS]
+    assert props["Name"] == {"title": {}} and props["CN Sort"] == {"number": {}} and props[SYNC_HASH_PROP] == {"rich_text": {}}
+    assert "Name" not in database_properties(title=False)
+    assert missing_columns(["Title", "Set", "Image"]) == {k: v for k, v in props.items() if k not in ("Name", "Set", "Image")}
+
+
+def test_codec_uses_the_database_title_column():
+    rec = normalize(_sample_card())
+    props = codec("Card").create(rec, "Test Card")
+    assert props["Card"] == {"title": [{"type": "text", "text": {"content": "Test Card"}}]} and "Name" not in props
+    assert props["Set"] == {"select": {"name": "TST"}} and props["Colors"] == {"multi_select": [{"name": "G"}]}
+    assert props[SYNC_HASH_PROP]["rich_text"][0]["text"]["content"] == record_hash(rec, "Test Card")
+    assert "Image" not in props and codec("Card") is codec("Card")
+    assert codec("Card").create_batch([(rec, "Test Card")] * 2) == [props, props]
+
+
+def test_delta_matches_diff_of_full_update():
+    rec = normalize(_sample_card())
+    current = plain_props(codec("Name").update(rec, "Title"))
+    current.pop(SYNC_HASH_PROP)  # kept apart from the other props, as in the page index
+    assert codec("Name").delta(rec, "Title", current, record_hash(rec, "Title")).keys() == {SYNC_HASH_PROP}
+
+    card = _sample_card()
+    card.update(prices={"usd": "2.00"}, layout="transform")
+    changed = normalize(card)
+    stale = dict(current, **{"CN Sort": None})
+    delta = codec("Name").delta(changed, "New Title", stale)
+    assert delta == diff_props(build_props_for_update("Name", "New Title", changed, _DummyNotion()), stale)
+    assert set(delta) == {"Name", "Prices", "Layout", "CN Sort", SYNC_HASH_PROP}
+    assert codec("Name").delta(changed, "New Title", None) == codec("Name").update(changed, "New Title")
@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+
+from mtg_importer import cli, notion_api
+from mtg_importer.mockapi import MockNotion
+from mtg_importer.notion_api import NotionClient
+from mtg_importer.scry import normalize
+from mtg_importer.state import StateStore
+
+from test_normalization_mapping import _sample_card
+
+
+def test_resume_skips_completed_cards(tmp_path):
+    store = StateStore(tmp_path / "state.sqlite3")
+    run = store.open_run("db1", ["fin"])
+    run.record("a", "fin-1", "created", "page-a")
+    run.record("b", "fin-2", "failed")
+    run.record("c", "fin-3", "skipped", "page-c")
+    store.close()
+
+    store = StateStore(tmp_path / "state.sqlite3")
+    resumed = store.open_run("db1", ["fin", "fic"], resume=True)
+    assert resumed.resumed and resumed.id == run.id
+    assert resumed.done == {"a", "c"}
+    resumed.record("b", "fin-2", "updated", "page-b")
+    resumed.finish()
+
+    assert not store.open_run("db1", ["fin"], resume=True).resumed  # finished runs are not resumed
+    assert [r[2] for r in store.outcomes(run.id)] == ["created", "failed", "skipped", "updated"]
+
+
+def test_resume_is_per_database(tmp_path):
+    store = StateStore(tmp_path / "state.sqlite3")
+    store.open_run("db1", ["fin"]).record("a", "fin-1", "created", "p")
+    other = store.open_run("db2", ["fin"], resume=True)
+    assert not other.resumed and other.done == set()
+
+
+class _Notion:
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+    def index_by_card_id(self, db_id, edited_since=None):
+        self.calls.append(edited_since)
+        return {p["cid"]: {"id": p["id"], "last_edited_time": p["t"], "sync_hash": p.get("h"), "props": {"Card ID": p["cid"]}}
+                for p in self.pages if not edited_since or p["t"] >= edited_since}
+
+
+def test_mirror_syncs_incrementally(tmp_path):
+    store = StateStore(tmp_path / "state.sqlite3")
+    notion = _Notion([{"cid": "a", "id": "p1", "t": "2024-01-01T00:00:00.000Z", "h": "x"},
+                      {"cid": "b", "id": "p2", "t": "2024-01-02T00:00:00.000Z"}])
+    index, fetched = store.sync_mirror(notion, "db1")
+    assert fetched == 2 and index["a"]["sync_hash"] == "x" and index["b"]["props"] == {"Card ID": "b"}
+    assert notion.calls == [None]
+
+    # hand edit in Notion: p1's Card ID changed and its hash cleared
+    notion.pages[0] = {"cid": "a2", "id": "p1", "t": "2024-03-01T00:00:00.000Z"}
+    index, fetched = store.sync_mirror(notion, "db1")
+    assert notion.calls[-1] == "2024-01-02T00:00:00.000Z"
+    assert fetched == 2 and set(index) == {"a2", "b"}  # on_or_after re-reads the watermark page
+    assert index["a2"]["sync_hash"] is None
+
+    index, fetched = store.sync_mirror(notion, "db1", full=True)
+    assert notion.calls[-1] is None and set(index) == {"a2", "b"}
+
+
+def test_page_archived_after_the_watermark_is_recreated(tmp_path, monkeypatch):
+    args = SimpleNamespace(title_style="Oracle — FF", dry_run=False)
+    card = dict(_sample_card(), image_uris={})
+    with MockNotion() as mock:
+        monkeypatch.setattr(notion_api, "NOTION", mock.url)
+        notion, store, db = NotionClient("tok"), StateStore(tmp_path / "state.sqlite3"), "db1"
+        index, _ = store.sync_mirror(notion, db)
+        assert cli._upsert_card(notion, db, "Name", index, "TST-123", normalize(card), args)[0] == "created"
+        index, _ = store.sync_mirror(notion, db, full=True)
+        old = index["id-123"]["id"]
+
+        mock.pages[old]["archived"] = True  # archived by hand; queries stop returning it
+        index, fetched = store.sync_mirror(notion, db)
+        assert fetched == 0 and index["id-123"]["id"] == old  # still mirrored
+
+        changed = normalize(dict(card, prices={"usd": "2.00"}))
+        assert cli._upsert_card(notion, db, "Name", index, "TST-123", changed, args)[0] == "created"
+        new = index["id-123"]["id"]
+        assert new != old and not mock.pages[new].get("archived")
+        assert store.sync_mirror(notion, db)[0]["id-123"]["id"] == new
@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+
+from mtg_importer.cli import build_props_for_update
+from mtg_importer.scry import normalize
+from mtg_importer.sync import SYNC_HASH_PROP, diff_props, plain_props, record_hash
+
+from test_normalization_mapping import _DummyNotion, _sample_card
+
+
+def _as_notion_page(props):
+    """Roughly what Notion returns for properties we wrote."""
+    out = {}
+    for k, v in props.items():
+        t = next(iter(v))
+        if t in ("rich_text", "title"):
+            out[k] = {"type": t, t: [{"type": "text", "plain_text": s["text"]["content"], "text": s["text"]} for s in v[t]]}
+        elif t == "number":
+            out[k] = {"type": t, t: int(v[t]) if v[t] is not None and v[t] == int(v[t]) else v[t]}
+        else:
+            out[k] = {"type": t, t: v[t]}
+    return out
+
+
+def test_record_hash_is_stable_and_title_sensitive():
+    rec = normalize(_sample_card())
+    assert record_hash(rec, "A") == record_hash(dict(reversed(list(rec.items()))), "A")
+    assert record_hash(rec, "A") != record_hash(rec, "B")
+
+
+def test_diff_only_sends_changed_properties():
+    rec = normalize(_sample_card())
+    props = build_props_for_update("Name", "Title", rec, _DummyNotion())
+    current = plain_props(_as_notion_page(props))
+    assert diff_props(props, current) == {}
+
+    card = _sample_card()
+    card["prices"] = {"usd": "2.00"}
+    changed = normalize(card)
+    delta = diff_props(build_props_for_update("Name", "Title", changed, _DummyNotion()), current)
+    assert set(delta) == {"Prices", SYNC_HASH_PROP}
+
+
+_HASH_SCRIPT = """
+from mtg_importer.overrides import apply_overrides
+from mtg_importer.scry import normalize
+from mtg_importer.sync import record_hash
+from test_normalization_mapping import _sample_card
+methods = ["Secret Lair", "Prerelease", "Collector Booster", "Judge Promo", "Bundle"]
+rec = apply_overrides("TST-123", normalize(_sample_card()), {"TST-123": {"procurement": methods}})
+print(record_hash(rec, "Title"))
+"""
+
+
+def test_record_hash_is_stable_across_processes():
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([os.path.dirname(here), here]))
+    digests = {subprocess.run([sys.executable, "-c", _HASH_SCRIPT], env=dict(env, PYTHONHASHSEED=seed),
+                              capture_output=True, text=True, check=True).stdout for seed in ("1", "2", "3")}
+    assert len(digests) == 1
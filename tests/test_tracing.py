@@ -0,0 +1,47 @@
+import contextvars
+import json
+import threading
+
+from mtg_importer import tracing
+from mtg_importer.loadtest import run_load
+
+
+def test_spans_are_noops_without_a_trace():
+    assert tracing.span("create") is tracing.lane("fin-1") is tracing._NULL
+    with tracing.span("create") as sp:
+        sp.set(outcome="created")
+
+
+def test_lanes_are_reused_and_context_follows_threads(tmp_path):
+    path = tmp_path / "trace.json"
+    with tracing.session(str(path), log=lambda *a: None) as t:
+        with tracing.lane("fin-1") as card:
+            with tracing.span("create", cat="notion"):
+                pass
+            ctx = contextvars.copy_context()
+            th = threading.Thread(target=ctx.run, args=(lambda: tracing.span("image upload").__enter__().__exit__(None, None, None),))
+            th.start(); th.join()
+            card.set(outcome="created")
+        with tracing.lane("fin-2"):
+            with tracing.lane("image_0.jpg", cat="image"):
+                pass
+        with tracing.span("query"):
+            pass
+    assert tracing.active() is None
+    ev = {e["name"]: e for e in json.loads(path.read_text())["traceEvents"] if e["ph"] == "X"}
+    assert ev["fin-1"]["args"] == {"outcome": "created"}
+    assert ev["create"]["tid"] == ev["image upload"]["tid"] == ev["fin-1"]["tid"] == ev["fin-2"]["tid"] == 1
+    assert ev["image_0.jpg"]["tid"] == 2 and ev["image_0.jpg"]["args"]["parent"] == "fin-2"
+    assert ev["query"]["pid"] == tracing.THREADS_PID
+    assert ev["fin-1"]["ts"] <= ev["create"]["ts"] and ev["create"]["ts"] + ev["create"]["dur"] <= ev["fin-1"]["ts"] + ev["fin-1"]["dur"] + 1
+    assert len(t.events) == 6
+
+
+def test_import_trace_has_per_card_spans(tmp_path):
+    path = tmp_path / "run.json"
+    run_load(["aaa"], ["--trace", str(path), "--workers", "2"], cards_per_set=6, image_bytes=1024)
+    events = [e for e in json.loads(path.read_text())["traceEvents"] if e["ph"] == "X"]
+    cards = [e for e in events if e["cat"] == "card"]
+    assert len(cards) == 6 and {e["args"]["outcome"] for e in cards} == {"created"}
+    names = {e["name"] for e in events}
+    assert {"create", "images", "image download", "image upload", "fetch"} <= names
@@ -0,0 +1,116 @@
+import socket, threading
+
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from mtg_importer import transport as tr
+
+
+class _Resp:
+    def __init__(self, status, headers=None):
+        self.status_code = status
+        self.headers = headers or {}
+    def close(self):
+        pass
+
+
+class _Session:
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = 0
+    def request(self, method, url, **kw):
+        self.calls += 1
+        item = self.script.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+
+def _transport(script, monkeypatch):
+    t = tr.Transport(policy=tr.RetryPolicy(max_attempts=4, base=0.01))
+    sess = _Session(script)
+    monkeypatch.setattr(t, "session", lambda url: sess)
+    monkeypatch.setattr(tr.time, "sleep", lambda s: None)
+    return t, sess
+
+
+def test_retries_5xx_and_connection_resets(monkeypatch):
+    t, sess = _transport([_Resp(502), requests.exceptions.ConnectionError("reset"), _Resp(200)], monkeypatch)
+    assert t.request("GET", "https://api.scryfall.com/x").status_code == 200
+    assert sess.calls == 3
+
+
+def test_gives_up_after_max_attempts(monkeypatch):
+    t, sess = _transport([_Resp(503)] * 4, monkeypatch)
+    assert t.request("GET", "https://api.scryfall.com/x").status_code == 503
+    assert sess.calls == 4
+
+
+def test_retry_after_header_wins():
+    policy = tr.RetryPolicy(base=0.5, cap=30)
+    assert policy.delay(3, "7") == 7.0
+    assert 0 <= policy.delay(2) <= 2.0
+
+
+def test_one_session_per_host():
+    t = tr.Transport(pool_size=4)
+    a = t.session("https://api.notion.com/v1/pages")
+    assert t.session("https://api.notion.com/v1/search") is a
+    assert t.session("https://api.scryfall.com/cards") is not a
+    t.close()
+
+
+def test_post_is_not_resent_once_it_may_have_landed(monkeypatch):
+    t, sess = _transport([_Resp(503), _Resp(200)], monkeypatch)
+    assert t.request("POST", "https://api.notion.com/v1/pages").status_code == 503
+    assert sess.calls == 1
+    t, sess = _transport([requests.exceptions.ReadTimeout("slow"), _Resp(200)], monkeypatch)
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        t.request("POST", "https://api.notion.com/v1/files")
+    assert sess.calls == 1
+
+
+def test_post_retries_429_and_unsent_errors(monkeypatch):
+    script = [_Resp(429, {"Retry-After": "0"}), requests.exceptions.ConnectTimeout("connect"),
+              requests.exceptions.ConnectionError(MaxRetryError(None, "/v1/pages", NewConnectionError(None, "refused"))), _Resp(200)]
+    t, sess = _transport(script, monkeypatch)
+    assert t.request("POST", "https://api.notion.com/v1/pages").status_code == 200
+    assert sess.calls == 4
+    t, sess = _transport([_Resp(503), _Resp(200)], monkeypatch)
+    assert t.request("POST", "https://api.notion.com/v1/databases/x/query", idempotent=True).status_code == 200
+    assert sess.calls == 2
+
+
+def test_post_is_not_resent_after_the_server_read_it(monkeypatch):
+    """A server that reads the whole POST and then drops the socket must see it once."""
+    srv = socket.create_server(("127.0.0.1", 0))
+    seen = []
+
+    def serve():
+        while True:
+            try:
+                conn, _ = srv.accept()
+            except OSError:
+                return
+            with conn:
+                data = b""
+                while b"\r\n\r\n" not in data:
+                    data += conn.recv(4096)
+                head, body = data.split(b"\r\n\r\n", 1)
+                size = int(next(l.split(b":")[1] for l in head.split(b"\r\n") if l.lower().startswith(b"content-length")))
+                while len(body) < size:
+                    body += conn.recv(4096)
+                seen.append(body)
+
+    threading.Thread(target=serve, daemon=True).start()
+    monkeypatch.setattr(tr.time, "sleep", lambda s: None)
+    t = tr.Transport(policy=tr.RetryPolicy(max_attempts=3, base=0.01))
+    try:
+        with pytest.raises(requests.exceptions.ConnectionError) as err:
+            t.request("POST", f"http://127.0.0.1:{srv.getsockname()[1]}/v1/pages", data=b'{"parent": {}}', timeout=5)
+        assert not tr.unsent(err.value)
+        assert seen == [b'{"parent": {}}']
+    finally:
+        srv.close()
+        t.close()
@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+
+from mtg_importer.schema import codec
+from mtg_importer.scry import normalize
+from mtg_importer.sync import SYNC_HASH_PROP, record_hash
+from mtg_importer.upsert import plan_page, plan_upsert, settle
+
+from test_normalization_mapping import _sample_card
+
+ARGS = SimpleNamespace(title_style="Oracle — FF", dry_run=False)
+
+
+class _DummyNotion:
+    def images_unchanged(self, urls, current):
+        return False
+
+
+def test_plan_skip_patch_create_and_settle():
+    rec = normalize(_sample_card())
+    create = plan_upsert(_DummyNotion(), "Name", None, "TST-1", rec, ARGS)
+    assert create.outcome == "created" and create.props["Card ID"] and create.images_due == bool(rec["image_urls"])
+    index = {}
+    settle(create, index, rec, "page-1")
+    assert index == {rec["id"]: {"id": "page-1"}}
+
+    patch = plan_upsert(_DummyNotion(), "Name", index[rec["id"]], "TST-1", rec, ARGS)
+    assert patch.outcome == "updated" and patch.digest == record_hash(rec, patch.title_text)
+    index[rec["id"]]["props"] = {}
+    settle(patch, index, rec, "page-1")
+    assert index[rec["id"]]["sync_hash"] == patch.digest and index[rec["id"]]["props"]["Name"] == patch.title_text
+    assert SYNC_HASH_PROP in index[rec["id"]]["props"]
+    assert plan_upsert(_DummyNotion(), "Name", index[rec["id"]], "TST-1", rec, ARGS).outcome == "skipped"
+
+    dry = plan_upsert(_DummyNotion(), "Name", None, "TST-1", rec, SimpleNamespace(**{**vars(ARGS), "dry_run": True}))
+    assert dry.props is None and dry.preview.startswith('CREATE TST-1: "')
+
+
+def test_plan_page_encodes_new_cards_in_one_batch(monkeypatch):
+    recs = [normalize(dict(_sample_card(), id=f"id-{i}", collector_number=str(i))) for i in range(3)]
+    items = [(f"TST-{i}", r) for i, r in enumerate(recs)]
+    index = {"id-1": {"id": "page-1", "sync_hash": "old", "props": {}}}
+    enc = codec("Name")
+    calls = []
+    real = enc.create_batch
+    monkeypatch.setattr(enc, "create_batch", lambda pairs: calls.append(len(pairs)) or real(pairs))
+    plans = plan_page(_DummyNotion(), "Name", index, items, ARGS)
+    assert [p.outcome for p in plans] == ["created", "updated", "created"] and calls == [2]
+    assert plans[0].props == enc.create(recs[0], plans[0].title_text)
+    assert plans[0].props["Rarity"] is not plans[2].props["Rarity"]  # payloads never share mutable parts